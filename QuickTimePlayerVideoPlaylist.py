@@ -9,12 +9,29 @@ import sys
 import os
 import json
 import random
+import itertools
 from pathlib import Path
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import subprocess
 import time
+from applescript_bridge import run_applescript, get_bridge
+from playlist_validation import PathValidator, apply_item_state, STATE_CHECKING, UNPLAYABLE_STATES
+from playlist_formats import PLAYLIST_EXTENSIONS, IMPORT_BATCH_SIZE, iter_playlist, write_playlist
+from playlist_search import SearchIndex, PlaylistFilter
+from playlist_edit import compaction_map, compact, move_map, remap_indices, remap_current, removal_ranges, reorder
+from track_library import TrackLibrary, LibraryScanner
+from smart_playlist import SmartPlaylist, SmartPlaylistDialog
+from play_stats import PlayStatsRecorder
+from quicktime_player import EndOfTrackScheduler, PRELOAD_LEAD
+from player_commands import PlayerCommandExecutor, PLAYER_STOP_WAIT_MS
+from player_backend import QuickTimeBackend, SimulatedBackend
+from player_watchdog import PlayerWatchdog
+from airplay_route import AirPlayRoute, ROUTE_MARKERS
+from airplay_clicks import AirPlayButtonCache, AirPlayTimings, MENU_SETTLE, click_airplay_button
+from playlist_sequence import NavigationCoalescer, next_track_index, plan_queue
+from playlist_runner import PlaylistRunner, RUNNER_QUEUE_LIMIT
 
 
 class SettingsDialog(QDialog):
@@ -88,8 +105,23 @@ class SettingsDialog(QDialog):
         self.menu_wait_spin.setValue(self.settings.get('airplay_menu_wait', 1000))
         self.menu_wait_spin.setSuffix(" ms")
         self.menu_wait_spin.setSingleStep(100)
+        self.menu_wait_spin.setToolTip("Longest wait for the AirPlay menu; the click goes as soon as it opens")
         timing_layout.addWidget(self.menu_wait_spin, 1, 1)
         
+        # Measured instead of guessed
+        timings = getattr(self.parent(), 'airplay_timings', None)
+        learned = QLabel(timings.summary() if timings else "No AirPlay clicks measured yet")
+        learned.setStyleSheet("color: #666; font-size: 11px;")
+        learned.setWordWrap(True)
+        timing_layout.addWidget(learned, 2, 0, 1, 2)
+        
+        suggested = timings.suggested_menu_wait() if timings else None
+        if suggested:
+            learned_btn = QPushButton(f"Use {suggested} ms")
+            learned_btn.setToolTip("Set the menu wait to twice the slowest measured menu")
+            learned_btn.clicked.connect(lambda: self.menu_wait_spin.setValue(suggested))
+            timing_layout.addWidget(learned_btn, 1, 2)
+        
         timing_group.setLayout(timing_layout)
         layout.addWidget(timing_group)
         
@@ -105,6 +137,33 @@ class SettingsDialog(QDialog):
         )
         playback_layout.addWidget(self.auto_minimize_check)
         
+        # Gapless preload checkbox
+        self.preload_check = QCheckBox("Preload next track for near-gapless transitions")
+        self.preload_check.setChecked(self.settings.get('gapless_preload', False))
+        self.preload_check.setToolTip(
+            "Open the next track paused shortly before the current one ends\n"
+            "and start it at the boundary (not used while AirPlay is on)"
+        )
+        playback_layout.addWidget(self.preload_check)
+        
+        # Runner mode checkbox
+        self.runner_check = QCheckBox("Play the queue in one AppleScript session")
+        self.runner_check.setChecked(self.settings.get('runner_mode', False))
+        self.runner_check.setToolTip(
+            "QuickTime opens and waits out every track of the queue itself,\n"
+            "with no command per track (not used while AirPlay is on)"
+        )
+        playback_layout.addWidget(self.runner_check)
+        
+        # Warm player checkbox
+        self.warm_check = QCheckBox("Keep QuickTime running between tracks")
+        self.warm_check.setChecked(self.settings.get('warm_player', True))
+        self.warm_check.setToolTip(
+            "Close finished tracks but leave QuickTime open, so the next\n"
+            "track does not wait for the app to launch again"
+        )
+        playback_layout.addWidget(self.warm_check)
+        
         playback_group.setLayout(playback_layout)
         layout.addWidget(playback_group)
         
@@ -140,7 +199,10 @@ class SettingsDialog(QDialog):
             'airplay_offset_y': self.y_offset_spin.value(),
             'airplay_delay': self.delay_spin.value(),
             'airplay_menu_wait': self.menu_wait_spin.value(),
-            'auto_minimize_on_airplay': self.auto_minimize_check.isChecked()
+            'auto_minimize_on_airplay': self.auto_minimize_check.isChecked(),
+            'gapless_preload': self.preload_check.isChecked(),
+            'runner_mode': self.runner_check.isChecked(),
+            'warm_player': self.warm_check.isChecked()
         }
 
 
@@ -149,6 +211,8 @@ class PlaylistWidget(QListWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Keep the main window; parent() becomes the central widget once laid out
+        self.player = parent
         self.setDragDropMode(QListWidget.InternalMove)
         self.setDefaultDropAction(Qt.MoveAction)
         self.setAlternatingRowColors(True)
@@ -176,36 +240,31 @@ class PlaylistWidget(QListWidget):
         # Play action
         if self.currentItem():
             play_action = QAction("Play", self)
-            play_action.triggered.connect(lambda: self.parent().play_selected_item())
+            play_action.triggered.connect(lambda: self.player.play_selected_item())
             menu.addAction(play_action)
         
         menu.exec_(self.mapToGlobal(pos))
     
     def delete_selected(self):
         """Delete selected items"""
-        selected_items = self.selectedItems()
-        if not selected_items:
+        rows = sorted({index.row() for index in self.selectedIndexes()})
+        if not rows:
             return
             
         reply = QMessageBox.question(
             self, 
             "Delete Items", 
-            f"Delete {len(selected_items)} selected item(s)?",
+            f"Delete {len(rows)} selected item(s)?",
             QMessageBox.Yes | QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            # Remove items in reverse order to maintain indices
-            for item in reversed(selected_items):
-                row = self.row(item)
-                self.takeItem(row)
-                # Also remove from parent's playlist
-                if hasattr(self.parent(), 'playlist'):
-                    del self.parent().playlist[row]
-            
-            # Update parent
-            if hasattr(self.parent(), 'update_status'):
-                self.parent().update_status()
+            if hasattr(self.player, 'remove_rows'):
+                self.player.detach_smart_playlist()
+                self.player.remove_rows(rows)
+            else:
+                for start, count in removal_ranges(rows):
+                    self.model().removeRows(start, count)
     
     def keyPressEvent(self, event):
         """Handle keyboard shortcuts"""
@@ -216,8 +275,9 @@ class PlaylistWidget(QListWidget):
 
 
 class VideoPlaylistPro(QMainWindow):
-    def __init__(self):
+    def __init__(self, backend=None):
         super().__init__()
+        self.backend = backend or QuickTimeBackend()  # PlayerBackend that runs the commands
         self.playlist = []
         self.current_index = -1
         self.is_playing = False
@@ -227,13 +287,89 @@ class VideoPlaylistPro(QMainWindow):
         self.play_history = []  # Track played songs
         self.shuffle_queue = []  # Shuffle order
         self.single_track_mode = False  # For play one feature
+        self.track_states = {}  # path -> validation state from PathValidator
+        self._unplayable_skips = 0  # missing tracks skipped since the last one that opened
+        self._pending_states = {}
+        self.track_durations = {}  # path -> seconds, from #EXTINF / PLS lengths
+        self._import_entries = None
+        self._import_skipped = []  # locations of the import that are not local files
+        self.search_index = SearchIndex()
+        self.smart_playlist = None  # Live smart playlist, until edited by hand
+        self._stats_track = None  # Track whose play is being logged
+        self._preloaded = None  # (index, path, document name) opened paused for the next track
+        self._preload_tried = False
+        self._track_ended_at = None  # monotonic end of the last finished track
+        self.transition_gaps = []  # seconds of silence between finished and next track
+        self._last_position = None  # (seconds into the track, monotonic time seen or None while paused)
+        self._resume_at = None  # (index, seconds) to resume after a player restart
+        self.runner = None  # PlaylistRunner playing the queue, in runner mode
+        self._ending_runners = set()  # runners let go of, kept until their thread finishes
+        self.runner_queue = []  # playlist indexes handed to the runner
+        self.runner_position = 0  # queue position of the playing track
+        self._runner_disabled = False  # set when the runner failed this session
+        self.airplay_route = AirPlayRoute()  # skips the AirPlay clicks while the route holds
         
         self.settings_file = Path.home() / '.video_playlist_pro_settings.json'
         self.settings = {}
         self.load_settings()
         
+        # Where the AirPlay button sits and how fast its menu opens, learned
+        # in earlier sessions
+        self.airplay_buttons = AirPlayButtonCache(self.settings.get('airplay_buttons'))
+        self.airplay_timings = AirPlayTimings(self.settings.get('airplay_timings'))
+        
         self.init_ui()
         
+        # Background existence checks (network volumes may be slow or asleep)
+        self.path_validator = PathValidator(self)
+        self.path_validator.path_checked.connect(self.on_path_checked)
+        self.path_validator.volume_unavailable.connect(self.on_volume_unavailable)
+        self.path_validator.volume_restored.connect(self.on_volume_restored)
+        
+        # Batch validation results so thousands of rows repaint once
+        self.state_flush_timer = QTimer()
+        self.state_flush_timer.setSingleShot(True)
+        self.state_flush_timer.setInterval(100)
+        self.state_flush_timer.timeout.connect(self.apply_track_states)
+        
+        # Streams M3U/PLS imports into the list without stalling the UI
+        self.import_timer = QTimer()
+        self.import_timer.setInterval(0)
+        self.import_timer.timeout.connect(self._import_next_batch)
+        
+        # Metadata cache for smart playlists and tag search, scanned in the background
+        self.library = TrackLibrary()
+        self.library_scanner = LibraryScanner()
+        self.library_scanner.tracks_scanned.connect(self.on_tracks_scanned)
+        self.library_scanner.start()
+        
+        # Rules like "not played in 7 days" change with the clock alone
+        self.smart_refresh_timer = QTimer()
+        self.smart_refresh_timer.setInterval(10 * 60 * 1000)
+        self.smart_refresh_timer.timeout.connect(self.refresh_smart_playlist)
+        
+        # Play/skip/finish logging, written in batches off the UI thread
+        self.play_stats = PlayStatsRecorder()
+        self.play_stats.stats_flushed.connect(self.update_smart_playlist)
+        self.play_stats.start()
+        
+        # Every QuickTime command runs here, so the window never waits on osascript
+        self.player_commands = PlayerCommandExecutor()
+        self.player_commands.command_finished.connect(self.on_player_command_finished)
+        self.player_commands.command_failed.connect(self.on_player_command_failed)
+        self.player_commands.start()
+        
+        # Restarts a wedged QuickTime and resumes the track where it was
+        self.watchdog = PlayerWatchdog()
+        self.watchdog_timer = QTimer()
+        self.watchdog_timer.setInterval(5000)
+        self.watchdog_timer.timeout.connect(self.watchdog_tick)
+        self.watchdog_timer.start()
+        
+        # Launch QuickTime in the background so even the first track opens warm
+        if self.keep_player_warm():
+            self.player_commands.submit("warm_up", self.backend.warm_up, group="playback")
+        
     def init_ui(self):
         self.setWindowTitle("QuickTime Player Video Playlist")
         self.setGeometry(100, 100, 700, 500)
@@ -309,6 +445,10 @@ class VideoPlaylistPro(QMainWindow):
         load_btn.clicked.connect(self.load_playlist)
         top_controls.addWidget(load_btn)
         
+        smart_btn = QPushButton("Smart Playlist")
+        smart_btn.clicked.connect(self.create_smart_playlist)
+        top_controls.addWidget(smart_btn)
+        
         top_controls.addStretch()
         
         # AirPlay button
@@ -343,10 +483,19 @@ class VideoPlaylistPro(QMainWindow):
         
         layout.addLayout(top_controls)
         
+        # Search box
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search playlist...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.filter_playlist)
+        layout.addWidget(self.search_box)
+        
         # Playlist widget
         self.playlist_widget = PlaylistWidget(self)
         self.playlist_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.playlist_widget.model().rowsMoved.connect(self.on_rows_moved)
         layout.addWidget(self.playlist_widget)
+        self.playlist_filter = PlaylistFilter(self.playlist_widget, self.playlist, self.search_index)
         
         # Playback controls
         controls_widget = QWidget()
@@ -421,10 +570,18 @@ class VideoPlaylistPro(QMainWindow):
         self.status_label.setStyleSheet("padding: 5px; color: #666;")
         layout.addWidget(self.status_label)
         
-        # Timer for checking playback
+        # Timer for checking playback; re-armed after every check with a
+        # delay planned from the track's remaining time
         self.check_timer = QTimer()
+        self.check_timer.setSingleShot(True)
         self.check_timer.timeout.connect(self.check_playback)
-        self.check_timer.setInterval(2000)
+        self.end_scheduler = EndOfTrackScheduler()
+        
+        # Next/previous presses settle here, so a burst opens one track
+        self.navigation = NavigationCoalescer()
+        self.navigation_timer = QTimer()
+        self.navigation_timer.setSingleShot(True)
+        self.navigation_timer.timeout.connect(self._navigate_after_delay)
         
         # Update repeat button appearance
         self.update_repeat_button()
@@ -449,8 +606,13 @@ class VideoPlaylistPro(QMainWindow):
             for file in files:
                 self.playlist.append(file)
                 self.playlist_widget.addItem(Path(file).name)
+            self.index_library_tracks(files)
+            self.detach_smart_playlist()
+            self.library_scanner.enqueue(files)
+            self.playlist_filter.invalidate()
             self.update_status()
             self.generate_shuffle_queue()
+            self.sync_runner_queue()
     
     def add_folder(self):
         """Add all video files from folder"""
@@ -461,6 +623,7 @@ class VideoPlaylistPro(QMainWindow):
             folder_path = Path(folder)
             
             files_added = 0
+            first_new_row = len(self.playlist)
             for file_path in sorted(folder_path.iterdir()):
                 if file_path.suffix.lower() in video_extensions:
                     self.playlist.append(str(file_path))
@@ -468,8 +631,13 @@ class VideoPlaylistPro(QMainWindow):
                     files_added += 1
             
             if files_added > 0:
+                self.index_library_tracks(self.playlist[first_new_row:])
+                self.detach_smart_playlist()
+                self.library_scanner.enqueue(self.playlist[first_new_row:])
+                self.playlist_filter.invalidate()
                 self.update_status()
                 self.generate_shuffle_queue()
+                self.sync_runner_queue()
                 QMessageBox.information(self, "Success", f"Added {files_added} video files")
             else:
                 QMessageBox.warning(self, "No Files", "No video files found in the selected folder")
@@ -485,15 +653,80 @@ class VideoPlaylistPro(QMainWindow):
             )
             
             if reply == QMessageBox.Yes:
-                self.stop_playback()
-                self.playlist.clear()
-                self.playlist_widget.clear()
-                self.current_index = -1
-                self.play_history.clear()
-                self.shuffle_queue.clear()
+                self.detach_smart_playlist()
+                self.reset_playlist()
                 self.update_status()
                 self.current_track_label.setText("No video playing")
     
+    def reset_playlist(self):
+        """Stop playback and forget the playlist and everything kept per track"""
+        self.stop_playback()
+        self.import_timer.stop()
+        self._import_entries = None
+        self.path_validator.cancel()
+        self.playlist.clear()
+        self.playlist_widget.clear()
+        self.track_states.clear()
+        self._pending_states.clear()
+        self.track_durations.clear()
+        self.search_index.clear()
+        self.playlist_filter.invalidate()
+        self.current_index = -1
+        self.play_history.clear()
+        self.shuffle_queue.clear()
+    
+    def remove_rows(self, rows):
+        """Remove many rows at once, remapping playback state in one pass"""
+        mapping = compaction_map(len(self.playlist), rows)
+        current = remap_current(self.current_index, mapping)
+        if current is None:
+            # The current track itself is going; don't let another row stand in for it
+            self.stop_playback()
+            current = -1
+        
+        removed_paths = set()
+        for row in rows:
+            if 0 <= row < len(self.playlist):
+                self.search_index.remove(self.playlist[row])
+                removed_paths.add(self.playlist[row])
+        
+        # Rebuild in place; the playlist filter holds a reference to the list
+        self.playlist[:] = compact(self.playlist, mapping)
+        self.play_history[:] = remap_indices(self.play_history, mapping)
+        self.shuffle_queue[:] = remap_indices(self.shuffle_queue, mapping)
+        self.current_index = current
+        
+        # Per-path state of tracks no longer in the playlist (duplicates keep theirs)
+        for path in removed_paths.difference(self.playlist):
+            self.track_states.pop(path, None)
+            self._pending_states.pop(path, None)
+            self.track_durations.pop(path, None)
+        
+        # Remove contiguous runs from the view, last run first
+        self.playlist_widget.setUpdatesEnabled(False)
+        try:
+            model = self.playlist_widget.model()
+            for start, count in removal_ranges(rows):
+                model.removeRows(start, count)
+        finally:
+            self.playlist_widget.setUpdatesEnabled(True)
+        
+        self.playlist_filter.invalidate()
+        self.update_status()
+        self.sync_runner_queue()
+    
+    def on_rows_moved(self, parent, start, end, destination, row):
+        """Follow a drag reorder in the view, remapping playback state"""
+        self.detach_smart_playlist()
+        mapping = move_map(len(self.playlist), start, end, row)
+        self.playlist[:] = reorder(self.playlist, mapping)
+        self.play_history[:] = remap_indices(self.play_history, mapping)
+        self.shuffle_queue[:] = remap_indices(self.shuffle_queue, mapping)
+        if 0 <= self.current_index < len(mapping):
+            self.current_index = mapping[self.current_index]
+        self.playlist_filter.invalidate()
+        self.sync_runner_queue()
+    
     def save_playlist(self):
         """Save playlist to file"""
         if not self.playlist:
@@ -504,10 +737,16 @@ class VideoPlaylistPro(QMainWindow):
             self,
             "Save Playlist",
             "",
-            "Playlist Files (*.json);;All Files (*.*)"
+            "Playlist Files (*.json);;M3U Playlist (*.m3u8 *.m3u);;PLS Playlist (*.pls);;All Files (*.*)"
         )
         
-        if file_path:
+        if file_path and Path(file_path).suffix.lower() in PLAYLIST_EXTENSIONS:
+            try:
+                write_playlist(file_path, self.playlist, self.track_durations)
+                QMessageBox.information(self, "Success", "Playlist saved successfully")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save playlist: {str(e)}")
+        elif file_path:
             try:
                 playlist_data = {
                     'tracks': self.playlist,
@@ -528,23 +767,30 @@ class VideoPlaylistPro(QMainWindow):
             self,
             "Load Playlist",
             "",
-            "Playlist Files (*.json);;All Files (*.*)"
+            "Playlist Files (*.json *.m3u8 *.m3u *.pls);;All Files (*.*)"
         )
         
-        if file_path:
+        if file_path and Path(file_path).suffix.lower() in PLAYLIST_EXTENSIONS:
+            self.import_playlist(file_path)
+        elif file_path:
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     playlist_data = json.load(f)
                 
-                # Clear current playlist
-                self.playlist.clear()
-                self.playlist_widget.clear()
+                # Clear current playlist, stopping what plays from it
+                self.detach_smart_playlist()
+                self.reset_playlist()
                 
-                # Load tracks
+                # Load tracks - existence is checked in the background and
+                # missing tracks are marked instead of dropped
                 for track in playlist_data.get('tracks', []):
-                    if Path(track).exists():
-                        self.playlist.append(track)
-                        self.playlist_widget.addItem(Path(track).name)
+                    self.playlist.append(track)
+                    self.playlist_widget.addItem(Path(track).name)
+                    self.track_states[track] = STATE_CHECKING
+                self.index_library_tracks(self.playlist)
+                self.playlist_filter.invalidate()
+                self.path_validator.validate(self.playlist)
+                self.library_scanner.enqueue(self.playlist)
                 
                 # Load settings
                 self.shuffle_enabled = playlist_data.get('shuffle', False)
@@ -555,11 +801,229 @@ class VideoPlaylistPro(QMainWindow):
                 
                 self.update_status()
                 self.generate_shuffle_queue()
+                self.sync_runner_queue()
                 
                 QMessageBox.information(self, "Success", f"Loaded {len(self.playlist)} videos")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load playlist: {str(e)}")
     
+    def import_playlist(self, file_path):
+        """Start streaming an M3U/M3U8/PLS playlist into the list"""
+        self.detach_smart_playlist()
+        self.reset_playlist()
+        
+        self._import_skipped = []
+        self._import_entries = iter_playlist(file_path, self._import_skipped)
+        self.import_timer.start()
+    
+    def _import_next_batch(self):
+        """Add one batch of imported entries, then return to the event loop"""
+        paths = []
+        titles = {}
+        try:
+            for entry in itertools.islice(self._import_entries, IMPORT_BATCH_SIZE):
+                paths.append(entry.path)
+                titles[entry.path] = entry.title
+                if entry.duration is not None:
+                    self.track_durations[entry.path] = entry.duration
+        except Exception as e:
+            self.import_timer.stop()
+            self._import_entries = None
+            QMessageBox.critical(self, "Error", f"Failed to load playlist: {str(e)}")
+            return
+        
+        if paths:
+            self.index_library_tracks(paths, titles)
+            self.playlist.extend(paths)
+            self.playlist_widget.addItems([Path(path).name for path in paths])
+            for path in paths:
+                self.track_states[path] = STATE_CHECKING
+            self.library_scanner.enqueue(paths)
+            self.playlist_filter.invalidate()
+            self.sync_runner_queue()
+            self.status_label.setText(f"Importing... {len(self.playlist)} videos")
+        
+        if len(paths) < IMPORT_BATCH_SIZE:
+            # Generator exhausted
+            self.import_timer.stop()
+            self._import_entries = None
+            self.update_status()
+            self.generate_shuffle_queue()
+            self.sync_runner_queue()
+            self.path_validator.validate(self.playlist)
+            message = f"Loaded {len(self.playlist)} videos"
+            if self._import_skipped:
+                # Windows drive paths and URLs QuickTime can't open from here
+                print(f"Skipped playlist entries: {self._import_skipped[:20]}")
+                message += f"\nSkipped {len(self._import_skipped)} entries that are not local files"
+            QMessageBox.information(self, "Success", message)
+    
+    def create_smart_playlist(self):
+        """Build a live playlist from rules over the track library"""
+        current = self.smart_playlist
+        if current is None and self.settings.get('smart_playlist'):
+            current = SmartPlaylist.from_dict(self.settings['smart_playlist'])
+        
+        dialog = SmartPlaylistDialog(self, current)
+        if not dialog.exec_():
+            return
+        
+        smart = dialog.get_smart_playlist()
+        try:
+            paths = smart.evaluate(self.library.conn)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Smart playlist failed: {str(e)}")
+            return
+        self.settings['smart_playlist'] = smart.to_dict()
+        
+        # Replace the playlist with the result, as when opening a playlist
+        self.reset_playlist()
+        self.append_smart_tracks(paths)
+        self.path_validator.validate(self.playlist)
+        
+        self.smart_playlist = smart
+        if smart.is_time_relative:
+            self.smart_refresh_timer.start()
+        else:
+            self.smart_refresh_timer.stop()
+        
+        QMessageBox.information(self, "Smart Playlist", f"{smart.name}: {len(paths)} videos")
+    
+    def append_smart_tracks(self, paths):
+        """Append library tracks, indexing their cached tags for search"""
+        if not paths:
+            return
+        self.index_library_tracks(paths)
+        self.playlist.extend(paths)
+        self.playlist_widget.addItems([Path(path).name for path in paths])
+        self.playlist_filter.invalidate()
+        self.update_status()
+        self.generate_shuffle_queue()
+        self.sync_runner_queue()
+    
+    def insert_smart_tracks(self, paths):
+        """Insert new smart playlist matches at the rows its order gives them"""
+        new = set(paths)
+        if [path for path in self.smart_playlist.paths if path not in new] != self.playlist:
+            # The rows no longer mirror the result; keep them and add at the end
+            self.append_smart_tracks(paths)
+            return
+        
+        rows = {path: row for row, path in enumerate(self.smart_playlist.paths)}
+        mapping = [rows[path] for path in self.playlist]
+        new_rows = sorted(rows[path] for path in paths)
+        self.index_library_tracks(paths)
+        self.playlist[:] = self.smart_playlist.paths
+        self.play_history[:] = remap_indices(self.play_history, mapping)
+        self.shuffle_queue[:] = remap_indices(self.shuffle_queue, mapping)
+        if 0 <= self.current_index < len(mapping):
+            self.current_index = mapping[self.current_index]
+        if self.shuffle_enabled:
+            for row in new_rows:
+                self.shuffle_queue.insert(random.randrange(len(self.shuffle_queue) + 1), row)
+        
+        # Ascending, so each insert leaves the rows before it in place
+        for row in new_rows:
+            self.playlist_widget.insertItem(row, Path(self.playlist[row]).name)
+        self.playlist_filter.invalidate()
+        self.update_status()
+        self.sync_runner_queue()
+    
+    def index_library_tracks(self, paths, titles=None):
+        """Index tracks for search by file name and cached tags, and remember their cached durations
+        
+        titles maps paths to a title from an imported playlist. Tracks not
+        cached yet get their tags through on_tracks_scanned.
+        """
+        metadata = self.library.metadata(paths)
+        for path in paths:
+            texts = [Path(path).name, titles.get(path) if titles else None]
+            row = metadata.get(path)
+            if row is not None:
+                texts += [row['title'], row['artist'], row['album']]
+                if row['duration']:
+                    self.track_durations.setdefault(path, row['duration'])
+            self.search_index.add(path, *texts)
+    
+    def detach_smart_playlist(self):
+        """Stop live updates once the playlist is edited by hand"""
+        self.smart_playlist = None
+        self.smart_refresh_timer.stop()
+    
+    def update_smart_playlist(self, changed_paths):
+        """Re-check changed tracks against the live smart playlist"""
+        if self.smart_playlist is None:
+            return
+        added, removed = self.smart_playlist.update(self.library.conn, changed_paths, keep=self._stats_track)
+        self.apply_smart_changes(added, removed)
+    
+    def refresh_smart_playlist(self):
+        """Fully re-evaluate a time-relative smart playlist"""
+        if self.smart_playlist is None:
+            return
+        added, removed = self.smart_playlist.refresh(self.library.conn, keep=self._stats_track)
+        self.apply_smart_changes(added, removed)
+    
+    def apply_smart_changes(self, added, removed):
+        """Add and remove rows to follow the smart playlist result
+        
+        The track being played is kept (its own play can make it stop
+        matching, e.g. "not played in 7 days") and only goes once it has
+        finished or been skipped, when its statistics change again.
+        """
+        if removed:
+            gone = set(removed)
+            self.remove_rows([row for row, path in enumerate(self.playlist) if path in gone])
+        if added:
+            self.insert_smart_tracks(added)
+    
+    def on_tracks_scanned(self, changed_paths):
+        """Index newly cached tags and update the live smart playlist"""
+        metadata = self.library.metadata(changed_paths)
+        for path, row in metadata.items():
+            self.search_index.update(path, Path(path).name, row['title'], row['artist'], row['album'])
+            if row['duration']:
+                self.track_durations.setdefault(path, row['duration'])
+        self.update_smart_playlist(changed_paths)
+    
+    def filter_playlist(self, text):
+        """Show only rows matching the search box"""
+        self.playlist_filter.set_query(text)
+        if self.playlist_filter.query.strip():
+            self.status_label.setText(
+                f"{self.playlist_filter.visible_count()} of {len(self.playlist)} videos match"
+            )
+        else:
+            self.update_status()
+    
+    def on_path_checked(self, path, state):
+        """Queue a validation result for the next batched repaint"""
+        self._pending_states[path] = state
+        if not self.state_flush_timer.isActive():
+            self.state_flush_timer.start()
+    
+    def apply_track_states(self):
+        """Apply queued validation results to playlist rows"""
+        pending = self._pending_states
+        self._pending_states = {}
+        self.track_states.update(pending)
+        
+        for row, path in enumerate(self.playlist):
+            if path in pending:
+                item = self.playlist_widget.item(row)
+                if item:
+                    apply_item_state(item, path, pending[path])
+    
+    def on_volume_unavailable(self, volume):
+        """Show that a volume is not responding"""
+        self.status_label.setText(f"Volume not responding: {volume} (will retry)")
+        QTimer.singleShot(3000, self.update_status)
+    
+    def on_volume_restored(self, volume):
+        """Show that a volume came back"""
+        self.status_label.setText(f"Volume available again: {volume}")
+        QTimer.singleShot(3000, self.update_status)
+    
     def on_item_double_clicked(self, item):
         """Play the double-clicked item"""
         self.play_selected_item()
@@ -570,6 +1034,8 @@ class VideoPlaylistPro(QMainWindow):
         if current_item:
             row = self.playlist_widget.row(current_item)
             if 0 <= row < len(self.playlist):
+                # Leaving the current track for another one
+                self.record_skip()
                 self.current_index = row
                 self.play_current()
     
@@ -577,6 +1043,7 @@ class VideoPlaylistPro(QMainWindow):
         """Toggle shuffle mode"""
         self.shuffle_enabled = self.shuffle_btn.isChecked()
         self.generate_shuffle_queue()
+        self.sync_runner_queue()
         
         # Update button appearance
         if self.shuffle_enabled:
@@ -600,6 +1067,7 @@ class VideoPlaylistPro(QMainWindow):
         current_idx = modes.index(self.repeat_mode)
         self.repeat_mode = modes[(current_idx + 1) % len(modes)]
         self.update_repeat_button()
+        self.sync_runner_queue()
         
         # Show status
         mode_text = {
@@ -645,6 +1113,8 @@ class VideoPlaylistPro(QMainWindow):
         if current_item:
             row = self.playlist_widget.row(current_item)
             if 0 <= row < len(self.playlist):
+                self.record_skip()
+                
                 # Mark as single track playback
                 self.single_track_mode = True
                 self._in_play_one = True
@@ -666,6 +1136,11 @@ class VideoPlaylistPro(QMainWindow):
             if not hasattr(self, '_in_play_one'):
                 self.single_track_mode = False
             
+            # The validator already found this file gone; don't make QuickTime try
+            if self.track_states.get(file_path) in UNPLAYABLE_STATES:
+                self.skip_unplayable(file_path)
+                return
+            
             # Update UI
             self.current_track_label.setText(f"Playing: {Path(file_path).name}")
             self.playlist_widget.setCurrentRow(self.current_index)
@@ -674,105 +1149,123 @@ class VideoPlaylistPro(QMainWindow):
             if self.current_index not in self.play_history:
                 self.play_history.append(self.current_index)
             
-            # Close existing QuickTime documents
-            try:
-                subprocess.run([
-                    'osascript', '-e',
-                    'tell application "QuickTime Player" to close every document'
-                ], capture_output=True)
-                time.sleep(0.5)
-            except:
-                pass
+            # A preloaded document is closed with the rest
+            self._preloaded = None
+            self._preload_tried = False
+            self._last_position = None
+            self.stop_runner()
             
-            # Open with QuickTime
-            try:
-                # Different behavior based on AirPlay status
-                if self.airplay_btn.isChecked():
-                    # AirPlay is on - just load, don't play
-                    script = f'''
-                    tell application "QuickTime Player"
-                        activate
-                        open POSIX file "{file_path}"
-                        delay 2
-                        
-                        -- Wait for document to be ready but don't play
-                        repeat 10 times
-                            if (count documents) > 0 then
-                                if exists front document then
-                                    return "ready"
-                                end if
-                            end if
-                            delay 0.5
-                        end repeat
-                        
-                        return "failed"
-                    end tell
-                    '''
-                else:
-                    # AirPlay is off - load and play normally
-                    script = f'''
-                    tell application "QuickTime Player"
-                        activate
-                        open POSIX file "{file_path}"
-                        delay 2
-                        
-                        -- Wait for document to be ready and play
-                        repeat 10 times
-                            if (count documents) > 0 then
-                                if exists front document then
-                                    delay 0.5
-                                    play front document
-                                    return "playing"
-                                end if
-                            end if
-                            delay 0.5
-                        end repeat
-                        
-                        return "failed"
-                    end tell
-                    '''
-                
-                result = subprocess.run(['osascript', '-e', script], 
-                                      capture_output=True, text=True)
-                
-                if result.stderr or "failed" in result.stdout:
-                    raise Exception(result.stderr or "Failed to load document")
-                
-                # Handle based on AirPlay status
-                if self.airplay_btn.isChecked():
-                    # AirPlay is on - enable AirPlay then start playback
-                    delay = self.settings.get('airplay_delay', 100)
-                    QTimer.singleShot(delay, self.enable_airplay_and_start)
-                else:
-                    # AirPlay is off - already playing from the script
-                    self.is_playing = True
-                    self.play_btn.setText("⏸ Pause")
-                
-                # Start checking playback
-                self.check_timer.start()
-                
-            except Exception as e:
-                print(f"Error playing file: {e}")
-                QMessageBox.warning(self, "Playback Error", f"Could not play file: {Path(file_path).name}")
+            if self.use_runner():
+                # One AppleScript session plays this track and the ones after it
+                self.navigation_timer.stop()
+                self.navigation.reset()
+                self.check_timer.stop()
+                self.player_commands.cancel()
+                self.start_runner()
+                return
+            
+            # Close the old documents and open this one on the player thread;
+            # anything still queued for the previous track is obsolete
+            self.navigation_timer.stop()
+            self.navigation.reset()
+            self.check_timer.stop()
+            self.player_commands.cancel()
+            play_now = not self.airplay_btn.isChecked()
+            self.player_commands.submit(
+                "open", self.backend.open, file_path, play_now,
+                on_done=lambda result, path=file_path, played=play_now: self.on_track_opened(path, played),
+                on_error=lambda error, path=file_path: self.on_track_open_failed(path, error),
+                group="playback"
+            )
     
-    def pause(self):
-        """Pause playback"""
-        try:
-            subprocess.run([
-                'osascript', '-e',
-                'tell application "QuickTime Player" to pause front document'
-            ], capture_output=True)
+    def on_track_opened(self, file_path, played):
+        """A track was loaded by the player thread"""
+        self._unplayable_skips = 0
+        resume_position = None
+        if self._resume_at and self._resume_at[0] == self.current_index:
+            resume_position = self._resume_at[1]
+            self._resume_at = None
+        
+        self._stats_track = file_path
+        # The position only advances once the track is really playing
+        self._last_position = (resume_position or 0.0, time.monotonic() if played else None)
+        if resume_position:
+            # Back where the restarted player left off; not a new play
+            self.player_commands.submit("seek", self.backend.seek, resume_position, group="playback")
+        else:
+            self.play_stats.record_play(file_path)
+        
+        # Handle based on AirPlay status
+        if not played:
+            # AirPlay is on - enable AirPlay then start playback
+            delay = self.settings.get('airplay_delay', 100)
+            QTimer.singleShot(delay, self.enable_airplay_and_start)
+        else:
+            # AirPlay is off - already playing from the script
+            self.is_playing = True
+            self.play_btn.setText("⏸ Pause")
+            self.report_transition_gap()
+            self.report_recovery()
             
+            # Start checking playback
+            self.start_playback_checks()
+    
+    def on_track_open_failed(self, file_path, error):
+        """Opening a track failed or timed out"""
+        print(f"Error playing file: {error}")
+        QMessageBox.warning(self, "Playback Error", f"Could not play file: {Path(file_path).name}")
+    
+    def skip_unplayable(self, file_path):
+        """Move past a track the validator found missing or unreadable"""
+        state = self.track_states.get(file_path)
+        print(f"Skipping {state} track: {file_path}")
+        if self.current_index not in self.play_history:
+            self.play_history.append(self.current_index)
+        self._unplayable_skips += 1
+        
+        index = self.next_track_index()
+        if index is None or index == self.current_index or self._unplayable_skips >= len(self.playlist):
+            # Nothing playable left to move on to
+            self._unplayable_skips = 0
+            self._track_ended_at = None
             self.is_playing = False
             self.play_btn.setText("▶ Play")
-            self.check_timer.stop()
-        except:
-            pass
+            self.current_track_label.setText(f"Cannot play ({state}): {Path(file_path).name}")
+            return
+        
+        self.current_track_label.setText(f"Skipped ({state}): {Path(file_path).name}")
+        self.current_index = index
+        # Through the event loop, so a run of missing tracks doesn't recurse
+        QTimer.singleShot(0, self.play_current)
+    
+    def start_playback_checks(self):
+        """Begin end-of-track checks for a track that just started playing"""
+        self.end_scheduler.reset()
+        self.check_timer.start(int(self.end_scheduler.idle_interval * 1000))
+    
+    def pause(self):
+        """Pause playback"""
+        self.is_playing = False
+        self.play_btn.setText("▶ Play")
+        self.check_timer.stop()
+        # Time spent paused is not time played
+        self._last_position = (self.playback_position(), None)
+        
+        # A queued status check would take the pause for a finished track
+        self.player_commands.cancel("status")
+        self.player_commands.submit("pause", self.backend.pause, group="playback")
     
     def stop_playback(self):
         """Stop playback completely"""
+        self.stop_runner()
         self.check_timer.stop()
+        self.navigation_timer.stop()
+        self.navigation.reset()
         self.is_playing = False
+        self._preloaded = None
+        self._track_ended_at = None
+        self._resume_at = None
+        self.watchdog.cancel()
         self.play_btn.setText("▶ Play")
         
         # Reset current track display
@@ -784,135 +1277,108 @@ class VideoPlaylistPro(QMainWindow):
         # Clear current position indicator
         self.playlist_widget.setCurrentRow(-1)
         
-        try:
-            subprocess.run([
-                'osascript', '-e',
-                'tell application "QuickTime Player" to close every document'
-            ], capture_output=True)
-        except:
-            pass
+        # Close documents on the player thread; commands still queued for
+        # the old video are dropped
+        self.player_commands.cancel()
+        self.player_commands.submit("stop", self.backend.close_all, group="playback")
     
     def play_next(self):
         """Play next track"""
-        if not self.playlist:
-            return
-        
-        # Stop current playback first
-        if self.is_playing:
-            self.stop_playback()
-            # Wait for QuickTime to close properly
-            QTimer.singleShot(500, self._play_next_after_delay)
-        else:
-            self._play_next_after_delay()
-    
-    def _play_next_after_delay(self):
-        """Actually play next track after delay"""
-        if self.shuffle_enabled and self.shuffle_queue:
-            # Find current position in shuffle queue
-            try:
-                current_shuffle_idx = self.shuffle_queue.index(self.current_index)
-                next_shuffle_idx = (current_shuffle_idx + 1) % len(self.shuffle_queue)
-                self.current_index = self.shuffle_queue[next_shuffle_idx]
-            except:
-                self.current_index = self.shuffle_queue[0]
-        else:
-            # Normal sequential playback
-            self.current_index = (self.current_index + 1) % len(self.playlist)
-        
-        self.play_current()
+        self.navigate(1)
     
     def play_previous(self):
         """Play previous track"""
+        self.navigate(-1)
+    
+    def navigate(self, step):
+        """Step through the playlist; a burst of presses opens only its last track"""
         if not self.playlist:
             return
         
         # Stop current playback first
         if self.is_playing:
+            # Leaving a playing track early counts as a skip
+            self.record_skip()
             self.stop_playback()
-            # Wait for QuickTime to close properly
-            QTimer.singleShot(500, self._play_previous_after_delay)
         else:
-            self._play_previous_after_delay()
+            # An open queued by an earlier press is stale now
+            self.check_timer.stop()
+            self.player_commands.cancel()
+        
+        self.navigation.press(step, self.current_index)
+        shuffle_queue = self.shuffle_queue if self.shuffle_enabled else None
+        target = self.navigation.target(len(self.playlist), shuffle_queue)
+        self.playlist_widget.setCurrentRow(-1 if target is None else target)
+        
+        # Wait for QuickTime to close properly, and for further presses
+        self.navigation_timer.start(500)
     
-    def _play_previous_after_delay(self):
-        """Actually play previous track after delay"""
-        if self.shuffle_enabled and self.shuffle_queue:
-            # Find current position in shuffle queue
-            try:
-                current_shuffle_idx = self.shuffle_queue.index(self.current_index)
-                prev_shuffle_idx = (current_shuffle_idx - 1) % len(self.shuffle_queue)
-                self.current_index = self.shuffle_queue[prev_shuffle_idx]
-            except:
-                self.current_index = self.shuffle_queue[-1]
-        else:
-            # Normal sequential playback
-            self.current_index = (self.current_index - 1) % len(self.playlist)
+    def _navigate_after_delay(self):
+        """Actually play the track a settled burst of presses landed on"""
+        presses = self.navigation.presses
+        shuffle_queue = self.shuffle_queue if self.shuffle_enabled else None
+        index = self.navigation.take(len(self.playlist), shuffle_queue)
+        if index is None:
+            return
+        if presses > 1:
+            print(f"Coalesced {presses} next/previous presses into one track change")
         
+        self.current_index = index
         self.play_current()
     
     def check_playback(self):
         """Check if current track has finished"""
         if not self.is_playing:
             return
-            
-        try:
-            # Simple check: if QuickTime is running and has documents
-            check_script = '''
-            tell application "System Events"
-                if exists (process "QuickTime Player") then
-                    tell application "QuickTime Player"
-                        if (count documents) > 0 then
-                            try
-                                set isPlaying to playing of front document
-                                if isPlaying then
-                                    return "playing"
-                                else
-                                    -- Check if finished
-                                    try
-                                        set currentTime to current time of front document
-                                        set duration to duration of front document
-                                        if currentTime >= (duration - 1) then
-                                            return "finished"
-                                        else
-                                            return "paused"
-                                        end if
-                                    on error
-                                        return "finished"
-                                    end try
-                                end if
-                            on error
-                                return "finished"
-                            end try
-                        else
-                            return "no_document"
-                        end if
-                    end tell
-                else
-                    return "not_running"
-                end if
-            end tell
-            '''
-            
-            result = subprocess.run(['osascript', '-e', check_script], 
-                                  capture_output=True, text=True, timeout=5)
-            
-            status = result.stdout.strip()
-            
-            if status in ["finished", "no_document", "not_running"]:
-                # Track finished, decide what to do next
-                print(f"Playback status: {status}")
-                self.handle_track_finished()
-            elif status == "error":
-                # QuickTime might be in a bad state, assume finished
-                print("QuickTime error detected, assuming track finished")
-                self.handle_track_finished()
-                
-        except subprocess.TimeoutExpired:
-            print("Playback check timeout, assuming track finished")
+        
+        # One round trip: state, position, duration and front document.
+        # With a preloaded track in front, ask for the playing one by name.
+        document_name = None
+        if self._preloaded and 0 <= self.current_index < len(self.playlist):
+            document_name = Path(self.playlist[self.current_index]).name
+        self.player_commands.submit(
+            "status", self.backend.status, document_name,
+            on_done=self.on_playback_status,
+            on_error=self.on_playback_check_failed,
+            group="status"
+        )
+    
+    def on_playback_status(self, status):
+        """Act on a status record from the player thread"""
+        if not self.is_playing:
+            return
+        
+        if status.duration > 0 and self._stats_track:
+            self.track_durations.setdefault(self._stats_track, status.duration)
+        if status.playing:
+            self._last_position = (status.current_time, time.monotonic())
+        
+        if status.state == "error":
+            # QuickTime might be in a bad state, assume finished
+            print("QuickTime error detected, assuming track finished")
             self.handle_track_finished()
-        except Exception as e:
-            print(f"Check playback error: {e}, assuming track finished")
+        elif status.finished:
+            # Track finished, decide what to do next
+            print(f"Playback status: {status.state} "
+                  f"({self.end_scheduler.poll_count} checks, "
+                  f"{self.end_scheduler.reanchor_count} re-anchors)")
             self.handle_track_finished()
+        else:
+            # Sleep until just before the expected end, then poll densely
+            delay = self.end_scheduler.next_delay(status)
+            if status.playing and self.settings.get('gapless_preload', False):
+                delay = self.preload_next(delay)
+            self.check_timer.start(int(delay * 1000))
+    
+    def on_playback_check_failed(self, error):
+        """A status check failed or timed out"""
+        if not self.is_playing:
+            return
+        if isinstance(error, subprocess.TimeoutExpired):
+            print("Playback check timeout, assuming track finished")
+        else:
+            print(f"Check playback error: {error}, assuming track finished")
+        self.handle_track_finished()
     
     def handle_track_finished(self):
         """Handle when a track finishes playing"""
@@ -920,74 +1386,398 @@ class VideoPlaylistPro(QMainWindow):
         self.check_timer.stop()
         self.is_playing = False
         
-        # Close the current document first and wait
-        self.close_current_document()
+        # The track really ended at the anchored end, not when we noticed
+        now = time.monotonic()
+        expected_end = self.end_scheduler.expected_end
+        self._track_ended_at = min(now, expected_end) if expected_end else now
+        
+        if self._stats_track:
+            self.play_stats.record_finish(self._stats_track)
+            self._stats_track = None
+        
+        # Preloaded next track: start it right away instead of closing,
+        # waiting and reopening
+        if self._preloaded and self.start_preloaded():
+            return
         
+        self._advance_after_close()
+    
+    def _advance_after_close(self):
+        """Close the finished document, then pick the next track"""
         # Wait for document to close completely before deciding next action
-        QTimer.singleShot(1000, self._handle_track_finished_after_close)
+        self.close_current_document(
+            on_done=lambda _: QTimer.singleShot(1000, self._handle_track_finished_after_close)
+        )
     
     def _handle_track_finished_after_close(self):
         """Handle track finished after document is closed"""
         # Check if in single track mode FIRST - this takes priority over all other modes
         if self.single_track_mode:
             self.single_track_mode = False
+            self._track_ended_at = None
             self.current_track_label.setText(f"Finished: {Path(self.playlist[self.current_index]).name}")
             self.play_btn.setText("▶ Play")  # Reset play button
             return
             
-        if self.repeat_mode == "one":
-            # Repeat the same track
-            self.play_current()
-        elif self.repeat_mode == "all":
-            # Play next track (will loop to beginning if at end)
-            self.play_next()
+        # Same rules as the preload, the runner queue and the transition
+        # benchmark: repeat one, repeat all, or the next unplayed track
+        index = self.next_track_index()
+        if index is None:
+            # All tracks played, stop
+            self.current_track_label.setText("Playlist finished")
+            self._track_ended_at = None
+            self.play_history.clear()
+            self.play_btn.setText("▶ Play")  # Reset play button
+            return
+        
+        # Open it right away; only key and button presses are coalesced
+        self.current_index = index
+        self.play_current()
+    
+    def next_track_index(self):
+        """Index that will play when the current track ends, or None to stop"""
+        return next_track_index(
+            self.current_index, len(self.playlist), self.repeat_mode,
+            self.shuffle_queue if self.shuffle_enabled else None,
+            self.play_history, self.single_track_mode
+        )
+    
+    def preload_next(self, delay):
+        """Open the next track paused shortly before the current one ends
+        
+        Returns the poll delay, shortened so the check after this one
+        lands in the preload window.
+        """
+        if self._preload_tried or self.airplay_btn.isChecked():
+            return delay
+        remaining = self.end_scheduler.remaining()
+        if remaining is None:
+            return delay
+        if remaining > PRELOAD_LEAD:
+            return min(delay, remaining - PRELOAD_LEAD)
+        
+        self._preload_tried = True
+        next_index = self.next_track_index()
+        if next_index is None or next_index == self.current_index:
+            # Stopping, or repeating the same file: nothing to preload
+            return delay
+        
+        next_path = self.playlist[next_index]
+        current_name = Path(self.playlist[self.current_index]).name
+        if Path(next_path).name == current_name:
+            # Documents are told apart by name
+            return delay
+        self.player_commands.submit(
+            "preload", self.backend.preload, next_path, current_name,
+            on_done=lambda name, index=next_index, path=next_path: self.on_track_preloaded(index, path, name),
+            group="playback"
+        )
+        return delay
+    
+    def on_track_preloaded(self, index, path, name):
+        """The player thread opened the next track paused"""
+        if name and self.is_playing:
+            self._preloaded = (index, path, name)
+            print(f"Preloaded: {name}")
+    
+    def start_preloaded(self):
+        """Switch to the preloaded track; False if it no longer applies"""
+        index, path, name = self._preloaded
+        self._preloaded = None
+        self._preload_tried = False
+        if self.next_track_index() != index or index >= len(self.playlist) or self.playlist[index] != path:
+            # Playlist or modes changed since preloading
+            return False
+        self.player_commands.submit(
+            "switch", self.backend.switch, name,
+            on_done=lambda started: self.on_preloaded_started(index, path, started),
+            on_error=lambda error: self.on_preloaded_started(index, path, False),
+            group="playback"
+        )
+        return True
+    
+    def on_preloaded_started(self, index, path, started):
+        """The player thread switched to the preloaded track (or could not)"""
+        if not started:
+            print("Preload switch failed, reopening normally")
+            self._advance_after_close()
+            return
+        
+        self.current_index = index
+        self.current_track_label.setText(f"Playing: {Path(path).name}")
+        self.playlist_widget.setCurrentRow(index)
+        if index not in self.play_history:
+            self.play_history.append(index)
+        
+        self._stats_track = path
+        self.play_stats.record_play(path)
+        self._last_position = (0.0, time.monotonic())
+        
+        self.is_playing = True
+        self.play_btn.setText("⏸ Pause")
+        self.report_transition_gap()
+        self.start_playback_checks()
+    
+    def report_transition_gap(self):
+        """Log the silence between the last finished track and this one"""
+        if self._track_ended_at is None:
+            return
+        gap = time.monotonic() - self._track_ended_at
+        self._track_ended_at = None
+        self.transition_gaps.append(gap)
+        recent = self.transition_gaps[-20:]
+        average = sum(recent) / len(recent)
+        print(f"Transition gap: {gap:.2f} s (average of last {len(recent)}: {average:.2f} s)")
+        self.status_label.setText(f"Transition gap: {gap:.2f} s (avg {average:.2f} s)")
+    
+    def record_skip(self):
+        """Log the current track as skipped, with the fraction played if known"""
+        if not self._stats_track:
+            return
+        completion = None
+        duration = self.track_durations.get(self._stats_track)
+        if duration:
+            # From the player's position, so pauses and seeks don't count as played
+            completion = self.playback_position() / duration
+        self.play_stats.record_skip(self._stats_track, completion)
+        self._stats_track = None
+    
+    def keep_player_warm(self):
+        """True if QuickTime stays running with no document between tracks"""
+        return self.settings.get('warm_player', True)
+    
+    def close_current_document(self, on_done=None):
+        """Close the current QuickTime document; quit if none remain, unless kept warm"""
+        # A warm player stays up, so the next open skips QuickTime's launch
+        self.player_commands.submit(
+            "close", self.backend.close, self.keep_player_warm(),
+            on_done=on_done, group="playback"
+        )
+    
+    def use_runner(self):
+        """True if the queue should play inside one AppleScript session"""
+        return (self.settings.get('runner_mode', False)
+                and isinstance(self.backend, QuickTimeBackend)
+                and not self.airplay_btn.isChecked()
+                and not self.single_track_mode
+                and not self._runner_disabled)
+    
+    def start_runner(self, adopt=False):
+        """Hand the current track and the ones after it to a playlist runner"""
+        self.stop_runner()
+        shuffle_queue = self.shuffle_queue if self.shuffle_enabled else None
+        self.runner_queue = plan_queue(
+            self.current_index, len(self.playlist), self.repeat_mode,
+            shuffle_queue, self.play_history, RUNNER_QUEUE_LIMIT
+        )
+        if not self.runner_queue:
+            return
+        self.runner_position = 0
+        self.runner = PlaylistRunner([self.playlist[i] for i in self.runner_queue], adopt=adopt)
+        self.runner.track_started.connect(self.on_runner_track_started)
+        self.runner.track_ended.connect(self.on_runner_track_ended)
+        self.runner.track_failed.connect(self.on_runner_track_failed)
+        self.runner.queue_done.connect(self.on_runner_done)
+        self.runner.runner_failed.connect(self.on_runner_failed)
+        if not self._ending_runners:
+            self.runner.start()
+        # else on_runner_thread_finished starts it once the old sessions are gone
+    
+    def stop_runner(self):
+        """End the runner session without waiting for it; QuickTime keeps its documents"""
+        if self.runner is not None:
+            runner = self.runner
+            self.release_runner()
+            runner.stop()
+    
+    def release_runner(self):
+        """Let go of the runner, keeping it referenced until its thread has finished"""
+        runner = self.runner
+        self.runner = None
+        # Connected first, so a thread ending right now still reports it
+        runner.finished.connect(self.on_runner_thread_finished)
+        if runner.isRunning():
+            self._ending_runners.add(runner)
+    
+    def on_runner_thread_finished(self):
+        """An old runner's thread ended; start the one waiting for it"""
+        self._ending_runners.discard(self.sender())
+        if self._ending_runners or self.runner is None:
+            return
+        if not self.runner.isRunning() and not self.runner.isFinished():
+            self.runner.start()
+    
+    def sync_runner_queue(self):
+        """Give the runner a new queue after an edit or mode change; the playing track carries on"""
+        if self.runner is None or not self.is_playing:
+            return
+        shuffle_queue = self.shuffle_queue if self.shuffle_enabled else None
+        queue = plan_queue(
+            self.current_index, len(self.playlist), self.repeat_mode,
+            shuffle_queue, self.play_history, RUNNER_QUEUE_LIMIT
+        )
+        remaining = self.runner_queue[self.runner_position:]
+        paths = [self.playlist[i] for i in queue]
+        if queue == remaining[:len(queue)] and paths == self.runner.paths[self.runner_position:][:len(paths)]:
+            return
+        self.start_runner(adopt=True)
+    
+    def on_runner_track_started(self, position, duration, how):
+        """The runner started (or took over) a track of its queue"""
+        if self.sender() is not self.runner:
+            return
+        self.runner_position = position
+        self.current_index = self.runner_queue[position]
+        file_path = self.runner.paths[position]
+        self.current_track_label.setText(f"Playing: {Path(file_path).name}")
+        self.playlist_widget.setCurrentRow(self.current_index)
+        if self.current_index not in self.play_history:
+            self.play_history.append(self.current_index)
+        if duration > 0:
+            self.track_durations.setdefault(file_path, duration)
+        
+        self.is_playing = True
+        self.play_btn.setText("⏸ Pause")
+        if how == "adopted":
+            # Same track, new queue after an edit; its position carries on
+            return
+        self._last_position = (0.0, time.monotonic())
+        self._stats_track = file_path
+        self.play_stats.record_play(file_path)
+        self.report_transition_gap()
+        self.report_recovery()
+    
+    def on_runner_track_ended(self, position, reason):
+        """A runner track finished, or its document was closed"""
+        if self.sender() is not self.runner:
+            return
+        if reason == "finished":
+            self._track_ended_at = time.monotonic()
+            if self._stats_track:
+                self.play_stats.record_finish(self._stats_track)
+                self._stats_track = None
         else:
-            # Check if all tracks have been played
-            if len(self.play_history) >= len(self.playlist):
-                # All tracks played, stop
-                self.current_track_label.setText("Playlist finished")
-                self.play_history.clear()
-                self.play_btn.setText("▶ Play")  # Reset play button
-            else:
-                # Play next unplayed track
-                if self.shuffle_enabled:
-                    # Find next unplayed track in shuffle order
-                    for idx in self.shuffle_queue:
-                        if idx not in self.play_history:
-                            self.current_index = idx
-                            self.play_current()
-                            return
-                else:
-                    # Normal sequential - play next
-                    self.play_next()
-    
-    def close_current_document(self):
-        """Close the current QuickTime document and quit if no documents remain"""
-        try:
-            script = '''
-            tell application "QuickTime Player"
-                if (count documents) > 0 then
-                    close front document
-                    delay 0.5
-                    
-                    -- If no documents remain, quit QuickTime
-                    if (count documents) = 0 then
-                        quit
-                    end if
-                end if
-            end tell
-            '''
-            subprocess.run(['osascript', '-e', script], capture_output=True)
-            print("Document closed and QuickTime quit if no documents remain")
-        except Exception as e:
-            print(f"Error closing document: {e}")
-            # Fallback: Force quit QuickTime
-            try:
-                subprocess.run(['osascript', '-e', 'tell application "QuickTime Player" to quit'], 
-                             capture_output=True)
-                print("Fallback: QuickTime force quit")
-            except:
-                pass
+            # Closed in QuickTime; the runner stops here
+            self.is_playing = False
+            self.play_btn.setText("▶ Play")
+    
+    def on_runner_track_failed(self, position, message):
+        """The runner could not open a track and moved on"""
+        if self.sender() is self.runner:
+            print(f"Runner skipped a track: {message}")
+    
+    def on_runner_done(self):
+        """The runner played its whole queue"""
+        if self.sender() is not self.runner:
+            return
+        self.release_runner()
+        if not self.is_playing:
+            return
+        next_index = self.next_track_index()
+        if next_index is None:
+            self.is_playing = False
+            self._track_ended_at = None
+            self.current_track_label.setText("Playlist finished")
+            self.play_history.clear()
+            self.play_btn.setText("▶ Play")
+            return
+        # Repeat All or a very long queue: plan the next stretch
+        self.current_index = next_index
+        self.play_current()
+    
+    def on_runner_failed(self, message):
+        """The runner's osascript session ended early"""
+        if self.sender() is not self.runner:
+            return
+        self.release_runner()
+        print(f"Playlist runner failed: {message}")
+        if self.watchdog.restarting:
+            return
+        # Use one command per step for the rest of the session; a track
+        # that is still playing is picked up by the status checks
+        self._runner_disabled = True
+        if self.is_playing:
+            self.start_playback_checks()
+    
+    def on_player_command_finished(self, command_id, name, seconds):
+        """Feed a command's round trip to the watchdog"""
+        self.watchdog.record_latency(name, seconds)
+    
+    def on_player_command_failed(self, command_id, name, error):
+        """Count a failed command against the player's health"""
+        self.watchdog.record_failure(name)
+    
+    def watchdog_tick(self):
+        """Probe the player and restart it if it looks wedged"""
+        # End-of-track checks sleep for up to half a minute; keep a fresh
+        # round trip while a track plays
+        if (self.is_playing and self.watchdog.needs_probe()
+                and not self.player_commands.pending_count("probe")):
+            self.player_commands.submit("probe", self.backend.status, group="probe")
+        
+        if not (self.is_playing or self.watchdog.restarting or self.player_commands.pending_count()):
+            return
+        reason = self.watchdog.check(self.player_commands.running_for())
+        if reason:
+            self.restart_player(reason)
+    
+    def playback_position(self):
+        """Seconds into the current track, extrapolated from the last status while playing"""
+        if self._last_position is None:
+            return 0.0
+        position, seen_at = self._last_position
+        if seen_at is None:
+            return position
+        return position + (time.monotonic() - seen_at)
+    
+    def restart_player(self, reason):
+        """Kill a wedged player and resume the same track after a backoff delay"""
+        if self.is_playing and 0 <= self.current_index < len(self.playlist):
+            self._resume_at = (self.current_index, self.playback_position())
+        delay = self.watchdog.begin_restart(reason)
+        print(f"Player watchdog: {reason}; restarting QuickTime in {delay:.0f}s "
+              f"({self.watchdog.summary()})")
+        self.status_label.setText(f"Restarting QuickTime: {reason}")
+        
+        self.stop_runner()
+        self.check_timer.stop()
+        self.is_playing = False
+        self._preloaded = None
+        self.play_btn.setText("▶ Play")
+        # Killing the player also fails the command it was blocking
+        self.player_commands.cancel()
+        self.backend.kill()
+        QTimer.singleShot(int(delay * 1000), self.resume_after_restart)
+    
+    def resume_after_restart(self):
+        """Relaunch the player on the track that was playing"""
+        if not self.watchdog.restarting:
+            return
+        if self._resume_at is None:
+            # Nothing was playing; the next command relaunches the player
+            self.report_recovery()
+            return
+        if self.player_commands.pending_count("playback"):
+            # The user already started something else
+            return
+        
+        index, position = self._resume_at
+        if not 0 <= index < len(self.playlist):
+            self._resume_at = None
+            self.watchdog.cancel()
+            return
+        print(f"Resuming {Path(self.playlist[index]).name} at {position:.0f}s")
+        self.current_index = index
+        self.play_current()
+    
+    def report_recovery(self):
+        """Log how long a player restart took to bring playback back"""
+        seconds = self.watchdog.recovered()
+        if seconds is None:
+            return
+        print(f"Player recovered in {seconds:.1f}s ({self.watchdog.summary()})")
+        self.status_label.setText(f"QuickTime recovered in {seconds:.1f} s "
+                                  f"({self.watchdog.restart_count} restarts)")
     
     def open_settings(self):
         """Open settings dialog"""
@@ -1006,7 +1796,11 @@ class VideoPlaylistPro(QMainWindow):
         
         if self.airplay_enabled and self.is_playing:
             # Enable AirPlay on current track
-            self.enable_airplay()
+            self.player_commands.submit("airplay", self.ensure_airplay, self.airplay_request(force=True),
+                                        on_done=self.on_airplay_done, group="playback")
+        elif not self.airplay_enabled:
+            # The route may be switched back by hand; check again next time
+            self.airplay_route.forget()
         
         status = "enabled" if self.airplay_enabled else "disabled"
         self.status_label.setText(f"AirPlay {status}")
@@ -1014,107 +1808,125 @@ class VideoPlaylistPro(QMainWindow):
     
     def start_playback(self):
         """Start playing the loaded document"""
-        try:
-            # First, just start playback
-            script = '''
-            tell application "QuickTime Player"
-                if (count documents) > 0 then
-                    play front document
-                    return "playing"
-                else
-                    return "no document"
-                end if
-            end tell
-            '''
-            
-            result = subprocess.run(['osascript', '-e', script], 
-                                  capture_output=True, text=True)
+        self.player_commands.submit(
+            "play", self.backend.play,
+            on_done=self.on_playback_started,
+            on_error=lambda error: print(f"Error starting playback: {error}"),
+            group="playback"
+        )
+    
+    def on_playback_started(self, started):
+        """The loaded document was told to play"""
+        if started:
+            self.is_playing = True
+            self.play_btn.setText("⏸ Pause")
+            self._last_position = (self.playback_position(), time.monotonic())
+            self.report_transition_gap()
+            self.report_recovery()
+            self.start_playback_checks()
             
-            if "playing" in result.stdout:
-                self.is_playing = True
-                self.play_btn.setText("⏸ Pause")
-                
-                # Check if auto-minimize is enabled and AirPlay is active
-                auto_minimize = self.settings.get('auto_minimize_on_airplay', True)
-                if auto_minimize and self.airplay_btn.isChecked():
-                    # Delay minimize by 300ms after playback starts
-                    QTimer.singleShot(300, self.minimize_window)
-        except Exception as e:
-            print(f"Error starting playback: {e}")
+            # Check if auto-minimize is enabled and AirPlay is active
+            auto_minimize = self.settings.get('auto_minimize_on_airplay', True)
+            if auto_minimize and self.airplay_btn.isChecked():
+                # Delay minimize by 300ms after playback starts
+                QTimer.singleShot(300, self.minimize_window)
     
     def minimize_window(self):
         """Minimize QuickTime window"""
-        try:
-            script = '''
-            tell application "QuickTime Player"
-                if exists window 1 then
-                    set miniaturized of window 1 to true
-                end if
-            end tell
-            '''
-            subprocess.run(['osascript', '-e', script], capture_output=True)
-            print("QuickTime window minimized")
-        except Exception as e:
-            print(f"Error minimizing window: {e}")
+        script = '''
+        tell application "QuickTime Player"
+            if exists window 1 then
+                set miniaturized of window 1 to true
+            end if
+        end tell
+        '''
+        self.player_commands.submit(
+            "minimize", run_applescript, script,
+            on_done=lambda result: print("QuickTime window minimized"),
+            on_error=lambda error: print(f"Error minimizing window: {error}")
+        )
     
     def enable_airplay_and_start(self):
         """Enable AirPlay and then start playback"""
-        # First enable AirPlay
-        self.enable_airplay()
-        
-        # Then start playback after a short delay
-        QTimer.singleShot(500, self.start_playback)
+        # First enable AirPlay on the player thread, then start playback
+        # after a short delay; a route that is still up needs no delay
+        self.player_commands.submit(
+            "airplay", self.ensure_airplay, self.airplay_request(),
+            on_done=lambda result: self.on_airplay_done(result, start=True),
+            group="playback"
+        )
+    
+    def airplay_request(self, force=False):
+        """Settings, button cache and route state the AirPlay clicks need, copied for the player thread"""
+        return {
+            'force': force,
+            'menu_wait': self.settings.get('airplay_menu_wait', 1000) / 1000.0,  # Convert ms to seconds
+            'offset_x': self.settings.get('airplay_offset_x', 135),
+            'offset_y': self.settings.get('airplay_offset_y', 80),
+            'buttons': AirPlayButtonCache(self.airplay_buttons.entries),
+            'route': self.airplay_route.snapshot(),
+        }
+    
+    def on_airplay_done(self, result, start=False):
+        """Keep what the AirPlay clicks learned, then start playback if asked (main thread)"""
+        # Not if AirPlay was switched off while the clicks ran
+        if self.airplay_route.merge(result['route']) and result['ran']:
+            if result['click']:
+                self.airplay_route.enabled(result['generation'])
+            else:
+                self.airplay_route.forget()
+        if result['ran']:
+            self.airplay_buttons.entries.update(result['buttons'])
+            if result['click']:
+                self.airplay_timings.record(result['click'])
+        else:
+            print(f"AirPlay: route still active, clicks skipped ({self.airplay_route.summary()})")
+        if start:
+            # A route that is still up needs no delay
+            QTimer.singleShot(500 if result['ran'] else 0, self.start_playback)
     
-    def enable_airplay(self):
-        """Enable AirPlay using the successful offset method"""
+    def ensure_airplay(self, request):
+        """Run the AirPlay clicks unless the route is still up (player thread)
+        
+        request comes from airplay_request(); the decision is made on its
+        route snapshot. Returns a dict for on_airplay_done, which applies
+        the outcome; nothing here touches the window's state.
+        """
+        route = request['route']
+        generation = self.backend.generation
+        result = {'route': route, 'generation': generation, 'ran': False, 'click': None, 'buttons': None}
+        if not request['force'] and not route.needs_enable(
+                generation, lambda: self.backend.route_state(ROUTE_MARKERS)):
+            return result
+        result.update(ran=True, click=self.enable_airplay(request), buttons=request['buttons'].entries)
+        return result
+    
+    def enable_airplay(self, request):
+        """Enable AirPlay using the successful offset method; the AirPlayClick once clicked (player thread)"""
         try:
-            # First click AirPlay button and get its position
-            click_script = '''
-            tell application "System Events"
-                tell process "QuickTime Player"
-                    set frontmost to true
-                    
-                    -- Find AirPlay button
-                    set btnList to every button of window 1
-                    repeat with i from 1 to count of btnList
-                        try
-                            set btnDesc to description of button i of window 1
-                            if btnDesc contains "외장" or btnDesc contains "AirPlay" then
-                                set btnPos to position of button i of window 1
-                                click button i of window 1
-                                return (item 1 of btnPos as string) & "," & (item 2 of btnPos as string)
-                            end if
-                        end try
-                    end repeat
-                    
-                    return "not found"
-                end tell
-            end tell
-            '''
-            
-            result = subprocess.run(['osascript', '-e', click_script], 
-                                  capture_output=True, text=True)
+            # Click the AirPlay button (at its remembered index when the window
+            # layout is known) and wait only until its menu is open; the menu
+            # wait setting is now the upper bound
+            click = click_airplay_button(request['buttons'], request['menu_wait'])
             
-            if result.stdout.strip() != "not found" and ',' in result.stdout:
-                x, y = result.stdout.strip().split(',')
-                airplay_x = int(x)
-                airplay_y = int(y)
-                
-                # Wait for menu with configurable time
-                menu_wait = self.settings.get('airplay_menu_wait', 1000) / 1000.0  # Convert ms to seconds
-                time.sleep(menu_wait)
+            if click:
+                if click.menu_ms is not None:
+                    time.sleep(MENU_SETTLE)
                 
                 # Click living checkbox using configurable offset
-                offset_x = self.settings.get('airplay_offset_x', 135)
-                offset_y = self.settings.get('airplay_offset_y', 80)
-                checkbox_x = airplay_x + offset_x
-                checkbox_y = airplay_y + offset_y
+                offset_x = request['offset_x']
+                offset_y = request['offset_y']
+                checkbox_x = click.x + offset_x
+                checkbox_y = click.y + offset_y
                 
                 subprocess.run(['cliclick', f'c:{checkbox_x},{checkbox_y}'])
-                print(f"AirPlay: Clicked at ({checkbox_x}, {checkbox_y}) with offset ({offset_x}, {offset_y})")
+                print(f"AirPlay: Clicked at ({checkbox_x}, {checkbox_y}) with offset ({offset_x}, {offset_y}); "
+                      f"{click.describe()}")
+                return click
                 
         except Exception as e:
             print(f"AirPlay error: {e}")
+        return None
     
     def update_status(self):
         """Update status label"""
@@ -1131,7 +1943,7 @@ class VideoPlaylistPro(QMainWindow):
             track_text += f" • {' • '.join(modes)}"
             
         self.status_label.setText(track_text)
-    
+        
     def load_settings(self):
         """Load application settings"""
         if self.settings_file.exists():
@@ -1160,6 +1972,8 @@ class VideoPlaylistPro(QMainWindow):
         self.settings['airplay_enabled'] = self.airplay_enabled
         self.settings['shuffle_enabled'] = self.shuffle_enabled
         self.settings['repeat_mode'] = self.repeat_mode
+        self.settings['airplay_buttons'] = self.airplay_buttons.entries
+        self.settings['airplay_timings'] = self.airplay_timings.to_settings()
         
         try:
             with open(self.settings_file, 'w') as f:
@@ -1169,7 +1983,28 @@ class VideoPlaylistPro(QMainWindow):
     
     def closeEvent(self, event):
         """Clean up when closing"""
+        self.watchdog_timer.stop()
+        if self.watchdog.restart_count:
+            print(f"Player watchdog: {self.watchdog.summary()}")
+        if any(self.backend.open_times.values()):
+            print(f"Player: {self.backend.open_summary()}")
+        if self.airplay_route.enables:
+            print(self.airplay_route.summary())
         self.stop_playback()
+        # Let the queued quit finish before the bridge goes away, but never
+        # hold the window open for a command stuck on QuickTime
+        if self.player_commands.stop(PLAYER_STOP_WAIT_MS):
+            get_bridge().close()
+        else:
+            print("Player thread still busy on close; leaving it to finish on its own")
+            self.player_commands.abandon()
+        for runner in list(self._ending_runners):
+            # Killed already; only its thread is left to end
+            runner.wait(PLAYER_STOP_WAIT_MS)
+        self.path_validator.shutdown()
+        self.library_scanner.stop()
+        self.play_stats.stop()
+        self.library.close()
         self.save_settings()
         event.accept()
 
@@ -1180,7 +2015,13 @@ def main():
     # Set application icon if available
     app.setApplicationName("QuickTime Player Video Playlist")
     
-    window = VideoPlaylistPro()
+    # --simulate runs the playlist against a stand-in player (no QuickTime
+    # needed) in which every track lasts 20 seconds
+    backend = None
+    if '--simulate' in sys.argv:
+        backend = SimulatedBackend(default_duration=20.0)
+    
+    window = VideoPlaylistPro(backend)
     window.show()
     
     sys.exit(app.exec_())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+AirPlay Clicks - Finds QuickTime's AirPlay button fast and learns how long its menu takes
+The button's index is remembered per window layout, so the accessibility
+tree is only walked when the layout is new, and the device menu is polled
+for instead of waited for. Click timings are kept across sessions so the
+settings dialog can show measured values
+"""
+
+import math
+import time
+from collections import deque
+
+from quicktime_player import call_player
+
+
+# The menu slides in after its window appears; give its rows a moment
+MENU_SETTLE = 0.15
+
+# Recent clicks kept for the learned timings
+TIMING_SAMPLES = 50
+
+
+class AirPlayClick:
+    """One click of the AirPlay button, as reported by clickAirPlayButton"""
+    
+    def __init__(self, x, y, lookup, menu_ms, lookup_ms, description=''):
+        self.x = x
+        self.y = y
+        self.lookup = lookup  # "hit" (remembered index) or "scan"
+        self.menu_ms = menu_ms  # until the menu opened; None if it was not seen
+        self.lookup_ms = lookup_ms  # finding and clicking the button
+        self.description = description
+    
+    def describe(self):
+        menu = f"menu after {self.menu_ms} ms" if self.menu_ms is not None else "menu not seen"
+        return f"button {self.lookup} in {self.lookup_ms} ms, {menu}"
+
+
+class AirPlayButtonCache:
+    """AirPlay button index per QuickTime window layout ("width,height,buttons")"""
+    
+    def __init__(self, entries=None):
+        # layout -> [index, description]; lists, so it round-trips through JSON
+        self.entries = {layout: list(entry) for layout, entry in (entries or {}).items()}
+    
+    def table(self):
+        """Layouts in the form clickAirPlayButton reads"""
+        return "\n".join(f"{layout}|{entry[0]}" for layout, entry in self.entries.items())
+    
+    def remember(self, layout, index, description):
+        self.entries[layout] = [index, description]
+
+
+def click_airplay_button(cache, menu_timeout, call=call_player):
+    """Click the AirPlay button and wait for its menu; AirPlayClick or None if not found"""
+    started = time.monotonic()
+    result = call('clickAirPlayButton', cache.table(), float(menu_timeout), timeout=menu_timeout + 10)
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    
+    parts = result.stdout.strip().split('|', 5)
+    if len(parts) < 6:
+        return None
+    layout, index, position, lookup, menu_ms, description = parts
+    try:
+        x, y = (int(float(value)) for value in position.split(','))
+        index = int(index)
+        menu_ms = int(menu_ms)
+    except ValueError:
+        return None
+    cache.remember(layout, index, description)
+    
+    waited_ms = menu_ms if menu_ms >= 0 else int(menu_timeout * 1000)
+    return AirPlayClick(x, y, lookup, menu_ms if menu_ms >= 0 else None,
+                        max(0, elapsed_ms - waited_ms), description)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+class AirPlayTimings:
+    """Recent AirPlay click timings, stored in the app settings"""
+    
+    def __init__(self, samples=None, limit=TIMING_SAMPLES):
+        # [lookup, lookup ms, menu ms or -1]
+        self.samples = deque((list(sample) for sample in samples or []), maxlen=limit)
+    
+    def record(self, click):
+        menu_ms = click.menu_ms if click.menu_ms is not None else -1
+        self.samples.append([click.lookup, click.lookup_ms, menu_ms])
+    
+    def to_settings(self):
+        return list(self.samples)
+    
+    def menu_times(self):
+        return [menu for _, _, menu in self.samples if menu >= 0]
+    
+    def lookup_times(self, lookup):
+        return [ms for kind, ms, _ in self.samples if kind == lookup]
+    
+    def suggested_menu_wait(self):
+        """Menu wait limit in ms from what was measured, or None without data"""
+        menu_times = self.menu_times()
+        if len(menu_times) < 3:
+            return None
+        # Twice the slowest recent menu, in 100 ms steps
+        return max(300, int(math.ceil(max(menu_times) * 2 / 100.0)) * 100)
+    
+    def summary(self):
+        """Learned timings in one line, for the settings dialog"""
+        if not self.samples:
+            return "No AirPlay clicks measured yet"
+        parts = []
+        menu_times = self.menu_times()
+        if menu_times:
+            parts.append(f"menu opens in {_percentile(menu_times, 50)} ms "
+                         f"(p95 {_percentile(menu_times, 95)} ms)")
+        missed = len(self.samples) - len(menu_times)
+        if missed:
+            parts.append(f"menu not seen {missed}x")
+        for lookup, label in (('hit', 'remembered'), ('scan', 'scanned')):
+            times = self.lookup_times(lookup)
+            if times:
+                parts.append(f"button {label} in {_percentile(times, 50)} ms")
+        return f"{len(self.samples)} clicks: " + ", ".join(parts)
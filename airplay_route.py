@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+AirPlay Route - Remembers whether QuickTime is still playing to AirPlay
+Once AirPlay is set up, the route normally survives the next track, so
+the click sequence only has to run again when the player was relaunched
+or the route was seen to be lost
+"""
+
+import copy
+import time
+
+
+# Route states reported by the QuickTime library's airplayRoute handler
+ROUTE_ON = 'on'
+ROUTE_OFF = 'off'
+ROUTE_UNKNOWN = 'unknown'
+
+# Window texts QuickTime shows while a document plays to an AirPlay device
+ROUTE_MARKERS = ('AirPlay', 'playing on', '재생 중')
+
+
+class AirPlayRoute:
+    """Cached AirPlay route with verification
+    
+    enabled() records a completed click sequence against the player's
+    generation (PlayerBackend.generation, bumped whenever QuickTime may
+    have been relaunched). needs_enable() is asked before every track:
+    a relaunched player always needs the clicks; otherwise verify() looks
+    at the player, a route seen on is kept, a route seen off is set up
+    again, and when it cannot tell, the cached route is trusted for
+    max_age seconds after it was last set up or confirmed.
+    
+    The player thread decides on a snapshot() and the window thread takes
+    the outcome back with merge().
+    """
+    
+    def __init__(self, max_age=600.0, clock=time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self.generation = None  # player generation the route was set up in
+        self.confirmed_at = None  # last set up or seen on
+        self.enables = 0
+        self.skips = 0
+        self.losses = 0
+        self.resets = 0  # forget() calls, so an outdated snapshot can be told apart
+        self.base_resets = None  # resets of the route a snapshot was taken from
+    
+    @property
+    def active(self):
+        return self.generation is not None
+    
+    def needs_enable(self, generation, verify=None):
+        """True if the click sequence has to run for this track
+        
+        verify is only called while the cached route could still hold, and
+        returns ROUTE_ON, ROUTE_OFF or ROUTE_UNKNOWN.
+        """
+        if not self.active or generation != self.generation:
+            self.forget()
+            return True
+        state = verify() if verify else ROUTE_UNKNOWN
+        if state == ROUTE_OFF:
+            self.losses += 1
+            self.forget()
+            return True
+        now = self.clock()
+        if state == ROUTE_ON:
+            self.confirmed_at = now
+        elif now - self.confirmed_at > self.max_age:
+            self.forget()
+            return True
+        self.skips += 1
+        return False
+    
+    def enabled(self, generation):
+        """The click sequence ran in this player generation"""
+        self.enables += 1
+        self.generation = generation
+        self.confirmed_at = self.clock()
+    
+    def forget(self):
+        """Assume nothing about the route (relaunch, or route lost)"""
+        self.generation = None
+        self.confirmed_at = None
+        self.resets += 1
+    
+    def snapshot(self):
+        """Copy for needs_enable() on another thread, to hand back to merge()"""
+        route = copy.copy(self)
+        route.enables = route.skips = route.losses = 0
+        route.base_resets = self.resets
+        return route
+    
+    def merge(self, route):
+        """Take over the counts and the route state a snapshot ended with
+        
+        Returns False and keeps the route state if forget() was called here
+        after the snapshot was taken (e.g. AirPlay switched off meanwhile).
+        """
+        self.enables += route.enables
+        self.skips += route.skips
+        self.losses += route.losses
+        if route.base_resets != self.resets:
+            return False
+        self.generation = route.generation
+        self.confirmed_at = route.confirmed_at
+        return True
+    
+    def summary(self):
+        """One line of route statistics"""
+        return f"AirPlay set up {self.enables}x, kept {self.skips}x, lost {self.losses}x"
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+AppleScript Bridge - One long-lived osascript process for all QuickTime commands
+Instead of spawning osascript (and recompiling the script) for every play,
+pause or status check, commands are sent as JSON lines over a pipe to a
+JXA loop that keeps compiled scripts cached and replies with JSON lines.
+call() runs a handler of a script library with arguments, so the library
+is compiled once and values such as file paths never become source text.
+
+Run "python3 applescript_bridge.py --fake" to start a stand-in bridge that
+speaks the same protocol on any OS (used for testing and benchmarking).
+"""
+
+import itertools
+import json
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+
+
+# JXA side of the bridge: read a request line, run the AppleScript through a
+# cached NSAppleScript, write one reply line
+BRIDGE_SOURCE = r'''
+ObjC.import('Foundation');
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var compiled = {};
+
+function writeLine(obj) {
+    var line = JSON.stringify(obj) + '\n';
+    stdout.writeData($(line).dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function errorMessage(info) {
+    if (!info || info.isNil()) return 'AppleScript error';
+    var msg = info.objectForKey('NSAppleScriptErrorMessage');
+    return msg.isNil() ? 'AppleScript error' : ObjC.unwrap(msg);
+}
+
+function compile(source) {
+    var script = compiled[source];
+    if (script) return script;
+    script = $.NSAppleScript.alloc.initWithSource($(source));
+    var err = Ref();
+    if (!script.compileAndReturnError(err)) throw new Error(errorMessage(err[0]));
+    compiled[source] = script;
+    return script;
+}
+
+function unwrapResult(desc, err) {
+    if (desc.isNil()) throw new Error(errorMessage(err[0]));
+    var value = desc.stringValue;
+    return value.isNil() ? '' : ObjC.unwrap(value);
+}
+
+function execute(source) {
+    var err = Ref();
+    return unwrapResult(compile(source).executeAndReturnError(err), err);
+}
+
+function descriptor(value) {
+    if (typeof value === 'boolean') return $.NSAppleEventDescriptor.descriptorWithBoolean(value);
+    if (typeof value === 'number') {
+        return Number.isInteger(value) ? $.NSAppleEventDescriptor.descriptorWithInt32(value)
+                                       : $.NSAppleEventDescriptor.descriptorWithDouble(value);
+    }
+    return $.NSAppleEventDescriptor.descriptorWithString($(String(value)));
+}
+
+// Call a handler of a compiled script: a subroutine event ('ascr'/'psbr')
+// naming the handler ('snam', lower case) with the arguments as a list ('----')
+function callHandler(source, handler, args) {
+    var params = $.NSAppleEventDescriptor.listDescriptor;
+    args.forEach(function (arg, i) { params.insertDescriptorAtIndex(descriptor(arg), i + 1); });
+    var event = $.NSAppleEventDescriptor.appleEventWithEventClassEventIDTargetDescriptorReturnIDTransactionID(
+        0x61736372, 0x70736272, $.NSAppleEventDescriptor.currentProcessDescriptor, -1, 0);
+    event.setParamDescriptorForKeyword($.NSAppleEventDescriptor.descriptorWithString($(handler.toLowerCase())), 0x736e616d);
+    event.setParamDescriptorForKeyword(params, 0x2d2d2d2d);
+    var err = Ref();
+    return unwrapResult(compile(source).executeAppleEventError(event, err), err);
+}
+
+function handle(line) {
+    var request = JSON.parse(line);
+    var started = Date.now();
+    try {
+        var result = request.handler ? callHandler(request.script, request.handler, request.args || [])
+                                     : execute(request.script);
+        writeLine({id: request.id, ok: true, result: result, elapsed: Date.now() - started});
+    } catch (e) {
+        writeLine({id: request.id, ok: false, error: String(e.message || e), elapsed: Date.now() - started});
+    }
+}
+
+var pending = $.NSMutableData.data;
+while (true) {
+    var data = stdin.availableData;
+    if (data.length == 0) break;
+    pending.appendData(data);
+    // A multi-byte character may be split across reads; wait for the rest
+    var text = $.NSString.alloc.initWithDataEncoding(pending, $.NSUTF8StringEncoding);
+    if (text.isNil()) continue;
+    text = ObjC.unwrap(text);
+    if (text.charAt(text.length - 1) != '\n') continue;
+    pending = $.NSMutableData.data;
+    text.split('\n').forEach(function (line) { if (line) handle(line); });
+}
+'''
+
+DEFAULT_TIMEOUT = 10.0
+
+
+class AppleScriptBridge:
+    """Client for a persistent bridge process
+    
+    run() returns a subprocess.CompletedProcess so it drops in where the
+    apps used subprocess.run(['osascript', '-e', script]). A bridge that
+    crashes is respawned transparently; one that stops answering is killed
+    and subprocess.TimeoutExpired is raised, as subprocess.run would.
+    """
+    
+    def __init__(self, command=None, timeout=DEFAULT_TIMEOUT):
+        self.command = command or ['osascript', '-l', 'JavaScript', '-e', BRIDGE_SOURCE]
+        self.timeout = timeout
+        self.process = None
+        self.replies = None
+        self.spawn_count = 0
+        self.request_count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def run(self, script, timeout=None):
+        """Run AppleScript source and return a CompletedProcess-like result"""
+        return self._request({'script': script}, timeout)
+    
+    def call(self, library, handler, args=(), timeout=None):
+        """Run handler(*args) of the script library source
+        
+        The library is compiled once per bridge process; args (text,
+        numbers, booleans) travel as Apple event parameters, never as
+        source, so quotes or backslashes in a file name cannot break it.
+        """
+        return self._request({'script': library, 'handler': handler, 'args': list(args)}, timeout)
+    
+    def _request(self, request, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_running()
+                request_id = next(self._ids)
+                try:
+                    self._send(dict(request, id=request_id))
+                    reply = self._receive(request_id, timeout)
+                except (BrokenPipeError, EOFError):
+                    # Bridge died; respawn and retry once
+                    self._kill()
+                    if attempt:
+                        raise
+                    continue
+                except subprocess.TimeoutExpired:
+                    # A wedged bridge would delay every later command
+                    self._kill()
+                    raise
+                
+                self.request_count += 1
+                if reply.get('ok'):
+                    return subprocess.CompletedProcess(self.command[:1], 0, str(reply.get('result', '')) + '\n', '')
+                return subprocess.CompletedProcess(self.command[:1], 1, '', str(reply.get('error', 'error')) + '\n')
+    
+    def close(self):
+        """Stop the bridge process"""
+        with self._lock:
+            if self.process and self.process.poll() is None:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=2)
+                except Exception:
+                    pass
+            self._kill()
+    
+    def _ensure_running(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        self.spawn_count += 1
+        self.replies = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_replies,
+            args=(self.process, self.replies),
+            daemon=True
+        )
+        reader.start()
+    
+    @staticmethod
+    def _read_replies(process, replies):
+        """Forward reply lines to a queue so waits can time out"""
+        for line in process.stdout:
+            try:
+                replies.put(json.loads(line))
+            except ValueError:
+                continue
+        replies.put(None)  # EOF
+    
+    def _send(self, request):
+        self.process.stdin.write(json.dumps(request) + '\n')
+        self.process.stdin.flush()
+    
+    def _receive(self, request_id, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                reply = self.replies.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(self.command[:1], timeout)
+            if reply is None:
+                raise EOFError("bridge exited")
+            if reply.get('id') == request_id:
+                return reply
+            # Late reply to an earlier request; ignore
+    
+    def _kill(self):
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=2)
+            except Exception:
+                pass
+        self.process = None
+
+
+_bridge = None
+_bridge_lock = threading.Lock()
+
+
+def get_bridge():
+    """Shared bridge for the whole app"""
+    global _bridge
+    with _bridge_lock:
+        if _bridge is None:
+            _bridge = AppleScriptBridge()
+        return _bridge
+
+
+def set_bridge(bridge):
+    """Replace the shared bridge (e.g. with a fake one for testing)"""
+    global _bridge
+    with _bridge_lock:
+        if _bridge is not None and _bridge is not bridge:
+            _bridge.close()
+        _bridge = bridge
+
+
+def run_applescript(script, timeout=None):
+    """Run AppleScript through the shared bridge"""
+    return get_bridge().run(script, timeout)
+
+
+def call_applescript(library, handler, *args, timeout=None):
+    """Call a handler of a script library through the shared bridge"""
+    return get_bridge().call(library, handler, args, timeout)
+
+
+def fake_bridge_command(latency_ms=0, responses=None):
+    """Command line that starts a fake bridge with the given behaviour"""
+    command = [sys.executable, __file__, '--fake', '--latency-ms', str(latency_ms)]
+    if responses:
+        command += ['--responses', json.dumps(responses)]
+    return command
+
+
+def serve_fake(latency_ms=0, responses=None):
+    """Fake bridge loop: answer each request after latency_ms
+    
+    responses maps a regular expression to a reply; the first pattern found
+    in the script (for handler calls, the handler name) wins. "!crash"
+    exits the process and "!hang" never replies, so respawn and timeout
+    handling can be exercised; "!args" replies with the call's arguments
+    as JSON.
+    """
+    responses = responses or {}
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request = json.loads(line)
+        started = time.monotonic()
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        
+        reply = {'id': request['id'], 'ok': True, 'result': ''}
+        text = request.get('handler') or request['script']
+        for pattern, result in responses.items():
+            if re.search(pattern, text):
+                if result == '!crash':
+                    sys.exit(1)
+                if result == '!hang':
+                    time.sleep(3600)
+                if result == '!args':
+                    result = json.dumps(request.get('args', []))
+                if isinstance(result, str) and result.startswith('!error '):
+                    reply = {'id': request['id'], 'ok': False, 'error': result[7:]}
+                else:
+                    reply['result'] = result
+                break
+        reply['elapsed'] = int((time.monotonic() - started) * 1000)
+        sys.stdout.write(json.dumps(reply) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    if '--fake' in sys.argv:
+        args = sys.argv[1:]
+        latency = int(args[args.index('--latency-ms') + 1]) if '--latency-ms' in args else 0
+        canned = json.loads(args[args.index('--responses') + 1]) if '--responses' in args else None
+        serve_fake(latency, canned)
+    else:
+        # Quick manual check on macOS
+        bridge = get_bridge()
+        started = time.time()
+        print(bridge.run('tell application "System Events" to return name of current user').stdout.strip())
+        print(f"Round trip: {(time.time() - started) * 1000:.1f} ms")
+        bridge.close()
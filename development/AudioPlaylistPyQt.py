@@ -16,6 +16,9 @@ import json
 import random
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from quicktime_player import query_status
+
 # No conversion needed - QuickTime plays audio files directly
 
 
@@ -463,43 +466,22 @@ class AudioPlaylistPyQt(QMainWindow):
     def check_playback_status(self):
         """Check if current track has finished"""
         try:
-            result = subprocess.run([
-                'osascript', '-e',
-                'tell application "QuickTime Player" to if (count documents) > 0 then playing of front document else false'
-            ], capture_output=True, text=True)
+            # Playing state, position and duration in one round trip
+            status = query_status()
             
-            if result.stdout.strip() != "true":
+            if not status.playing:
                 # Track finished, play next
                 self.play_next()
             else:
                 # Update progress
-                self.update_progress()
+                self.update_progress(status)
         except Exception as e:
             print(f"Playback check error: {e}")
     
-    def update_progress(self):
-        """Update progress bar"""
-        try:
-            # Get current time
-            current_result = subprocess.run([
-                'osascript', '-e',
-                'tell application "QuickTime Player" to if (count documents) > 0 then current time of front document else 0'
-            ], capture_output=True, text=True)
-            
-            # Get duration
-            duration_result = subprocess.run([
-                'osascript', '-e',
-                'tell application "QuickTime Player" to if (count documents) > 0 then duration of front document else 0'
-            ], capture_output=True, text=True)
-            
-            current = float(current_result.stdout.strip() or 0)
-            duration = float(duration_result.stdout.strip() or 0)
-            
-            if duration > 0:
-                progress = int((current / duration) * 100)
-                self.progress_bar.setValue(progress)
-        except:
-            pass
+    def update_progress(self, status):
+        """Update progress bar from a status record"""
+        if status.duration > 0:
+            self.progress_bar.setValue(int(status.progress * 100))
     
     def toggle_shuffle(self):
         """Toggle shuffle mode"""
@@ -407,11 +407,19 @@ class ConvertAndPlayWorker(QThread):
                     print("DEBUG: Showing controls...")
                     pyautogui.moveTo(airplay_coords['x'], airplay_coords['y'] - 50, duration=0.5)
                     time.sleep(0.5)
+                    airplay_coords = self._checked_coords(
+                        'airplay_icon', airplay_coords,
+                        lambda detector, screenshot: detector.find_airplay_button(screenshot))
                     
                     # Click AirPlay
                     print(f"DEBUG: Clicking AirPlay at ({airplay_coords['x']}, {airplay_coords['y']})")
                     pyautogui.click(airplay_coords['x'], airplay_coords['y'])
                     time.sleep(1.5)
+                    checkbox_coords = self._checked_coords(
+                        'apple_tv_checkbox', checkbox_coords,
+                        lambda detector, screenshot: detector.find(
+                            screenshot, ['checkbox_unchecked.png'],
+                            detector.popup((airplay_coords['x'], airplay_coords['y'])), threshold=0.6))
                     
                     # Click checkbox
                     print(f"DEBUG: Clicking checkbox at ({checkbox_coords['x']}, {checkbox_coords['y']})")
@@ -442,6 +450,35 @@ class ConvertAndPlayWorker(QThread):
             
         return False
 
+    def _checked_coords(self, name, saved, find):
+        """Saved coordinates, unless the screen no longer shows the same thing there
+        
+        The detection cache checks a small patch at the last detected spot for
+        this window; only if it changed is find(detector, screenshot) run on a
+        full screenshot. Falls back to the saved coordinates if that fails.
+        """
+        try:
+            from detection_cache import get_cache
+            from window_detection import WindowDetector, quicktime_window, screen_scale
+        except ImportError as e:
+            print(f"DEBUG: Detection not available ({e}), using saved coordinates")
+            return saved
+        
+        window = quicktime_window()
+        if window is None:
+            return saved
+        detector = WindowDetector(window, screen_scale())
+        cache = get_cache()
+        match = cache.locate(window, detector.display_scale, name,
+                             lambda screenshot: find(detector, screenshot))
+        if not match:
+            print(f"DEBUG: {name} not detected, using saved coordinates")
+            return saved
+        
+        coords = {'x': int(match['x']), 'y': int(match['y'])}
+        print(f"DEBUG: {name} at ({coords['x']}, {coords['y']}) {'(cached)' if match.get('cached') else '(detected)'} - {cache.summary()}")
+        return coords
+
 
 def main():
     app = QApplication(sys.argv)
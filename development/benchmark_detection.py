@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Detection Benchmark - How long does finding the AirPlay button take?
+Matches the AirPlay templates against saved Retina captures the way the
+detectors used to (the whole screen) and inside the QuickTime window's
+control bar only (window_detection), and reports the time per detection,
+the pixels searched and whether both found the same spot. Then compares
+the exhaustive 12-scale search of template_based_detector with coarse to
+fine search at several downsampling factors: time on the capture, and how
+often each finds an icon pasted at a random spot and scale (--trials).
+Last, the whole template x scale x region grid is matched on 1, 2, 4 and
+8 threads (--threads), searching everything and with the early exit.
+Needs OpenCV, not QuickTime.
+
+Usage:
+    python3 benchmark_detection.py [--repeat 5] [--trials 10] [--threads 1,2,4,8] [--capture shot.png --window x,y,w,h]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+from template_bank import CAPTURE_SCALE, TEMPLATE_DIR, get_bank
+from window_detection import (DEFAULT_SCALES, Region, WindowDetector, match_coarse_to_fine, match_exhaustive,
+                              match_parallel)
+
+
+DEVELOPMENT_DIR = Path(__file__).parent
+
+# Saved captures with the QuickTime window they show, in points
+CAPTURES = {
+    'airplay_detection_test.png': Region(0, 76, 1440, 809),
+}
+
+# template_based_detector.find_with_multiple_scales
+SEARCH_SCALES = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.5, 2.0)
+COARSE_FACTORS = (2, 4, 8)
+
+
+def full_screen(detector, screenshot, names, scales=DEFAULT_SCALES):
+    """Every template level against the whole screenshot, as the detectors did"""
+    gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+    best = None
+    for name in names:
+        for level in detector.bank.pyramid(name, scales):
+            _, value, _, location = cv2.minMaxLoc(cv2.matchTemplate(gray, level.gray, cv2.TM_CCOEFF_NORMED))
+            if best is None or value > best['confidence']:
+                best = {
+                    'x': (location[0] + level.width // 2) / detector.display_scale,
+                    'y': (location[1] + level.height // 2) / detector.display_scale,
+                    'confidence': value
+                }
+    return best
+
+
+def timed(run, repeat):
+    """Result of run() and its mean time in ms"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return result, (time.perf_counter() - started) * 1000 / repeat
+
+
+def same_spot(a, b, tolerance=4):
+    return a is not None and b is not None and abs(a['x'] - b['x']) <= tolerance and abs(a['y'] - b['y']) <= tolerance
+
+
+def describe(match):
+    if match is None:
+        return "nothing"
+    return f"({match['x']:.0f}, {match['y']:.0f}) at {match['confidence']:.2f}"
+
+
+def benchmark(path, window, display_scale, repeat):
+    screenshot = cv2.imread(str(path))
+    if screenshot is None:
+        print(f"❌ Could not read {path}")
+        return False
+    
+    detector = WindowDetector(window, display_scale)
+    names = detector.bank.names("airplay*.png")
+    total_pixels = screenshot.shape[0] * screenshot.shape[1]
+    
+    print(f"\n📸 {path.name} ({screenshot.shape[1]}x{screenshot.shape[0]}), window {window}")
+    print(f"   control bar {detector.control_bar()}, templates: {', '.join(names)}")
+    
+    full, full_ms = timed(lambda: full_screen(detector, screenshot, names), repeat)
+    roi, roi_ms = timed(lambda: detector.find(screenshot, names, detector.control_bar(), threshold=0.0), repeat)
+    roi_pixels = detector.pixels_searched // repeat
+    
+    print(f"   full screen:  {full_ms:8.1f} ms  {total_pixels:>9,} px  {describe(full)}")
+    print(f"   control bar:  {roi_ms:8.1f} ms  {roi_pixels:>9,} px  {describe(roi)}")
+    print(f"   speedup {full_ms / roi_ms:.1f}x, {roi_pixels / total_pixels:.1%} of the pixels")
+    
+    agree = same_spot(full, roi)
+    print(f"{'✅' if agree else '⚠️'} {'same' if agree else 'different'} match")
+    return agree
+
+
+def matchers():
+    """(label, matcher) for the exhaustive search and each coarse factor"""
+    yield 'exhaustive', match_exhaustive
+    for factor in COARSE_FACTORS:
+        yield f'coarse /{factor}', lambda gray, levels, factor=factor: match_coarse_to_fine(gray, levels, factor)
+
+
+def benchmark_coarse(path, display_scale, repeat, trials):
+    """Exhaustive against coarse-to-fine search over the whole capture"""
+    screenshot = cv2.imread(str(path))
+    if screenshot is None:
+        return False
+    gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+    levels = get_bank(TEMPLATE_DIR, display_scale).pyramid('airplay_icon.png', SEARCH_SCALES)
+    
+    print(f"\n🔍 {path.name}: airplay_icon.png at {len(levels)} scales over the whole capture")
+    exhaustive = None
+    ok = True
+    for label, matcher in matchers():
+        match, ms = timed(lambda: matcher(gray, levels), repeat)
+        if exhaustive is None:
+            exhaustive, exhaustive_ms = match, ms
+        agree = match[1] == exhaustive[1] and match[2] is exhaustive[2]
+        print(f"   {label:11} {ms:8.1f} ms  {exhaustive_ms / ms:5.1f}x  "
+              f"confidence {match[0]:.3f} at {match[1]} (scale {match[2].scale})  {'✅' if agree else '⚠️'}")
+        ok &= agree
+    
+    # Accuracy: paste the icon at a random spot and scale, see who finds it
+    rng = random.Random(1)
+    hits = {label: 0 for label, _ in matchers()}
+    for _ in range(trials):
+        level = rng.choice([level for level in levels if level.scale <= 1.5])
+        x = rng.randrange(0, gray.shape[1] - level.width)
+        y = rng.randrange(0, gray.shape[0] - level.height)
+        trial = gray.copy()
+        trial[y:y + level.height, x:x + level.width] = level.gray
+        for label, matcher in matchers():
+            match = matcher(trial, levels)
+            hits[label] += abs(match[1][0] - x) <= 2 and abs(match[1][1] - y) <= 2
+    if trials:
+        print("   pasted icon found: " + ", ".join(f"{label} {count}/{trials}" for label, count in hits.items()))
+    return ok
+
+
+def benchmark_threads(path, window, display_scale, repeat, thread_counts):
+    """Every AirPlay template and search scale over the whole screen and the window regions, on N threads"""
+    screenshot = cv2.imread(str(path))
+    if screenshot is None:
+        return False
+    detector = WindowDetector(window, display_scale)
+    names = detector.bank.names("airplay*.png")
+    levels = [level for name in names for level in detector.bank.pyramid(name, SEARCH_SCALES)]
+    gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+    grids = {
+        'whole screen': [(gray, (0, 0), level) for level in levels],
+        'window regions': [(crop, offset, level)
+                           for crop, offset in (region.crop(gray, display_scale)
+                                                for region in (detector.control_bar(), detector.popup()))
+                           for level in levels],
+    }
+    
+    print(f"\n🧵 {path.name}: {len(levels)} template levels, OpenCV using {cv2.getNumThreads()} threads itself")
+    ok = True
+    for label, jobs in grids.items():
+        print(f"   {label} ({len(jobs)} matches)")
+        reference = None
+        for threads in thread_counts:
+            full, full_ms = timed(lambda: match_parallel(jobs, threads, early_exit=2.0), repeat)
+            stats = {}
+            early, early_ms = timed(lambda: match_parallel(jobs, threads, stats=stats), repeat)
+            if reference is None:
+                reference, reference_ms = full, full_ms
+            agree = full[1] == reference[1] and full[2] is reference[2]
+            print(f"   {threads} threads: {full_ms:8.1f} ms ({reference_ms / full_ms:4.1f}x), "
+                  f"early exit {early_ms:8.1f} ms ({stats['matched']} of {len(jobs)} matched, {stats['reason']})"
+                  f"  {'✅' if agree else '⚠️'}")
+            ok &= agree
+    return ok
+
+
+def parse_threads(text):
+    return [int(value) for value in text.split(',')]
+
+
+def parse_window(text):
+    x, y, width, height = (int(value) for value in text.split(','))
+    return Region(x, y, width, height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AirPlay button detection")
+    parser.add_argument('--repeat', type=int, default=5, help="detections timed per capture")
+    parser.add_argument('--trials', type=int, default=10, help="pasted icons for the coarse-to-fine accuracy check")
+    parser.add_argument('--threads', type=parse_threads, default=[1, 2, 4, 8], help="thread counts to compare")
+    parser.add_argument('--scale', type=float, default=CAPTURE_SCALE, help="pixels per point of the captures")
+    parser.add_argument('--capture', type=Path, help="another full-screen capture to measure")
+    parser.add_argument('--window', type=parse_window, help="its QuickTime window as x,y,w,h in points")
+    args = parser.parse_args()
+    
+    captures = {DEVELOPMENT_DIR / name: window for name, window in CAPTURES.items()}
+    if args.capture:
+        if args.window is None:
+            parser.error("--capture needs --window")
+        captures = {args.capture: args.window}
+    
+    ok = True
+    for path, window in captures.items():
+        ok &= benchmark(path, window, args.scale, args.repeat)
+        ok &= benchmark_coarse(path, args.scale, args.repeat, args.trials)
+        ok &= benchmark_threads(path, window, args.scale, args.repeat, args.threads)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Track Transition Benchmark - How long is the room silent between tracks?
+Drives the playlist state machine (play_current -> check_playback ->
+handle_track_finished -> next) against the simulated player in virtual
+time, so thousands of transitions run in seconds. Reports
+p50/p95/p99 gaps, polling overhead and player round trips per track for
+every repeat/shuffle mode and end-of-track strategy. In runner mode the
+session's own status checks count as polls but not as round trips.
+--warm keeps the player running between tracks instead of paying
+--launch-latency whenever the last document closes.
+
+Usage:
+    python3 benchmark_transitions.py [--transitions 1000] [--open-latency 2.6] ...
+"""
+
+import argparse
+import heapq
+import itertools
+import math
+import random
+import sys
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_backend import SimulatedBackend, VirtualClock
+from playlist_sequence import next_track_index, plan_queue
+from quicktime_player import EndOfTrackScheduler, PRELOAD_LEAD
+
+
+# Timer delays used by the apps
+AFTER_CLOSE_DELAY = 1.0  # handle_track_finished -> _handle_track_finished_after_close
+FIXED_POLL_INTERVAL = 2.0  # check_timer interval before duration scheduling
+
+# osascript round trips per backend call (QuickTimeBackend.open runs two scripts)
+ROUND_TRIPS = {'open': 2}
+
+# Runner mode: starting an osascript session with an AppleScriptObjC script,
+# and the longest queue one session gets (playlist_runner.RUNNER_QUEUE_LIMIT)
+RUNNER_SPAWN = 0.35
+RUNNER_QUEUE_LIMIT = 500
+
+STRATEGIES = ('fixed', 'scheduled', 'preload', 'runner')
+MODES = [(repeat, shuffle) for repeat in ('none', 'all', 'one') for shuffle in (False, True)]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+class EventLoop:
+    """Single-shot timers on a virtual clock, like QTimer.singleShot"""
+    
+    def __init__(self, clock):
+        self.clock = clock
+        self.events = []
+        self._seq = itertools.count()
+    
+    def call_later(self, delay, callback):
+        heapq.heappush(self.events, (self.clock.now + max(0.0, delay), next(self._seq), callback))
+    
+    def run(self, until):
+        while self.events and not until():
+            when, _, callback = heapq.heappop(self.events)
+            self.clock.now = max(self.clock.now, when)
+            callback()
+
+
+class TransitionRun:
+    """The apps' playback flow, with timers on the event loop
+    
+    Backend calls go through a serial command queue like the apps' player
+    thread: a command holds the player for its simulated latency and its
+    result is delivered when it completes, while timers keep running.
+    """
+    
+    def __init__(self, backend, clock, paths, repeat_mode, shuffle, strategy, transitions, seed):
+        self.backend = backend
+        self.clock = clock
+        self.loop = EventLoop(clock)
+        self.paths = paths
+        self.repeat_mode = repeat_mode
+        self.shuffle_queue = None
+        if shuffle:
+            self.shuffle_queue = list(range(len(paths)))
+            random.Random(seed).shuffle(self.shuffle_queue)
+        self.strategy = strategy
+        self.transitions = transitions
+        self.keep_warm = False
+        self.scheduler = EndOfTrackScheduler()
+        self.commands = deque()
+        self.player_busy = False
+        
+        self.current_index = -1
+        self.play_history = set()  # the apps use a list; a set keeps long runs fast
+        self.preloaded = None
+        self.preload_tried = False
+        self.track_end = None  # true end of the playing track
+        self.ended_at = None  # end of the last finished track
+        self.finished = False
+        
+        self.gaps = []
+        self.tracks_started = 0
+        self.polls = 0
+        self.poll_seconds = 0.0
+        
+        self.session_open_latency = 0.0
+        self.session_left = 0  # tracks the runner session still has queued
+        self.session_trips = 0  # backend calls made inside the session
+        self.spawns = 0
+    
+    def run(self):
+        start = self.shuffle_queue[0] if self.shuffle_queue else 0
+        self.play_current(start)
+        self.loop.run(until=lambda: self.finished or len(self.gaps) >= self.transitions)
+    
+    # -- simulated player thread ----------------------------------------
+    
+    def submit(self, func, *args, on_done=None):
+        self.commands.append((func, args, on_done))
+        if not self.player_busy:
+            self._next_command()
+    
+    def _next_command(self):
+        if not self.commands:
+            self.player_busy = False
+            return
+        func, args, on_done = self.commands.popleft()
+        self.player_busy = True
+        # Run now, but deliver the result only once its latency has passed
+        started = self.clock.now
+        result = func(*args)
+        elapsed = self.clock.now - started
+        self.clock.now = started
+        
+        def finish():
+            if on_done:
+                on_done(result)
+            self._next_command()
+        self.loop.call_later(elapsed, finish)
+    
+    def timed_status(self, document_name):
+        started = self.clock.now
+        status = self.backend.status(document_name)
+        self.polls += 1
+        self.poll_seconds += self.clock.now - started
+        return status
+    
+    # -- playback flow -------------------------------------------------
+    
+    def play_current(self, index):
+        self.current_index = index
+        self.play_history.add(index)
+        self.preloaded = None
+        self.preload_tried = False
+        if self.strategy == 'runner':
+            self.spawns += 1
+            self.session_left = len(plan_queue(index, len(self.paths), self.repeat_mode,
+                                               self.shuffle_queue, self.play_history, RUNNER_QUEUE_LIMIT))
+            self.loop.call_later(RUNNER_SPAWN, lambda: self.session_open(index))
+            return
+        self.submit(self.backend.open, self.paths[index], True, on_done=lambda _: self.track_started())
+    
+    def track_started(self):
+        self.tracks_started += 1
+        path = self.paths[self.current_index]
+        self.track_end = self.clock.now + self.backend.duration_of(path) / self.backend.speed
+        if self.ended_at is not None:
+            self.gaps.append(self.clock.now - self.ended_at)
+            self.ended_at = None
+        self.scheduler.reset()
+        if self.strategy == 'runner':
+            self.session_left -= 1
+            self.session_check()
+            return
+        self.loop.call_later(self.scheduler.idle_interval, self.check_playback)
+    
+    def check_playback(self):
+        document_name = None
+        if self.preloaded:
+            document_name = Path(self.paths[self.current_index]).name
+        self.submit(self.timed_status, document_name, on_done=self.on_playback_status)
+    
+    def on_playback_status(self, status):
+        if status.finished:
+            self.handle_track_finished()
+            return
+        if self.strategy == 'fixed':
+            delay = FIXED_POLL_INTERVAL
+        else:
+            delay = self.scheduler.next_delay(status, now=self.clock.now)
+            if self.strategy == 'preload' and status.playing:
+                delay = self.preload_next(delay)
+        self.loop.call_later(delay, self.check_playback)
+    
+    def handle_track_finished(self):
+        self.ended_at = self.track_end
+        if self.preloaded:
+            index, path, name = self.preloaded
+            self.preloaded = None
+            self.preload_tried = False
+            if self.next_index() == index:
+                self.submit(self.backend.switch, name,
+                            on_done=lambda started: self.on_preloaded_started(index, started))
+                return
+        self.advance_after_close()
+    
+    def on_preloaded_started(self, index, started):
+        if not started:
+            self.advance_after_close()
+            return
+        self.current_index = index
+        self.play_history.add(index)
+        self.track_started()
+    
+    def advance_after_close(self):
+        self.submit(self.backend.close, self.keep_warm,
+                    on_done=lambda _: self.loop.call_later(AFTER_CLOSE_DELAY, self.after_close))
+    
+    def after_close(self):
+        # _handle_track_finished_after_close: the shared next_track_index,
+        # opened at once (only key and button presses wait for coalescing)
+        index = self.next_index()
+        if index is None:
+            self.finished = True
+            return
+        self.play_current(index)
+    
+    def next_index(self):
+        return next_track_index(self.current_index, len(self.paths), self.repeat_mode,
+                                self.shuffle_queue, self.play_history)
+    
+    def preload_next(self, delay):
+        if self.preload_tried:
+            return delay
+        remaining = self.scheduler.remaining(self.clock.now)
+        if remaining is None:
+            return delay
+        if remaining > PRELOAD_LEAD:
+            return min(delay, remaining - PRELOAD_LEAD)
+        self.preload_tried = True
+        index = self.next_index()
+        if index is None or index == self.current_index:
+            return delay
+        current_name = Path(self.paths[self.current_index]).name
+        if Path(self.paths[index]).name == current_name:
+            return delay
+        self.submit(self.backend.preload, self.paths[index], current_name,
+                    on_done=lambda name: self.on_track_preloaded(index, name))
+        return delay
+    
+    def on_track_preloaded(self, index, name):
+        if name:
+            self.preloaded = (index, self.paths[index], name)
+    
+    # -- runner mode: the whole queue inside one AppleScript session ----
+    
+    def in_session(self, name, *args):
+        """A backend call made by the session itself, not a Python round trip"""
+        self.session_trips += ROUND_TRIPS.get(name, 1)
+        return getattr(self.backend, name)(*args)
+    
+    def session_open(self, index):
+        # The runner opens without QuickTimeBackend.open's fixed delays, and
+        # closes the finished track only once the new one plays
+        self.current_index = index
+        self.play_history.add(index)
+        backend_latency = self.backend.open_latency
+        self.backend.open_latency = self.session_open_latency
+        if self.backend.documents:
+            name = self.in_session('preload', self.paths[index], '')
+            self.in_session('switch', name)
+        else:
+            self.in_session('open', self.paths[index], True)
+        self.backend.open_latency = backend_latency
+        self.track_started()
+    
+    def session_check(self):
+        started = self.clock.now
+        status = self.in_session('status')
+        self.polls += 1
+        self.poll_seconds += self.clock.now - started
+        if not status.finished:
+            self.loop.call_later(self.scheduler.next_delay(status, now=self.clock.now), self.session_check)
+            return
+        
+        self.ended_at = self.track_end
+        index = self.next_index()
+        if index is None:
+            self.finished = True
+        elif not self.session_left:
+            # Queue played out: Python hands over the next stretch
+            self.play_current(index)
+        elif index == self.current_index:
+            # Same file again: the session rewinds it
+            self.in_session('seek', 0.0)
+            self.track_started()
+        else:
+            self.session_open(index)
+
+
+def run_mode(args, repeat_mode, shuffle, strategy):
+    clock = VirtualClock()
+    rng = random.Random(args.seed)
+    # "none" stops after one pass, so give it enough tracks for the same sample size
+    count = args.transitions + 1 if repeat_mode == 'none' else args.tracks
+    paths = [f"/Music/track_{i:05d}.m4a" for i in range(count)]
+    durations = {path: rng.uniform(args.min_duration, args.max_duration) for path in paths}
+    backend = SimulatedBackend(
+        durations=durations,
+        open_latency=args.open_latency,
+        close_latency=args.close_latency,
+        command_latency=args.command_latency,
+        launch_latency=args.launch_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+        clock=clock.time,
+        sleep=clock.sleep
+    )
+    run = TransitionRun(backend, clock, paths, repeat_mode, shuffle, strategy, args.transitions, args.seed)
+    run.session_open_latency = args.session_open_latency
+    run.keep_warm = args.warm
+    run.run()
+    
+    tracks = max(1, run.tracks_started)
+    round_trips = sum(n * ROUND_TRIPS.get(name, 1) for name, n in backend.calls.items())
+    round_trips += run.spawns - run.session_trips
+    return {
+        'gaps': run.gaps,
+        'polls': run.polls / tracks,
+        'poll_seconds': run.poll_seconds / tracks,
+        'round_trips': round_trips / tracks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark silence between tracks")
+    parser.add_argument('--transitions', type=int, default=1000, help="transitions per mode")
+    parser.add_argument('--tracks', type=int, default=50, help="playlist length for repeat modes")
+    parser.add_argument('--min-duration', type=float, default=120.0)
+    parser.add_argument('--max-duration', type=float, default=420.0)
+    parser.add_argument('--open-latency', type=float, default=2.6, help="seconds to open a track")
+    parser.add_argument('--session-open-latency', type=float, default=0.8,
+                        help="seconds for the runner to open a track (no fixed delays)")
+    parser.add_argument('--launch-latency', type=float, default=1.5,
+                        help="seconds for QuickTime to launch when it is not running")
+    parser.add_argument('--warm', action='store_true',
+                        help="keep the player running between tracks")
+    parser.add_argument('--close-latency', type=float, default=0.6, help="seconds to close documents")
+    parser.add_argument('--command-latency', type=float, default=0.05, help="seconds per other command")
+    parser.add_argument('--jitter', type=float, default=0.2, help="relative latency jitter")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--strategy', choices=STRATEGIES, action='append',
+                        help="end-of-track strategy (default: all)")
+    args = parser.parse_args()
+    strategies = args.strategy or STRATEGIES
+    
+    print(f"🎵 Track transition benchmark: {args.transitions} transitions per mode, "
+          f"open {args.open_latency}s, close {args.close_latency}s, "
+          f"command {args.command_latency}s, launch {args.launch_latency}s "
+          f"({'warm' if args.warm else 'cold'} player), jitter {args.jitter:.0%}")
+    print()
+    header = (f"{'strategy':<10} {'repeat':<6} {'shuffle':<7} {'gap p50':>8} {'p95':>7} {'p99':>7} "
+              f"{'polls/trk':>9} {'poll s/trk':>10} {'trips/trk':>9}")
+    print(header)
+    print('-' * len(header))
+    for strategy in strategies:
+        for repeat_mode, shuffle in MODES:
+            result = run_mode(args, repeat_mode, shuffle, strategy)
+            gaps = result['gaps']
+            print(f"{strategy:<10} {repeat_mode:<6} {'on' if shuffle else 'off':<7} "
+                  f"{percentile(gaps, 50):>7.2f}s {percentile(gaps, 95):>6.2f}s {percentile(gaps, 99):>6.2f}s "
+                  f"{result['polls']:>9.1f} {result['poll_seconds']:>9.2f}s {result['round_trips']:>9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,9 @@ import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_watchdog import PlayerWatchdog
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +37,7 @@ class CafePlaylistManager:
         self.errors = []
         self.is_running = False
         self.airplay_enabled = False
+        self.watchdog = PlayerWatchdog()
         
     def load_config(self):
         """설정 파일 로드 또는 기본값 생성"""
@@ -190,6 +194,9 @@ class CafePlaylistManager:
                 self.enable_airplay_fullscreen()
                 
             self.play_count += 1
+            recovery = self.watchdog.recovered()
+            if recovery is not None:
+                logging.info(f"재시작 후 복구: {recovery:.1f}초 ({self.watchdog.summary()})")
             return True
             
         except Exception as e:
@@ -234,11 +241,14 @@ class CafePlaylistManager:
         recent_errors = [e for e in self.errors if e[0] > datetime.now() - timedelta(minutes=10)]
         
         if len(recent_errors) >= self.config['max_errors_before_restart']:
-            logging.warning("최대 에러 수 도달. QuickTime 재시작...")
+            # 연속 재시작을 막기 위해 대기 시간을 지수적으로 늘림
+            delay = self.watchdog.begin_restart(f"{len(recent_errors)} errors")
+            logging.warning(f"최대 에러 수 도달. {delay:.0f}초 후 QuickTime 재시작... "
+                            f"(재시작 {self.watchdog.restart_count}회)")
             
             # QuickTime 재시작
             subprocess.run(['osascript', '-e', 'tell application "QuickTime Player" to quit'])
-            time.sleep(2)
+            time.sleep(delay)
             
             # 에러 기록 초기화
             self.errors = []
@@ -331,6 +341,7 @@ class CafePlaylistManager:
         # 통계 출력
         logging.info(f"\n총 재생 횟수: {self.play_count}")
         logging.info(f"총 에러 횟수: {len(self.errors)}")
+        logging.info(f"QuickTime 재시작: {self.watchdog.summary()}")
         
         # 에러 로그 저장
         if self.errors:
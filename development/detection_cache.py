@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Detection Cache - Reuses AirPlay detections while the screen still shows them
+Detections are kept per QuickTime window geometry and display scale, with
+a small fingerprint of the pixels around each one. Before a cached spot
+is used again only that patch is captured and compared; full detection
+runs only when the window moved, the display changed or the patch no
+longer looks the same.
+
+Positions are in screen points, like window_detection results.
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from window_detection import Region
+
+
+CACHE_FILE = Path.home() / '.airplay_detection_cache.json'
+
+# Half the side of the patch checked around a cached spot, in points
+PATCH_POINTS = 12
+
+# A fingerprint is the patch averaged down to PATCH_GRID x PATCH_GRID gray values
+PATCH_GRID = 8
+
+# Mean gray difference (0-255, after removing overall brightness) still counted as the same patch
+PATCH_TOLERANCE = 12.0
+
+
+def _screencapture(*args):
+    """cv2 image from screencapture with extra arguments, or None"""
+    fd, path = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    try:
+        subprocess.run(['screencapture', '-x', *args, path], capture_output=True)
+        return cv2.imread(path)
+    finally:
+        os.remove(path)
+
+
+def capture_region(region):
+    """Screenshot of just region, in pixels"""
+    return _screencapture(f'-R{int(region.x)},{int(region.y)},{int(region.width)},{int(region.height)}')
+
+
+def capture_screen():
+    """Full-screen screenshot, in pixels"""
+    return _screencapture()
+
+
+def fingerprint(image):
+    """PATCH_GRID x PATCH_GRID gray values of an image, as a list for JSON"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (PATCH_GRID, PATCH_GRID), interpolation=cv2.INTER_AREA)
+    return [int(value) for value in small.flatten()]
+
+
+def same_patch(a, b, tolerance=PATCH_TOLERANCE):
+    """True if two fingerprints show the same thing, allowing for a brightness shift"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    if a.shape != b.shape:
+        return False
+    return float(np.abs((a - a.mean()) - (b - b.mean())).mean()) <= tolerance
+
+
+class DetectionCache:
+    """Detections per window geometry and display scale, verified before reuse
+    
+    lookup() returns a cached detection only if the patch around it, captured
+    again with capture(region), still matches its fingerprint; a mismatch
+    drops the entry. locate() falls back to a full detection and stores it.
+    """
+    
+    def __init__(self, path=CACHE_FILE, capture=capture_region, tolerance=PATCH_TOLERANCE):
+        self.path = Path(path) if path else None
+        self.capture = capture
+        self.tolerance = tolerance
+        self.entries = {}  # "x,y,w,h@scale" -> {name: {'x', 'y', 'confidence', 'patch'}}
+        self._lock = threading.Lock()
+        self._saved = None  # JSON last written, so unchanged entries are not rewritten
+        self.hits = 0
+        self.misses = 0
+        self.mismatches = 0
+        self.load()
+    
+    @staticmethod
+    def key(window, display_scale):
+        return f"{int(window.x)},{int(window.y)},{int(window.width)},{int(window.height)}@{display_scale:g}"
+    
+    @staticmethod
+    def patch_region(x, y):
+        return Region(x - PATCH_POINTS, y - PATCH_POINTS, 2 * PATCH_POINTS, 2 * PATCH_POINTS)
+    
+    def lookup(self, window, display_scale, name):
+        """Cached detection of name in this window if the screen still shows it, else None"""
+        key = self.key(window, display_scale)
+        with self._lock:
+            entry = self.entries.get(key, {}).get(name)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        patch = self.capture(self.patch_region(entry['x'], entry['y']))
+        if patch is None or patch.size == 0 or not same_patch(fingerprint(patch), entry['patch'], self.tolerance):
+            self.mismatches += 1
+            self.forget(window, display_scale, name)
+            return None
+        self.hits += 1
+        return {'x': entry['x'], 'y': entry['y'], 'confidence': entry['confidence'], 'cached': True}
+    
+    def store(self, window, display_scale, name, match, screenshot):
+        """Remember a detection (points) with the patch around it in a full-screen screenshot"""
+        patch, _ = self.patch_region(match['x'], match['y']).crop(screenshot, display_scale)
+        if patch.size == 0:
+            return
+        with self._lock:
+            self.entries.setdefault(self.key(window, display_scale), {})[name] = {
+                'x': match['x'],
+                'y': match['y'],
+                'confidence': float(match.get('confidence', 0.0)),
+                'patch': fingerprint(patch)
+            }
+        self.save()
+    
+    def locate(self, window, display_scale, name, detect):
+        """Verified cached detection, or detect(screenshot) on a new full screenshot, stored if found"""
+        match = self.lookup(window, display_scale, name)
+        if match:
+            return match
+        screenshot = capture_screen()
+        if screenshot is None:
+            return None
+        match = detect(screenshot)
+        if match:
+            self.store(window, display_scale, name, match, screenshot)
+        return match
+    
+    def forget(self, window=None, display_scale=None, name=None):
+        """Drop one detection, every detection of a window, or everything"""
+        with self._lock:
+            if window is None:
+                self.entries = {}
+            elif name is None:
+                self.entries.pop(self.key(window, display_scale), None)
+            else:
+                self.entries.get(self.key(window, display_scale), {}).pop(name, None)
+        self.save()
+    
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+            self._saved = json.dumps(self.entries, indent=2)
+        except (OSError, ValueError) as e:
+            print(f"Could not read detection cache: {e}")
+    
+    def save(self):
+        """Write the entries if they changed, through a temporary file so a crash never leaves half a file"""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.entries, indent=2)
+            if data == self._saved:
+                return
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+                self._saved = data
+            except OSError as e:
+                print(f"Could not save detection cache: {e}")
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    def summary(self):
+        """One line of cache statistics"""
+        return f"detections reused {self.hits}x, re-detected {self.mismatches}x after a change, {self.misses}x not cached"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache stored in CACHE_FILE"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DetectionCache()
+        return _cache
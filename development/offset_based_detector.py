@@ -9,6 +9,8 @@ import subprocess
 import time
 from pathlib import Path
 from coordinate_converter import CoordinateConverter
+from detection_cache import get_cache
+from window_detection import Region
 
 class OffsetBasedDetector:
     def __init__(self):
@@ -29,10 +31,12 @@ class OffsetBasedDetector:
         print("\n🎮 Showing controls...")
         self.show_controls(window)
         
-        # Find and click AirPlay
+        # Find and click AirPlay; a detection of this window is reused while the icon is still there
         print("\n🔍 Finding AirPlay icon...")
-        screenshot = self.capture_screen()
-        airplay_pos = self.find_airplay(screenshot, window)
+        cache = get_cache()
+        airplay_pos = cache.locate(Region(**window), self.converter.scale_factor, 'airplay_icon',
+                                   lambda screenshot: self.find_airplay(screenshot, window))
+        print(f"   {cache.summary()}")
         
         if not airplay_pos:
             print("❌ Could not find AirPlay icon")
@@ -13,6 +13,9 @@ import time
 import json
 from pathlib import Path
 from coordinate_converter import CoordinateConverter
+from detection_cache import get_cache
+from template_bank import get_bank
+from window_detection import MATCH_BUDGET, Region, WindowDetector, match_parallel
 
 class SmartCV2AirPlay:
     def __init__(self, settings=None):
@@ -65,53 +68,50 @@ class SmartCV2AirPlay:
         subprocess.run(["rm", screenshot_path])
         return screenshot
     
-    def find_template_fast(self, screenshot, template_name, threshold=0.7):
+    def search_area(self, screenshot, region):
+        """Grayscale crop of the screenshot inside region (whole screen if None) and its pixel offset"""
+        if region is not None:
+            screenshot, offset = region.crop(screenshot, self.converter.scale_factor)
+        else:
+            offset = (0, 0)
+        return cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY), offset
+    
+    def find_template_fast(self, screenshot, template_name, threshold=0.7, region=None):
         """Fast template matching with optimal scales"""
-        template_path = self.template_dir / template_name
-        if not template_path.exists():
-            return None
-            
-        template = cv2.imread(str(template_path))
-        if template is None:
+        # Use fewer scales for speed; the bank resizes them once per process.
+        # Same unscaled bank as find_all_templates_fast: sizes as captured
+        scales = (0.9, 1.0, 1.1)  # Most common scales
+        bank = get_bank(self.template_dir)
+        levels = bank.pyramid(template_name, scales)
+        if not levels:
             return None
-            
-        # Use fewer scales for speed
-        scales = [0.9, 1.0, 1.1]  # Most common scales
         
-        for scale in scales:
-            width = int(template.shape[1] * scale)
-            height = int(template.shape[0] * scale)
-            resized = cv2.resize(template, (width, height))
-            
-            gray_screen = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            gray_template = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-            
-            result = cv2.matchTemplate(gray_screen, gray_template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        gray_screen, offset = self.search_area(screenshot, region)
+        
+        # Scales run in parallel; the first match over threshold ends the search
+        match = match_parallel([(gray_screen, offset, level) for level in levels],
+                               early_exit=threshold, budget=MATCH_BUDGET)
+        if match and match[0] > threshold:
+            max_val, max_loc, level = match
+            # Calculate center and convert coordinates
+            cv2_x = max_loc[0] + level.width // 2
+            cv2_y = max_loc[1] + level.height // 2
+            screen_x, screen_y = self.converter.cv2_to_screen(cv2_x, cv2_y)
             
-            if max_val > threshold:
-                # Calculate center and convert coordinates
-                cv2_x = max_loc[0] + width // 2
-                cv2_y = max_loc[1] + height // 2
-                screen_x, screen_y = self.converter.cv2_to_screen(cv2_x, cv2_y)
-                
-                return {'x': screen_x, 'y': screen_y, 'confidence': max_val}
+            return {'x': screen_x, 'y': screen_y, 'confidence': max_val}
         
         return None
     
-    def find_all_templates_fast(self, screenshot, template_name, threshold=0.7):
+    def find_all_templates_fast(self, screenshot, template_name, threshold=0.7, region=None):
         """Find all instances of a template"""
-        template_path = self.template_dir / template_name
-        if not template_path.exists():
-            return []
-            
-        template = cv2.imread(str(template_path))
-        if template is None:
+        gray_template = get_bank(self.template_dir).gray(template_name)
+        if gray_template is None:
             return []
             
         # Single scale for speed
-        gray_screen = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        gray_screen, (offset_x, offset_y) = self.search_area(screenshot, region)
+        if gray_template.shape[0] > gray_screen.shape[0] or gray_template.shape[1] > gray_screen.shape[1]:
+            return []
         
         result = cv2.matchTemplate(gray_screen, gray_template, cv2.TM_CCOEFF_NORMED)
         
@@ -120,8 +120,8 @@ class SmartCV2AirPlay:
         matches = []
         
         for pt in zip(*locations[::-1]):
-            cv2_x = pt[0] + template.shape[1] // 2
-            cv2_y = pt[1] + template.shape[0] // 2
+            cv2_x = offset_x + pt[0] + gray_template.shape[1] // 2
+            cv2_y = offset_y + pt[1] + gray_template.shape[0] // 2
             screen_x, screen_y = self.converter.cv2_to_screen(cv2_x, cv2_y)
             
             matches.append({
@@ -148,56 +148,75 @@ class SmartCV2AirPlay:
             
         self.show_controls_fast(window)
         
-        # Step 3: Detect AirPlay icon
-        screenshot = self.capture_screen()
-        airplay = self.find_template_fast(screenshot, 'airplay_icon.png')
+        # Matching only looks inside the window's control bar and popup
+        window_region = Region(**window)
+        scale = self.converter.scale_factor
+        regions = WindowDetector(window_region, scale, self.template_dir)
+        control_bar = regions.control_bar()
+        
+        # Detections of this window are reused while the screen still shows them
+        cache = get_cache()
         
+        # Step 3: Detect AirPlay icon
+        airplay = cache.lookup(window_region, scale, 'airplay_icon')
         if not airplay:
-            print("AirPlay icon not found, retrying...")
-            time.sleep(0.3)
-            self.show_controls_fast(window)
             screenshot = self.capture_screen()
-            airplay = self.find_template_fast(screenshot, 'airplay_icon.png', threshold=0.6)
+            airplay = self.find_template_fast(screenshot, 'airplay_icon.png', region=control_bar)
         
-        if not airplay:
-            print("Failed to find AirPlay icon")
-            return False
+            if not airplay:
+                print("AirPlay icon not found, retrying...")
+                time.sleep(0.3)
+                self.show_controls_fast(window)
+                screenshot = self.capture_screen()
+                airplay = self.find_template_fast(screenshot, 'airplay_icon.png', threshold=0.6, region=control_bar)
+        
+            if not airplay:
+                print("Failed to find AirPlay icon")
+                return False
+            cache.store(window_region, scale, 'airplay_icon', airplay, screenshot)
         
         # Step 4: Click AirPlay
         subprocess.run(['cliclick', f"c:{airplay['x']},{airplay['y']}"])
         time.sleep(0.4)
         
         # Step 5: Find and click Apple TV checkbox
-        menu_screenshot = self.capture_screen()
+        appletv_coords = cache.lookup(window_region, scale, 'apple_tv_checkbox')
+        if not appletv_coords:
+            menu_screenshot = self.capture_screen()
+            popup = regions.popup((airplay['x'], airplay['y']))
+            detected = True
         
-        # Method 1: Direct checkbox detection
-        checkbox = self.find_template_fast(menu_screenshot, 'checkbox_unchecked.png', threshold=0.6)
+            # Method 1: Direct checkbox detection
+            checkbox = self.find_template_fast(menu_screenshot, 'checkbox_unchecked.png', threshold=0.6, region=popup)
         
-        if checkbox:
-            appletv_coords = checkbox
-        else:
-            # Method 2: Find Apple TV text and calculate checkbox position
-            appletv_text = self.find_template_fast(menu_screenshot, 'apple_tv.png', threshold=0.6)
-            
-            if appletv_text:
-                # Checkbox is typically 50 pixels to the left
-                appletv_coords = {
-                    'x': appletv_text['x'] - 50,
-                    'y': appletv_text['y']
-                }
+            if checkbox:
+                appletv_coords = checkbox
             else:
-                # Method 3: Find all checkboxes and pick the right one
-                checkboxes = self.find_all_templates_fast(menu_screenshot, 'checkbox_unchecked.png', threshold=0.5)
-                
-                if checkboxes:
-                    # Usually the first or second checkbox
-                    appletv_coords = checkboxes[0] if len(checkboxes) == 1 else checkboxes[1]
-                else:
-                    # Last resort: offset from AirPlay
+                # Method 2: Find Apple TV text and calculate checkbox position
+                appletv_text = self.find_template_fast(menu_screenshot, 'apple_tv.png', threshold=0.6, region=popup)
+            
+                if appletv_text:
+                    # Checkbox is typically 50 pixels to the left
                     appletv_coords = {
-                        'x': airplay['x'] + 50,
-                        'y': airplay['y'] + 70
+                        'x': appletv_text['x'] - 50,
+                        'y': appletv_text['y']
                     }
+                else:
+                    # Method 3: Find all checkboxes and pick the right one
+                    checkboxes = self.find_all_templates_fast(menu_screenshot, 'checkbox_unchecked.png', threshold=0.5, region=popup)
+                
+                    if checkboxes:
+                        # Usually the first or second checkbox
+                        appletv_coords = checkboxes[0] if len(checkboxes) == 1 else checkboxes[1]
+                    else:
+                        # Last resort: offset from AirPlay, not worth caching
+                        appletv_coords = {
+                            'x': airplay['x'] + 50,
+                            'y': airplay['y'] + 70
+                        }
+                        detected = False
+            if detected:
+                cache.store(window_region, scale, 'apple_tv_checkbox', appletv_coords, menu_screenshot)
         
         # Click Apple TV
         subprocess.run(['cliclick', f"c:{appletv_coords['x']},{appletv_coords['y']}"])
@@ -206,7 +225,7 @@ class SmartCV2AirPlay:
         self.save_detected_coordinates(airplay, appletv_coords)
         
         elapsed = time.time() - start_time
-        print(f"✅ AirPlay enabled in {elapsed:.2f}s (coordinates updated)")
+        print(f"✅ AirPlay enabled in {elapsed:.2f}s (coordinates updated, {cache.summary()})")
         
         return True
     
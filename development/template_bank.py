@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Template Bank - AirPlay templates loaded once per process
+Every template in a directory is read once, with its grayscale version,
+and each scale pyramid a detector asks for is built once, so detections
+stop re-reading and re-resizing the same PNGs. Banks are shared per
+templates directory and display scale factor and reload themselves when
+a template file is added, removed or replaced.
+"""
+
+import fnmatch
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+# The templates were captured on a Retina (2x) display
+CAPTURE_SCALE = 2.0
+
+# Seconds between checks of the templates directory for changes
+CHECK_INTERVAL = 1.0
+
+
+class ScaledTemplate:
+    """One template at one pyramid scale, in color and grayscale"""
+    
+    def __init__(self, name, scale, image, gray):
+        self.name = name
+        self.scale = scale  # as asked for; display scale already applied
+        self.image = image
+        self.gray = gray
+        self.height, self.width = gray.shape[:2]
+
+
+class TemplateBank:
+    """Templates of one directory for one display scale factor
+    
+    display_scale, when known, resizes every pyramid level by
+    display_scale / CAPTURE_SCALE so Retina captures also match on a 1x
+    screen; None leaves the templates at their captured size.
+    """
+    
+    def __init__(self, template_dir=TEMPLATE_DIR, display_scale=None):
+        self.template_dir = Path(template_dir)
+        self.display_scale = display_scale
+        self.images = {}  # file name -> BGR image
+        self.grays = {}  # file name -> grayscale image
+        self._pyramids = {}  # (file name, scales) -> [ScaledTemplate]
+        self._lock = threading.Lock()
+        self.signature = None
+        self.checked_at = 0.0
+        self.loads = 0
+        self.reload()
+    
+    @property
+    def factor(self):
+        """Size of a scale-1.0 pyramid level relative to the captured template"""
+        if self.display_scale is None:
+            return 1.0
+        return self.display_scale / CAPTURE_SCALE
+    
+    def _directory_signature(self):
+        files = []
+        for path in self.template_dir.glob("*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(files))
+    
+    def stale(self):
+        """True if template files changed since they were loaded (checked every CHECK_INTERVAL)"""
+        now = time.monotonic()
+        if now - self.checked_at < CHECK_INTERVAL:
+            return False
+        self.checked_at = now
+        return self._directory_signature() != self.signature
+    
+    def reload(self):
+        """Read every template again and drop the built pyramids"""
+        images, grays = {}, {}
+        signature = self._directory_signature()
+        for name, _, _ in signature:
+            image = cv2.imread(str(self.template_dir / name))
+            if image is None:
+                print(f"Could not load template: {name}")
+                continue
+            images[name] = image
+            grays[name] = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        with self._lock:
+            self.images = images
+            self.grays = grays
+            self._pyramids = {}
+            self.signature = signature
+            self.checked_at = time.monotonic()
+            self.loads += 1
+    
+    def names(self, pattern="*.png"):
+        """Loaded template file names matching a glob pattern"""
+        return sorted(name for name in self.images if fnmatch.fnmatch(name, pattern))
+    
+    def image(self, name):
+        return self.images.get(name)
+    
+    def gray(self, name):
+        return self.grays.get(name)
+    
+    def pyramid(self, name, scales=(1.0,)):
+        """ScaledTemplate per scale for a template, built on first use; [] if unknown"""
+        key = (name, tuple(scales))
+        with self._lock:
+            levels = self._pyramids.get(key)
+            if levels is not None:
+                return levels
+            image = self.images.get(name)
+            if image is None:
+                return []
+            levels = []
+            for scale in scales:
+                size = scale * self.factor
+                width = int(image.shape[1] * size)
+                height = int(image.shape[0] * size)
+                if width < 1 or height < 1:
+                    continue
+                if (width, height) == (image.shape[1], image.shape[0]):
+                    scaled = image
+                    gray = self.grays[name]
+                else:
+                    scaled = cv2.resize(image, (width, height))
+                    gray = cv2.cvtColor(scaled, cv2.COLOR_BGR2GRAY)
+                levels.append(ScaledTemplate(name, scale, scaled, gray))
+            self._pyramids[key] = levels
+            return levels
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_bank(template_dir=TEMPLATE_DIR, display_scale=None):
+    """Process-wide bank for a directory and display scale, reloaded if the directory changed"""
+    key = (str(Path(template_dir).resolve()), display_scale)
+    with _banks_lock:
+        bank = _banks.get(key)
+        if bank is None:
+            bank = _banks[key] = TemplateBank(template_dir, display_scale)
+            return bank
+    if bank.stale():
+        bank.reload()
+    return bank
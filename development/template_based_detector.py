@@ -9,12 +9,16 @@ import subprocess
 import os
 import time
 from pathlib import Path
+from template_bank import get_bank
+from window_detection import MATCH_BUDGET, WindowDetector, match_coarse_to_fine, match_parallel, quicktime_window, screen_scale
 
 class TemplateBasedDetector:
-    def __init__(self):
+    def __init__(self, coarse=True):
         self.template_dir = Path(__file__).parent / "templates"
         self.template_dir.mkdir(exist_ok=True)
-        
+        self.window = None  # WindowDetector for the QuickTime window, once found
+        self.coarse = coarse  # coarse-to-fine search instead of every scale at full resolution
+    
     def capture_screen(self):
         """Capture current screen"""
         screenshot_path = "/tmp/qt_screenshot.png"
@@ -23,20 +27,40 @@ class TemplateBasedDetector:
         os.remove(screenshot_path)
         return screenshot
     
+    def find_window(self):
+        """Look up QuickTime's window once; None keeps searching the whole screen"""
+        if self.window is None:
+            window = quicktime_window()
+            if window:
+                self.window = WindowDetector(window, screen_scale(), self.template_dir, self.coarse)
+                print(f"QuickTime window: {window}")
+        return self.window
+    
+    def control_bar(self, screenshot):
+        window = self.find_window()
+        return window.control_bar() if window else None
+    
+    def popup(self, screenshot, airplay):
+        """AirPlay menu region around a match in screenshot pixels"""
+        window = self.find_window()
+        if window is None:
+            return None
+        return window.popup((airplay['x'] / window.display_scale, airplay['y'] / window.display_scale))
+    
     def find_template(self, template_path, screenshot=None, threshold=0.8):
         """Find template in screenshot using template matching"""
         if screenshot is None:
             screenshot = self.capture_screen()
-            
-        # Load template
-        template = cv2.imread(str(template_path))
-        if template is None:
+        
+        # Template from the shared bank, already in grayscale
+        template_path = Path(template_path)
+        template_gray = get_bank(template_path.parent).gray(template_path.name)
+        if template_gray is None:
             print(f"Could not load template: {template_path}")
             return None
-            
+        
         # Convert to grayscale for better matching
         screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
         
         # Get template dimensions
         h, w = template_gray.shape
@@ -59,48 +83,41 @@ class TemplateBasedDetector:
         
         return None
     
-    def find_with_multiple_scales(self, template_path, screenshot=None, scales=[0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.5, 2.0]):
-        """Try finding template at different scales"""
+    def find_with_multiple_scales(self, template_path, screenshot=None, scales=[0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.5, 2.0], region=None):
+        """Try finding template at different scales, only inside region (a window_detection.Region) if given"""
         if screenshot is None:
             screenshot = self.capture_screen()
-            
-        template = cv2.imread(str(template_path))
-        if template is None:
+        
+        # Scaled grayscale templates are built once per process
+        template_path = Path(template_path)
+        levels = get_bank(template_path.parent).pyramid(template_path.name, scales)
+        if not levels:
             print(f"Could not load template: {template_path}")
             return None
-            
-        best_match = None
-        best_confidence = 0
-        
-        for scale in scales:
-            # Resize template
-            width = int(template.shape[1] * scale)
-            height = int(template.shape[0] * scale)
-            resized = cv2.resize(template, (width, height))
-            
-            # Convert to grayscale
-            screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            template_gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-            
-            # Template matching
-            result = cv2.matchTemplate(screenshot_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            if max_val > best_confidence:
-                best_confidence = max_val
-                best_match = {
-                    'x': max_loc[0] + width // 2,
-                    'y': max_loc[1] + height // 2,
-                    'confidence': max_val,
-                    'scale': scale,
-                    'top_left': max_loc,
-                    'bottom_right': (max_loc[0] + width, max_loc[1] + height)
-                }
-        
-        if best_match and best_match['confidence'] >= 0.5:  # Lower threshold
-            return best_match
         
-        return None
+        offset_x, offset_y = 0, 0
+        if region is not None:
+            screenshot, (offset_x, offset_y) = region.crop(screenshot, self.window.display_scale)
+        screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        
+        # Template matching coarse to fine, or every scale on a thread pool
+        if self.coarse:
+            match = match_coarse_to_fine(screenshot_gray, levels)
+        else:
+            match = match_parallel([(screenshot_gray, (0, 0), level) for level in levels], budget=MATCH_BUDGET)
+        if match is None or match[0] < 0.5:  # Lower threshold
+            return None
+        
+        max_val, max_loc, level = match
+        max_loc = (max_loc[0] + offset_x, max_loc[1] + offset_y)
+        return {
+            'x': max_loc[0] + level.width // 2,
+            'y': max_loc[1] + level.height // 2,
+            'confidence': max_val,
+            'scale': level.scale,
+            'top_left': max_loc,
+            'bottom_right': (max_loc[0] + level.width, max_loc[1] + level.height)
+        }
     
     def detect_airplay_setup(self):
         """Detect both AirPlay icon and Apple TV checkbox using templates"""
@@ -113,11 +130,11 @@ class TemplateBasedDetector:
         if not airplay_template.exists():
             print(f"Please save AirPlay icon screenshot as: {airplay_template}")
             return None
-            
+        
         # Step 1: Find AirPlay icon
         print("Looking for AirPlay icon...")
         screenshot = self.capture_screen()
-        airplay = self.find_with_multiple_scales(airplay_template, screenshot)
+        airplay = self.find_with_multiple_scales(airplay_template, screenshot, region=self.control_bar(screenshot))
         
         if airplay:
             print(f"Found AirPlay icon at ({airplay['x']}, {airplay['y']}) with {airplay['confidence']:.1%} confidence")
@@ -131,7 +148,8 @@ class TemplateBasedDetector:
             if apple_tv_template.exists():
                 print("Looking for Apple TV checkbox...")
                 menu_screenshot = self.capture_screen()
-                apple_tv = self.find_with_multiple_scales(apple_tv_template, menu_screenshot)
+                apple_tv = self.find_with_multiple_scales(apple_tv_template, menu_screenshot,
+                                                          region=self.popup(menu_screenshot, airplay))
                 
                 if apple_tv:
                     print(f"Found Apple TV at ({apple_tv['x']}, {apple_tv['y']}) with {apple_tv['confidence']:.1%} confidence")
@@ -145,12 +163,12 @@ class TemplateBasedDetector:
                     }
             else:
                 print(f"Please save Apple TV checkbox screenshot as: {apple_tv_template}")
-                
+            
             # Close menu
             subprocess.run(['cliclick', 'c:100,100'])
         else:
             print("Could not find AirPlay icon")
-            
+        
         return results
     
     def visualize_detection(self, output_path="detection_visual.png"):
@@ -162,7 +180,7 @@ class TemplateBasedDetector:
         apple_tv_template = self.template_dir / "apple_tv_checkbox.png"
         
         if airplay_template.exists():
-            airplay = self.find_with_multiple_scales(airplay_template, screenshot)
+            airplay = self.find_with_multiple_scales(airplay_template, screenshot, region=self.control_bar(screenshot))
             if airplay:
                 # Draw rectangle around AirPlay icon
                 cv2.rectangle(screenshot, airplay['top_left'], airplay['bottom_right'], (0, 255, 0), 2)
@@ -178,7 +196,8 @@ class TemplateBasedDetector:
                 menu_screenshot = self.capture_screen()
                 
                 if apple_tv_template.exists():
-                    apple_tv = self.find_with_multiple_scales(apple_tv_template, menu_screenshot)
+                    apple_tv = self.find_with_multiple_scales(apple_tv_template, menu_screenshot,
+                                                              region=self.popup(menu_screenshot, airplay))
                     if apple_tv:
                         # Draw rectangle around Apple TV
                         cv2.rectangle(menu_screenshot, apple_tv['top_left'], apple_tv['bottom_right'], (255, 0, 0), 2)
@@ -221,7 +240,7 @@ def main():
     
     elif choice == "2":
         detector.visualize_detection()
-        
+    
     elif choice == "3":
         print("\nTesting detection accuracy...")
         for i in range(3):
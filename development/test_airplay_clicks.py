@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the AirPlay button cache and click timings
+Feeds click_airplay_button replies in clickAirPlayButton's format and
+checks the per-layout cache, the timing bookkeeping and the suggested
+menu wait. Pass --real on macOS, with a track open in QuickTime, to click
+the AirPlay button a few times and print scan, cached and menu timings
+(press Escape in between to close the menu).
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from airplay_clicks import AirPlayButtonCache, AirPlayTimings, click_airplay_button
+from test_support import check
+
+
+class ScriptedCall:
+    """Replies like clickAirPlayButton for one window layout"""
+    
+    def __init__(self, layout, index, menu_ms):
+        self.layout = layout
+        self.index = index
+        self.menu_ms = menu_ms
+        self.tables = []
+    
+    def __call__(self, handler, table, menu_timeout, timeout=None):
+        self.tables.append(table)
+        lookup = 'hit' if f"{self.layout}|{self.index}" in table.split('\n') else 'scan'
+        stdout = f"{self.layout}|{self.index}|512,40|{lookup}|{self.menu_ms}|AirPlay | 외장\n"
+        return subprocess.CompletedProcess(handler, 0, stdout, '')
+
+
+def main():
+    ok = True
+    cache = AirPlayButtonCache()
+    timings = AirPlayTimings()
+    audio = ScriptedCall("640,190,9", 4, 180)
+    
+    click = click_airplay_button(cache, 1.0, call=audio)
+    timings.record(click)
+    ok &= check(f"first click scans ({click.describe()})", click.lookup == 'scan' and (click.x, click.y) == (512, 40))
+    ok &= check("description with '|' kept whole", cache.entries["640,190,9"] == [4, "AirPlay | 외장"])
+    
+    click = click_airplay_button(cache, 1.0, call=audio)
+    timings.record(click)
+    ok &= check("same layout uses the remembered index", click.lookup == 'hit')
+    
+    video = ScriptedCall("1280,760,11", 6, 240)
+    timings.record(click_airplay_button(cache, 1.0, call=video))
+    timings.record(click_airplay_button(cache, 1.0, call=audio))
+    ok &= check("layouts are remembered side by side", len(cache.entries) == 2 and timings.samples[-1][0] == 'hit')
+    
+    missed = ScriptedCall("640,190,9", 4, -1)
+    click = click_airplay_button(cache, 0.5, call=missed)
+    timings.record(click)
+    ok &= check("menu not seen is recorded as such", click.menu_ms is None)
+    
+    ok &= check(f"suggested wait {timings.suggested_menu_wait()} ms", timings.suggested_menu_wait() == 500)
+    restored = AirPlayTimings(timings.to_settings())
+    ok &= check(f"timings survive the settings file ({restored.summary()})",
+                restored.summary() == timings.summary() and "menu not seen 1x" in restored.summary())
+    ok &= check("no suggestion without data", AirPlayTimings().suggested_menu_wait() is None)
+    
+    if '--real' in sys.argv:
+        print("\n🍎 Clicking QuickTime's AirPlay button")
+        cache = AirPlayButtonCache()
+        for _ in range(3):
+            click = click_airplay_button(cache, 2.0)
+            print(f"   {click.describe() if click else 'AirPlay button not found'}")
+            time.sleep(2)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
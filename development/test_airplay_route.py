@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the AirPlay route cache
+Walks AirPlayRoute through a session on a virtual clock: the clicks run
+once, are skipped while the player stays up and the route is seen or
+assumed, and run again after a relaunch, a lost route or a long stretch
+with no confirmation. Decisions made on a player-thread snapshot are
+merged back, unless AirPlay was switched off meanwhile. Pass --real on
+macOS, with a track routed to
+AirPlay in QuickTime, to see what the accessibility check reports.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from airplay_route import AirPlayRoute, ROUTE_MARKERS, ROUTE_ON, ROUTE_OFF, ROUTE_UNKNOWN
+from player_backend import QuickTimeBackend, SimulatedBackend, VirtualClock
+from test_support import check
+
+
+def main():
+    clock = VirtualClock()
+    backend = SimulatedBackend(clock=clock.time, sleep=clock.sleep)
+    route = AirPlayRoute(max_age=600, clock=clock.time)
+    verified = []
+    
+    def verify(state):
+        def look():
+            verified.append(state)
+            return state
+        return look
+    
+    ok = True
+    backend.open("/Music/a.m4a")
+    ok &= check("first track needs the clicks", route.needs_enable(backend.generation, verify(ROUTE_ON)))
+    ok &= check("nothing to verify before a route exists", not verified)
+    route.enabled(backend.generation)
+    
+    # Warm player: the next track reuses the route
+    backend.close(keep_running=True)
+    backend.open("/Music/b.m4a")
+    ok &= check("route seen on: clicks skipped", not route.needs_enable(backend.generation, verify(ROUTE_ON)))
+    clock.sleep(300)
+    ok &= check("check cannot tell: route assumed", not route.needs_enable(backend.generation, verify(ROUTE_UNKNOWN)))
+    clock.sleep(700)
+    ok &= check("assumption expires without confirmation", route.needs_enable(backend.generation, verify(ROUTE_UNKNOWN)))
+    route.enabled(backend.generation)
+    
+    ok &= check("route seen off: clicks run", route.needs_enable(backend.generation, verify(ROUTE_OFF)))
+    route.enabled(backend.generation)
+    
+    # Quitting after the last document (or a watchdog kill) starts a new player
+    checks = len(verified)
+    backend.close()
+    backend.open("/Music/c.m4a")
+    ok &= check("relaunched player needs the clicks", route.needs_enable(backend.generation, verify(ROUTE_ON)))
+    ok &= check("relaunch is not verified, just redone", len(verified) == checks)
+    route.enabled(backend.generation)
+    backend.kill()
+    ok &= check("killed player needs the clicks", route.needs_enable(backend.generation))
+    ok &= check(f"summary: {route.summary()}", (route.enables, route.skips, route.losses) == (4, 2, 1))
+    
+    # Decided on a snapshot (player thread), applied on merge (window thread)
+    route = AirPlayRoute(max_age=600, clock=clock.time)
+    route.enabled(backend.generation)
+    snapshot = route.snapshot()
+    ok &= check("snapshot decides without touching the route",
+                not snapshot.needs_enable(backend.generation, verify(ROUTE_ON)) and route.skips == 0)
+    ok &= check("merge takes the decision back", route.merge(snapshot) and route.skips == 1)
+    
+    snapshot = route.snapshot()
+    ok &= check("route seen off on the snapshot", snapshot.needs_enable(backend.generation, verify(ROUTE_OFF)))
+    ok &= check("route stays set up until the merge", route.active)
+    ok &= check("merged loss forgets the route", route.merge(snapshot) and not route.active and route.losses == 1)
+    route.enabled(backend.generation)
+    
+    # AirPlay switched off while the clicks ran
+    snapshot = route.snapshot()
+    snapshot.needs_enable(backend.generation, verify(ROUTE_OFF))
+    route.forget()
+    ok &= check("a snapshot older than forget() is not merged", not route.merge(snapshot) and not route.active)
+    ok &= check("its counts still are", route.losses == 2)
+    
+    if '--real' in sys.argv:
+        print(f"\n🍎 QuickTime reports the route as {QuickTimeBackend().route_state(ROUTE_MARKERS)!r}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the persistent AppleScript bridge protocol
+Uses the fake bridge, so it runs on Linux as well as macOS.
+Pass --real on macOS to also time the osascript bridge against one
+osascript process per command.
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from applescript_bridge import AppleScriptBridge, fake_bridge_command
+from test_support import check
+
+
+def test_protocol():
+    """Replies, errors, crash respawn and timeouts"""
+    print("\n🔌 Protocol (fake bridge)")
+    bridge = AppleScriptBridge(fake_bridge_command(responses={
+        'status': 'playing',
+        'broken': '!error Expected end of line',
+        'crash': '!crash',
+        'wedge': '!hang',
+    }), timeout=2)
+    
+    ok = True
+    ok &= check("reply text", bridge.run('get status').stdout.strip() == 'playing')
+    result = bridge.run('broken script')
+    ok &= check("script error -> stderr", result.returncode == 1 and 'Expected' in result.stderr)
+    ok &= check("unicode round trip", bridge.run('open "Ünïcödé 한글.mp3"').returncode == 0)
+    
+    try:
+        bridge.run('crash')
+        ok &= check("crash raises", False)
+    except EOFError:
+        ok &= check("crash raises", True)
+    ok &= check("respawn after crash", bridge.run('status').stdout.strip() == 'playing')
+    
+    try:
+        bridge.run('wedge', timeout=0.3)
+        ok &= check("hang times out", False)
+    except subprocess.TimeoutExpired:
+        ok &= check("hang times out", True)
+    ok &= check("respawn after hang", bridge.run('status').stdout.strip() == 'playing')
+    print(f"   spawns: {bridge.spawn_count}, requests: {bridge.request_count}")
+    bridge.close()
+    return ok
+
+
+def time_calls(run, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        run()
+    return (time.perf_counter() - started) / count * 1000
+
+
+def test_latency(latency_ms=0, count=200):
+    """Round-trip cost of the bridge against spawning a process per command"""
+    print(f"\n⏱  Latency (fake bridge, {latency_ms} ms simulated work)")
+    bridge = AppleScriptBridge(fake_bridge_command(latency_ms=latency_ms))
+    bridge.run('warm up')
+    bridge_ms = time_calls(lambda: bridge.run('status'), count)
+    bridge.close()
+    
+    # One fresh interpreter per command, like one osascript per command
+    command = fake_bridge_command(latency_ms=latency_ms)
+    spawn_ms = time_calls(
+        lambda: subprocess.run(command, input='{"id": 1, "script": "status"}\n',
+                               capture_output=True, text=True),
+        max(1, count // 10)
+    )
+    print(f"   bridge: {bridge_ms:.2f} ms/command")
+    print(f"   spawn:  {spawn_ms:.2f} ms/command")
+    return True
+
+
+def test_real(count=20):
+    """macOS only: osascript per command vs the JXA bridge"""
+    print("\n🍎 Real osascript")
+    script = 'tell application "System Events" to return name of current user'
+    spawn_ms = time_calls(
+        lambda: subprocess.run(['osascript', '-e', script], capture_output=True, text=True),
+        count
+    )
+    bridge = AppleScriptBridge()
+    bridge.run(script)
+    bridge_ms = time_calls(lambda: bridge.run(script), count)
+    bridge.close()
+    print(f"   osascript per command: {spawn_ms:.1f} ms")
+    print(f"   bridge:                {bridge_ms:.1f} ms")
+    return True
+
+
+if __name__ == "__main__":
+    ok = test_protocol()
+    test_latency(0)
+    test_latency(5)
+    if '--real' in sys.argv:
+        test_real()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test the precompiled QuickTime script library
+Checks that file paths reach the library as handler arguments, unchanged
+and never as script source, using hostile file names. Pass --real on
+macOS to run the names through AppleScript itself and to time a compiled
+handler call against compiling a script per track.
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from applescript_bridge import AppleScriptBridge, fake_bridge_command
+from player_backend import QuickTimeBackend
+from quicktime_player import QUICKTIME_LIBRARY
+from test_support import check
+
+
+HOSTILE_NAMES = [
+    '/Music/Say "Hello".m4a',
+    '/Music/back\\slash\\.m4a',
+    '/Music/"; do shell script "touch /tmp/pwned" --.m4a',
+    '/Music/end tell\nquit\n.m4a',
+    "/Music/It's a 'single' quote.m4a",
+    '/Music/pipe | and & ampersand $HOME `ls`.m4a',
+    '/Music/Ünïcödé 한글 🎵.m4a',
+    '/Music/' + 'long name ' * 40 + '.m4a',
+]
+
+# A stand-in library for the real-osascript checks; it does not touch QuickTime
+ECHO_LIBRARY = '''
+on echoPath(posixPath)
+    set trackFile to POSIX file posixPath
+    return POSIX path of trackFile
+end echoPath
+'''
+
+
+def test_arguments():
+    """Paths travel as arguments, byte for byte (fake bridge)"""
+    print("\n🧨 Hostile file names (fake bridge)")
+    bridge = AppleScriptBridge(fake_bridge_command(responses={'.': '!args'}))
+    sent = []
+    
+    def call(handler, *args, timeout=None):
+        sent.append((handler, args))
+        return bridge.call(QUICKTIME_LIBRARY, handler, args, timeout)
+    
+    backend = QuickTimeBackend(call=call)
+    ok = True
+    for path in HOSTILE_NAMES:
+        echoed = json.loads(backend.call('openTrack', path, True).stdout)
+        ok &= check(f"round trip {path[:40]!r}", echoed == [path, True])
+    
+    backend.preload(HOSTILE_NAMES[0], 'Say "Hello".m4a')
+    backend.switch('Say "Hello".m4a')
+    backend.status('Say "Hello".m4a')
+    ok &= check("preload/switch/status pass names as arguments",
+                [handler for handler, _ in sent[-3:]] == ['preloadTrack', 'switchTo', 'playerStatus'])
+    ok &= check("no path appears in the library source",
+                not any(name in QUICKTIME_LIBRARY for name in HOSTILE_NAMES))
+    bridge.close()
+    return ok
+
+
+def time_calls(run, values):
+    started = time.perf_counter()
+    for value in values:
+        run(value)
+    return (time.perf_counter() - started) / len(values) * 1000
+
+
+def interpolated(path):
+    """The old way: the path spliced into fresh source"""
+    return f'''
+    set trackFile to POSIX file "{path}"
+    return POSIX path of trackFile
+    '''
+
+
+def test_real(count=50):
+    """macOS only: hostile names through AppleScript, and compile savings"""
+    print("\n🍎 Real osascript")
+    bridge = AppleScriptBridge()
+    ok = True
+    for path in HOSTILE_NAMES:
+        result = bridge.call(ECHO_LIBRARY, 'echoPath', [path])
+        ok &= check(f"AppleScript sees {path[:40]!r}", result.stdout.rstrip('\n') == path)
+    
+    # Distinct paths, as in a playlist: every interpolated script is new source
+    paths = [f"/Music/track {i:04d}.m4a" for i in range(count)]
+    bridge.call(ECHO_LIBRARY, 'echoPath', ['/warm/up'])
+    library_ms = time_calls(lambda p: bridge.call(ECHO_LIBRARY, 'echoPath', [p]), paths)
+    source_ms = time_calls(lambda p: bridge.run(interpolated(p)), [p + ' (new)' for p in paths])
+    bridge.close()
+    
+    spawn_ms = time_calls(
+        lambda p: subprocess.run(['osascript', '-e', interpolated(p)], capture_output=True),
+        paths[:10]
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        compiled = Path(folder) / 'echo.scpt'
+        runner = ECHO_LIBRARY + '\non run argv\n    return echoPath(item 1 of argv)\nend run\n'
+        subprocess.run(['osacompile', '-o', str(compiled), '-e', runner], check=True)
+        scpt_ms = time_calls(
+            lambda p: subprocess.run(['osascript', str(compiled), p], capture_output=True),
+            paths[:10]
+        )
+    
+    print(f"   bridge, compiled handler:   {library_ms:.1f} ms/call")
+    print(f"   bridge, compile per call:   {source_ms:.1f} ms/call")
+    print(f"   osacompiled .scpt + argv:   {scpt_ms:.1f} ms/call")
+    print(f"   osascript -e per call:      {spawn_ms:.1f} ms/call")
+    return ok
+
+
+if __name__ == "__main__":
+    ok = test_arguments()
+    if '--real' in sys.argv:
+        ok &= test_real()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the detection cache
+Stores a detection made on a synthetic Retina screenshot and checks that
+it is reused while the patch around it looks the same (also under a
+brightness change), dropped when the icon moves, and kept apart per window
+geometry and display scale. Patches are cut from the synthetic screens
+instead of captured, so it needs OpenCV but not macOS.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from detection_cache import DetectionCache
+from window_detection import Region
+from test_support import check
+
+
+SCALE = 2.0
+WINDOW = Region(0, 76, 1440, 809)
+ICON = (840, 713)  # points
+
+
+def screen_with_icon(at, brightness=0):
+    """Noisy 2880x1800 screen with a bright ring (an AirPlay-ish icon) at a point"""
+    rng = np.random.default_rng(1)
+    screen = rng.integers(20, 60, size=(1800, 2880, 3)).astype(np.int16)
+    x, y = int(at[0] * SCALE), int(at[1] * SCALE)
+    yy, xx = np.ogrid[-20:20, -20:20]
+    ring = (np.abs(np.sqrt(xx ** 2 + yy ** 2) - 14) < 3)
+    screen[y - 20:y + 20, x - 20:x + 20][ring] = 230
+    return np.clip(screen + brightness, 0, 255).astype(np.uint8)
+
+
+class FakeScreen:
+    """capture() for the cache: cuts regions out of the current synthetic screen"""
+    
+    def __init__(self, screen):
+        self.screen = screen
+        self.captures = 0
+    
+    def __call__(self, region):
+        self.captures += 1
+        patch, _ = region.crop(self.screen, SCALE)
+        return patch
+
+
+def main():
+    ok = True
+    path = Path(tempfile.mkdtemp()) / "cache.json"
+    screen = FakeScreen(screen_with_icon(ICON))
+    cache = DetectionCache(path, capture=screen)
+    
+    ok &= check("nothing cached at first", cache.lookup(WINDOW, SCALE, 'airplay_icon') is None)
+    cache.store(WINDOW, SCALE, 'airplay_icon', {'x': ICON[0], 'y': ICON[1], 'confidence': 0.93}, screen.screen)
+    
+    started = time.perf_counter()
+    hit = cache.lookup(WINDOW, SCALE, 'airplay_icon')
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    ok &= check(f"unchanged screen reuses the detection ({elapsed_ms:.2f} ms)",
+                hit is not None and hit['cached'] and (hit['x'], hit['y']) == ICON)
+    
+    screen.screen = screen_with_icon(ICON, brightness=25)
+    ok &= check("brighter screen still matches", cache.lookup(WINDOW, SCALE, 'airplay_icon') is not None)
+    
+    ok &= check("other window geometry is a miss", cache.lookup(Region(0, 76, 1200, 700), SCALE, 'airplay_icon') is None)
+    ok &= check("other display scale is a miss", cache.lookup(WINDOW, 1.0, 'airplay_icon') is None)
+    
+    reloaded = DetectionCache(path, capture=screen)
+    ok &= check("entries survive a restart", reloaded.lookup(WINDOW, SCALE, 'airplay_icon') is not None)
+    
+    written = path.stat().st_mtime_ns
+    time.sleep(0.01)
+    cache.forget(WINDOW, SCALE, 'not_cached')
+    ok &= check("unchanged entries are not rewritten", path.stat().st_mtime_ns == written)
+    ok &= check("no temporary files left behind", [p.name for p in path.parent.iterdir()] == [path.name])
+    
+    screen.screen = screen_with_icon((ICON[0] + 60, ICON[1]))
+    ok &= check("moved icon is a mismatch", cache.lookup(WINDOW, SCALE, 'airplay_icon') is None and cache.mismatches == 1)
+    ok &= check("mismatched entry is dropped", 'airplay_icon' not in cache.entries[cache.key(WINDOW, SCALE)])
+    
+    print(f"   {cache.summary()}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the play statistics writer
+Flushes batches of plays, skips and finishes into an in-memory library and
+checks the counts and the average completion: skips without a known
+duration add no completion sample, so they must not weigh on the average.
+Also checks that a library created before completion_count existed gets
+the column.
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from play_stats import PlayStatsRecorder
+from track_library import connect
+from test_support import check
+
+
+def stats(conn, path):
+    return conn.execute('SELECT * FROM play_stats WHERE path = ?', (path,)).fetchone()
+
+
+def main():
+    ok = True
+    conn = connect(':memory:')
+    recorder = PlayStatsRecorder(':memory:')
+    
+    recorder._flush(conn, [
+        ('play', '/m/a.mp3', 100.0, None),
+        ('skip', '/m/a.mp3', 101.0, 0.2),
+        ('play', '/m/a.mp3', 102.0, None),
+        ('finish', '/m/a.mp3', 103.0, 1.0),
+    ])
+    row = stats(conn, '/m/a.mp3')
+    ok &= check("counts added up", (row['play_count'], row['skip_count'], row['finish_count']) == (2, 1, 1))
+    ok &= check("last played is the latest play", row['last_played'] == 102.0)
+    ok &= check(f"completion averaged within a batch ({row['completion']:.2f})", abs(row['completion'] - 0.6) < 1e-9)
+    ok &= check("two completion samples", row['completion_count'] == 2)
+    
+    # Skips of a track whose duration was not known yet carry no completion
+    recorder._flush(conn, [('skip', '/m/a.mp3', 104.0, None)] * 3)
+    recorder._flush(conn, [('skip', '/m/a.mp3', 105.0, 0.3)])
+    row = stats(conn, '/m/a.mp3')
+    ok &= check("skips without a completion still counted", row['skip_count'] == 5)
+    ok &= check(f"average weighted by samples, not skips and finishes ({row['completion']:.2f})",
+                abs(row['completion'] - 0.5) < 1e-9)
+    ok &= check("three completion samples", row['completion_count'] == 3)
+    
+    recorder._flush(conn, [('finish', '/m/b.mp3', 106.0, 1.5)])
+    row = stats(conn, '/m/b.mp3')
+    ok &= check("completion clamped to 1", row['completion'] == 1.0 and row['last_played'] is None)
+    
+    # A library from before completion_count
+    path = Path(tempfile.mkdtemp()) / 'old.db'
+    old = sqlite3.connect(str(path))
+    old.execute('''CREATE TABLE play_stats (
+        path TEXT PRIMARY KEY, play_count INTEGER NOT NULL DEFAULT 0, skip_count INTEGER NOT NULL DEFAULT 0,
+        finish_count INTEGER NOT NULL DEFAULT 0, last_played REAL, completion REAL)''')
+    old.execute("INSERT INTO play_stats (path, skip_count, completion) VALUES ('/m/a.mp3', 4, 0.9)")
+    old.commit()
+    old.close()
+    conn = connect(path)
+    row = stats(conn, '/m/a.mp3')
+    ok &= check("old library gets completion_count", row['completion_count'] == 0)
+    recorder._flush(conn, [('skip', '/m/a.mp3', 107.0, 0.1)])
+    ok &= check("an old average without a sample count is replaced", stats(conn, '/m/a.mp3')['completion'] == 0.1)
+    conn.close()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
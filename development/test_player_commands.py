@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the player command executor
+Checks ordering, main-thread callbacks, cancellation, the queue bound and
+that the Qt event loop keeps running while a slow command (a stand-in for
+osascript) blocks
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_commands import PlayerCommandExecutor
+from test_support import check
+
+
+def slow(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def fail():
+    raise RuntimeError("QuickTime went away")
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    executor = PlayerCommandExecutor()
+    executor.start()
+    main_thread = threading.current_thread()
+    
+    results = []
+    callback_threads = []
+    errors = []
+    ticks = []
+    
+    def done(value):
+        results.append(value)
+        callback_threads.append(threading.current_thread())
+    
+    # Main-thread heartbeat; it must keep ticking while commands block
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(lambda: ticks.append(time.monotonic()))
+    heartbeat.start(20)
+    
+    executor.submit("open", slow, 0.5, "opened", on_done=done)
+    executor.submit("status", slow, 0.05, "status 1", on_done=done, group="status")
+    executor.submit("status", slow, 0.05, "status 2", on_done=done, group="status")
+    executor.submit("play", slow, 0.05, "playing", on_done=done)
+    executor.submit("broken", fail, on_error=lambda e: errors.append(str(e)))
+    # Cancel the status checks while "open" is still running
+    cancelled = executor.cancel("status")
+    
+    QTimer.singleShot(1500, app.quit)
+    app.exec_()
+    executor.stop()
+    
+    ok = True
+    ok &= check("queued status checks cancelled", cancelled == 2)
+    ok &= check("results in submission order", results == ["opened", "playing"])
+    ok &= check("callbacks on the main thread", all(t is main_thread for t in callback_threads))
+    ok &= check("errors reach on_error", errors == ["QuickTime went away"])
+    
+    # A bounded queue drops only commands a newer one supersedes
+    bounded = PlayerCommandExecutor(max_pending=2)
+    opened = bounded.submit("open", slow, 0, 1)
+    first = bounded.submit("status", slow, 0, 2)
+    bounded.submit("status", slow, 0, 3)
+    ok &= check("full queue drops the superseded status check", first.cancelled and bounded.pending_count() == 2)
+    bounded.submit("close", slow, 0, 4)
+    bounded.submit("open", slow, 0, 5)
+    ok &= check("lifecycle commands are never dropped", not opened.cancelled and bounded.pending_count() == 4)
+    
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    longest = max(gaps) * 1000 if gaps else 0
+    ok &= check(f"event loop kept running (longest stall {longest:.0f} ms)", longest < 200)
+    ok &= check("idle thread stops within the wait", executor.stop(1000))
+    
+    # A command stuck on QuickTime: stop gives up after its wait, abandon drops the rest
+    stuck = PlayerCommandExecutor()
+    stuck.start()
+    stuck.submit("open", slow, 1.0, "opened")
+    stuck.submit("status", slow, 0, "status")
+    started = time.monotonic()
+    ended = stuck.stop(200)
+    waited = time.monotonic() - started
+    ok &= check(f"stop gives up after its wait ({waited * 1000:.0f} ms)", not ended and waited < 0.5)
+    stuck.abandon()
+    ok &= check("abandoned thread runs nothing else", stuck.pending_count() == 0)
+    ok &= check("abandoned thread ends once its command returns", stuck.wait(2000))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the player watchdog
+Drives PlayerWatchdog on a virtual clock: slow round trips, failures and a
+blocked command trigger restarts, restarts back off exponentially and
+reset after a stable period, and recovery times are recorded
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_backend import SimulatedBackend, VirtualClock
+from player_watchdog import PlayerWatchdog
+from test_support import check
+
+
+def main():
+    clock = VirtualClock()
+    watchdog = PlayerWatchdog(clock=clock.time)
+    ok = True
+    
+    # Healthy round trips
+    for _ in range(10):
+        watchdog.record_latency("status", 0.05)
+        clock.sleep(2)
+    ok &= check("healthy player needs no restart", watchdog.check() is None)
+    ok &= check("slow open does not count", watchdog.record_latency("open", 6.0) is None and watchdog.check() is None)
+    
+    # Round trips getting slow
+    for _ in range(3):
+        watchdog.record_latency("status", 4.0)
+    reason = watchdog.check()
+    ok &= check(f"slow round trips detected ({reason})", reason is not None)
+    
+    delays = []
+    delays.append(watchdog.begin_restart(reason))
+    clock.sleep(delays[-1] + 5)
+    recovery = watchdog.recovered()
+    ok &= check(f"recovery time recorded ({recovery:.1f}s)", recovery == delays[-1] + 5)
+    
+    # Failures in a row, then a blocked command, shortly after
+    for _ in range(3):
+        watchdog.record_failure("status")
+    reason = watchdog.check()
+    ok &= check(f"failures detected ({reason})", reason is not None)
+    delays.append(watchdog.begin_restart(reason))
+    ok &= check("no second restart while one is in progress", watchdog.check(running_for=60) is None)
+    
+    # The restart attempt never comes back: back off again
+    clock.sleep(delays[-1] + watchdog.recovery_timeout + 1)
+    reason = watchdog.check()
+    ok &= check(f"stuck restart retried ({reason})", reason is not None)
+    delays.append(watchdog.begin_restart(reason))
+    clock.sleep(3)
+    watchdog.recovered()
+    
+    reason = watchdog.check(running_for=watchdog.stall_timeout + 1)
+    ok &= check(f"blocked command detected ({reason})", reason is not None)
+    delays.append(watchdog.begin_restart(reason))
+    watchdog.recovered()
+    ok &= check(f"backoff doubles {delays}", delays == [2.0, 4.0, 8.0, 16.0])
+    
+    # A long healthy stretch resets the backoff
+    clock.sleep(watchdog.stable_period + 1)
+    ok &= check("backoff resets after a stable period", watchdog.begin_restart("test") == watchdog.base_backoff)
+    watchdog.recovered()
+    ok &= check(f"summary: {watchdog.summary()}", watchdog.restart_count == 5)
+    
+    # Probing when no quick command was timed lately
+    ok &= check("probe due after a quiet interval", watchdog.needs_probe())
+    watchdog.record_latency("probe", 0.05)
+    ok &= check("no probe right after a sample", not watchdog.needs_probe())
+    
+    # The simulated player can be killed mid-track and sought on reopen
+    backend = SimulatedBackend(clock=clock.time, sleep=clock.sleep)
+    backend.open("/Music/a.m4a")
+    clock.sleep(40)
+    backend.kill()
+    ok &= check("killed player is not running", backend.status().state == "not_running")
+    backend.open("/Music/a.m4a")
+    backend.seek(40)
+    position = backend.status().current_time
+    ok &= check(f"resumed at {position:.1f}s", 40 <= position < 41)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the playlist edit helpers
+Checks removal and move mappings, and that the current row, history and
+shuffle queue follow the tracks: a removed current track maps to None
+instead of another row, and shuffle order survives both edits
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from playlist_edit import compaction_map, compact, move_map, remap_current, remap_indices, removal_ranges, reorder
+from test_support import check
+
+
+def main():
+    ok = True
+    tracks = ['a', 'b', 'c', 'd', 'e', 'f']
+    
+    # Remove b, c and e
+    mapping = compaction_map(len(tracks), [4, 1, 2])
+    ok &= check("removal map", mapping == [0, -1, -1, 1, -1, 2])
+    ok &= check("compacted tracks", compact(tracks, mapping) == ['a', 'd', 'f'])
+    ok &= check("removal runs, last first", removal_ranges([4, 1, 2, 2]) == [(4, 1), (1, 2)])
+    ok &= check("kept current row follows its track", remap_current(3, mapping) == 1)
+    ok &= check("removed current row is None", remap_current(2, mapping) is None)
+    ok &= check("removed last row is None", remap_current(4, compaction_map(5, [4])) is None)
+    ok &= check("no current row stays -1", remap_current(-1, mapping) == -1)
+    ok &= check("shuffle queue keeps its order", remap_indices([5, 2, 0, 3, 1], mapping) == [2, 0, 1])
+    ok &= check("out-of-range indices dropped", remap_indices([0, 9, -1], mapping) == [0])
+    
+    # Move rows down, up and onto themselves
+    down = move_map(len(tracks), 1, 2, 5)
+    ok &= check("move b, c before f", reorder(tracks, down) == ['a', 'd', 'e', 'b', 'c', 'f'])
+    up = move_map(len(tracks), 4, 4, 0)
+    ok &= check("move e to the top", reorder(tracks, up) == ['e', 'a', 'b', 'c', 'd', 'f'])
+    to_end = move_map(len(tracks), 0, 0, len(tracks))
+    ok &= check("move a to the end", reorder(tracks, to_end) == ['b', 'c', 'd', 'e', 'f', 'a'])
+    ok &= check("move onto itself changes nothing", move_map(len(tracks), 2, 3, 2) == list(range(len(tracks))))
+    
+    moved = reorder(tracks, down)
+    current = down[2]
+    ok &= check("current row follows a move", moved[current] == 'c')
+    queue = [5, 2, 0]
+    ok &= check("shuffle queue follows a move",
+                [moved[i] for i in remap_indices(queue, down)] == [tracks[i] for i in queue])
+    
+    # Many rows: one linear pass
+    count = 100000
+    removed = range(0, count, 3)
+    mapping = compaction_map(count, removed)
+    kept = compact(list(range(count)), mapping)
+    ok &= check("bulk removal keeps the rest in order", kept == [i for i in range(count) if i % 3])
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the M3U/M3U8/PLS parsers and writers
+Checks #EXTINF and PLS fields, relative and file:// locations, legacy
+encodings, that remote URLs and absolute Windows paths are skipped and
+reported instead of being joined onto the playlist folder, and that
+written playlists read back the same
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from playlist_formats import iter_playlist, write_playlist
+from test_support import check
+
+
+def read(path):
+    skipped = []
+    entries = list(iter_playlist(str(path), skipped))
+    return entries, skipped
+
+
+def main():
+    ok = True
+    folder = Path(tempfile.mkdtemp()).resolve()
+    music = folder / "Music"
+    
+    m3u = folder / "mix.m3u8"
+    m3u.write_text(
+        "\ufeff#EXTM3U\n"
+        "#EXTINF:215,Artist - First\n"
+        "Music/first.mp3\n"
+        "#EXTINF:-1,Unknown length\n"
+        f"{music}/second.mp3\n"
+        "file:///Users/me/My%20Music/third.mp3\n"
+        "Music\\Sub\\fourth.mp3\n"
+        "C:\\Users\\me\\Music\\windows.mp3\n"
+        "D:/Music/forward.mp3\n"
+        "\\\\server\\share\\unc.mp3\n"
+        "file:///C:/Music/url.mp3\n"
+        "http://radio.example/stream.mp3\n",
+        encoding='utf-8'
+    )
+    entries, skipped = read(m3u)
+    paths = [entry.path for entry in entries]
+    ok &= check("relative path resolved against the playlist", paths[0] == str(music / "first.mp3"))
+    ok &= check("#EXTINF duration and title", entries[0].duration == 215 and entries[0].title == "Artist - First")
+    ok &= check("-1 means unknown length", entries[1].duration is None)
+    ok &= check("file:// URL unquoted", paths[2] == "/Users/me/My Music/third.mp3")
+    ok &= check("relative Windows path converted", paths[3] == str(music / "Sub" / "fourth.mp3"))
+    ok &= check("absolute Windows paths and URLs skipped", len(entries) == 4)
+    ok &= check("skipped entries reported", skipped == [
+        "C:\\Users\\me\\Music\\windows.mp3", "D:/Music/forward.mp3", "\\\\server\\share\\unc.mp3",
+        "file:///C:/Music/url.mp3", "http://radio.example/stream.mp3"
+    ])
+    ok &= check("nothing joined onto the playlist folder", not any(':' in path for path in paths))
+    
+    legacy = folder / "legacy.m3u"
+    legacy.write_bytes("Caf\u00e9.mp3\n".encode('cp1252'))
+    entries, _ = read(legacy)
+    ok &= check("cp1252 line decoded", entries[0].path == str(folder / "Caf\u00e9.mp3"))
+    
+    pls = folder / "mix.pls"
+    pls.write_text(
+        "[playlist]\n"
+        "File2=Music/two.mp3\nTitle2=Two\nLength2=120\n"
+        "File1=Music/one.mp3\nTitle1=One\nLength1=-1\n"
+        "File3=C:\\Music\\three.mp3\n"
+        "NumberOfEntries=3\nVersion=2\n",
+        encoding='utf-8'
+    )
+    entries, skipped = read(pls)
+    ok &= check("PLS entries in number order", [Path(entry.path).name for entry in entries] == ["one.mp3", "two.mp3"])
+    ok &= check("PLS title and length", entries[1].title == "Two" and entries[1].duration == 120)
+    ok &= check("PLS Windows path skipped and reported", skipped == ["C:\\Music\\three.mp3"])
+    
+    # Writers: relative inside the folder, absolute outside it
+    tracks = [str(music / "first.mp3"), str(folder / "..odd.mp3"), str(folder.parent / "outside.mp3")]
+    durations = {tracks[0]: 215.4}
+    for name in ("out.m3u8", "out.pls"):
+        out = folder / name
+        write_playlist(str(out), tracks, durations)
+        text = out.read_text(encoding='utf-8')
+        entries, skipped = read(out)
+        ok &= check(f"{name} reads back the same tracks", [entry.path for entry in entries] == tracks and not skipped)
+        ok &= check(f"{name} keeps the duration", entries[0].duration == 215)
+        ok &= check(f"{name} writes '..odd.mp3' relative", "\n..odd.mp3\n" in text or "=..odd.mp3\n" in text)
+        ok &= check(f"{name} writes a track outside the folder absolute", tracks[2] in text)
+        ok &= check(f"{name} writes no parent-relative path", f"..{os.sep}outside" not in text)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the playlist runner
+Parses runner events and drives PlaylistRunner with a stand-in process
+that prints the same event lines osascript would, so it runs on any OS.
+Pass --real on macOS with two or more media files to play them through
+the real runner script.
+"""
+
+import sys
+import time
+from pathlib import Path
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from playlist_runner import PlaylistRunner, parse_event
+from playlist_sequence import plan_queue
+from test_support import check
+
+
+FAKE_RUNNER = '''
+import sys, time
+for i in range(3):
+    print(f"start|{i}|12,5|opened", flush=True)
+    time.sleep(0.1)
+    print(f"end|{i}|finished", flush=True)
+print("done|3", flush=True)
+'''
+
+SLOW_RUNNER = '''
+import time
+print("start|0|200.0|adopted", flush=True)
+time.sleep(30)
+'''
+
+
+def collect(runner, app, timeout_ms=5000):
+    events = []
+    runner.track_started.connect(lambda p, d, how: events.append(('start', p, d, how)))
+    runner.track_ended.connect(lambda p, reason: events.append(('end', p, reason)))
+    runner.queue_done.connect(lambda: events.append(('done',)))
+    runner.runner_failed.connect(lambda message: events.append(('failed', message)))
+    runner.finished.connect(app.quit)
+    QTimer.singleShot(timeout_ms, app.quit)
+    runner.start()
+    app.exec_()
+    return events
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    ok = True
+    
+    event = parse_event("start|4|213,25|rewound\n")
+    ok &= check(f"start event parsed ({event})", event.position == 4 and event.duration == 213.25 and event.detail == "rewound")
+    ok &= check("end event parsed", parse_event("end|0|closed").detail == "closed")
+    ok &= check("noise ignored", parse_event("some log line") is None and parse_event("start|x|1|opened") is None)
+    
+    ok &= check("queue without repeat", plan_queue(1, 4, "none", None, [0], 10) == [1, 2, 3])
+    ok &= check("queue with repeat one", plan_queue(2, 4, "one", None, [], 3) == [2, 2, 2])
+    
+    started = time.monotonic()
+    events = collect(PlaylistRunner(['a', 'b', 'c'], command=[sys.executable, '-c', FAKE_RUNNER]), app)
+    starts = [e for e in events if e[0] == 'start']
+    ok &= check(f"three tracks in one session ({time.monotonic() - started:.2f}s)",
+                [e[1] for e in starts] == [0, 1, 2] and starts[0][2] == 12.5)
+    ok &= check("queue done reported", events[-1] == ('done',))
+    
+    # Stopping the runner (an edit) drops its events and kills the session
+    runner = PlaylistRunner(['a'], command=[sys.executable, '-c', SLOW_RUNNER])
+    stop_calls = []
+    
+    def stop():
+        began = time.monotonic()
+        runner.stop()
+        stop_calls.append(time.monotonic() - began)
+    
+    QTimer.singleShot(500, stop)
+    started = time.monotonic()
+    events = collect(runner, app)
+    ok &= check(f"stop ends the session ({time.monotonic() - started:.2f}s)",
+                runner.process.poll() is not None and not any(e[0] in ('done', 'failed') for e in events))
+    ok &= check(f"stop returns without waiting for the thread ({stop_calls[0] * 1000:.1f} ms)", stop_calls[0] < 0.05)
+    
+    failing = PlaylistRunner(['a'], command=[sys.executable, '-c', 'import sys; sys.exit(3)'])
+    events = collect(failing, app)
+    ok &= check("early exit reported as failure", events and events[-1][0] == 'failed')
+    
+    if '--real' in sys.argv:
+        paths = [arg for arg in sys.argv[1:] if arg != '--real']
+        print(f"\n🍎 Playing {len(paths)} files through osascript")
+        events = collect(PlaylistRunner(paths), app, timeout_ms=3600 * 1000)
+        for event in events:
+            print(f"   {event}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
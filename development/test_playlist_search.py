@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test the playlist search index and row filter
+Checks word-prefix matching over file name, title, artist and album,
+Unicode case and accent folding, that removed rows stop matching (and a
+path added twice matches until its last row goes), re-indexing once tags
+are known, and that the filter toggles only rows whose visibility changed
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from playlist_search import PlaylistFilter, SearchIndex, normalize_words
+from test_support import check
+
+
+TRACKS = [
+    # path, title, artist, album
+    ('/m/01 Hey Jude.mp3', 'Hey Jude', 'The Beatles', 'Past Masters'),
+    ('/m/02 Halo.mp3', 'Halo', 'Beyoncé', 'I Am... Sasha Fierce'),
+    ('/m/03 track.mp3', 'Straße', 'Kraftwerk', 'Trans-Europa Express'),
+    ('/m/04 ΣΟΦΙΑ.mp3', 'Σοφία', 'ΜΑΡΙΑ', 'Ελλάδα'),
+    ('/m/05 Help.mp3', 'Help!', 'The Beatles', 'Help!'),
+]
+
+
+class RowList:
+    """Stand-in for the QListWidget calls PlaylistFilter makes"""
+    
+    def __init__(self, count):
+        self.hidden = [False] * count
+        self.calls = 0
+    
+    def setRowHidden(self, row, hidden):
+        self.calls += 1
+        self.hidden[row] = hidden
+    
+    def setUpdatesEnabled(self, enabled):
+        pass
+
+
+def names(matches):
+    return sorted(Path(path).name[:2] for path in matches)
+
+
+def main():
+    ok = True
+    index = SearchIndex()
+    for path, title, artist, album in TRACKS:
+        index.add(path, Path(path).name, title, artist, album)
+    
+    # Prefixes over every field
+    ok &= check("no query means no filter", index.search('  ') is None)
+    ok &= check("file name prefix", names(index.search('jud')) == ['01'])
+    ok &= check("artist prefix", names(index.search('beat')) == ['01', '05'])
+    ok &= check("album prefix", names(index.search('fier')) == ['02'])
+    ok &= check("every word must match", names(index.search('beatles hel')) == ['05'])
+    ok &= check("words match as prefixes only", index.search('atles') == set())
+    ok &= check("word order does not matter", names(index.search('masters hey')) == ['01'])
+    
+    # Unicode case folding
+    ok &= check("accents folded", names(index.search('BEYONCE')) == ['02'])
+    ok &= check("accented query folded too", names(index.search('beyoncé')) == ['02'])
+    ok &= check("ß folds to ss", names(index.search('strasse')) == ['03'])
+    ok &= check("Greek upper and lower case", names(index.search('σοφ')) == ['04'] and names(index.search('μαρ')) == ['04'])
+    ok &= check("Greek final sigma", normalize_words('ΣΟΦΙΑΣ') == normalize_words('σοφιας'))
+    
+    # Removing rows
+    index.remove('/m/05 Help.mp3')
+    ok &= check("removed row no longer matches", names(index.search('beat')) == ['01'])
+    ok &= check("removed row's own words gone", index.search('help') == set())
+    index.add('/m/01 Hey Jude.mp3', 'duplicate row')
+    index.remove('/m/01 Hey Jude.mp3')
+    ok &= check("a path in two rows matches until its last row goes", names(index.search('jude')) == ['01'])
+    index.remove('/m/01 Hey Jude.mp3')
+    ok &= check("then it is gone", index.search('jude') == set() and len(index) == 3)
+    index.add('/m/05 Help.mp3', '05 Help.mp3', 'Help!', 'The Beatles', 'Help!')
+    ok &= check("a removed path can come back", names(index.search('beat')) == ['05'])
+    
+    # Tags arriving after the file name
+    index.add('/m/06 untitled.mp3', '06 untitled.mp3')
+    index.update('/m/06 untitled.mp3', '06 untitled.mp3', 'Yesterday', 'The Beatles', 'Help!')
+    ok &= check("updated tags searchable", names(index.search('yester')) == ['06'])
+    ok &= check("refine narrows an earlier result", names(index.refine(index.search('beat'), 'beatles yes')) == ['06'])
+    
+    # Many removals: stale pairs compacted, results unchanged
+    for i in range(3000):
+        index.add(f'/bulk/{i}.mp3', f'bulk {i}')
+    for i in range(3000):
+        index.remove(f'/bulk/{i}.mp3')
+    ok &= check("bulk removals leave no matches", index.search('bulk') == set())
+    ok &= check("stale pairs compacted", len(index._entries) < 3000 and names(index.search('beat')) == ['05', '06'])
+    
+    # Row filter
+    index = SearchIndex()
+    playlist = [path for path, *_ in TRACKS]
+    for path, title, artist, album in TRACKS:
+        index.add(path, Path(path).name, title, artist, album)
+    rows = RowList(len(playlist))
+    search = PlaylistFilter(rows, playlist, index)
+    search.set_query('the')
+    ok &= check("non-matching rows hidden", rows.hidden == [False, True, True, True, False])
+    ok &= check("visible count", search.visible_count() == 2)
+    rows.calls = 0
+    search.set_query('the beatles help')
+    ok &= check("longer query only touches changed rows",
+                rows.hidden == [True, True, True, True, False] and rows.calls == 1)
+    
+    # Remove the matching row, then search again
+    index.remove(playlist[4])
+    del playlist[4]
+    rows.hidden.pop()
+    search.invalidate()
+    ok &= check("removed row gone from the result", search.visible_count() == 0)
+    search.set_query('')
+    ok &= check("clearing the query shows every row", rows.hidden == [False] * 4)
+    search.set_query('hey')
+    ok &= check("search after a removal", rows.hidden == [False, True, True, True])
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test next/previous navigation
+Checks that a burst of next/previous presses lands on its net target, in
+playlist order and across the shuffle queue, wrapping at either end, and
+that a burst starting from a track outside the queue (or from no track)
+steps into it from the right end.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from playlist_sequence import NavigationCoalescer, step_index
+from test_support import check
+
+
+def burst(origin, steps, count, shuffle_queue=None):
+    """Press each step from origin and settle; return (target, coalescer)"""
+    navigation = NavigationCoalescer()
+    for step in steps:
+        navigation.press(step, origin)
+    return navigation.take(count, shuffle_queue), navigation
+
+
+def main():
+    ok = True
+    
+    # Playlist order
+    target, navigation = burst(2, [1] * 5, 10)
+    ok &= check("five Nexts land five tracks on", target == 7)
+    ok &= check("one burst, four presses absorbed", navigation.bursts == 1 and navigation.coalesced == 4)
+    ok &= check("taking starts a new burst", not navigation.pending and navigation.target(10) is None)
+    ok &= check("Next, Next, Previous nets one step", burst(2, [1, 1, -1], 10)[0] == 3)
+    ok &= check("balanced presses stay on the track", burst(2, [1, -1, -1, 1], 10)[0] == 2)
+    ok &= check("wraps past the end", burst(8, [1] * 4, 10)[0] == 2)
+    ok &= check("wraps before the start", burst(1, [-1] * 3, 10)[0] == 8)
+    
+    navigation = NavigationCoalescer()
+    navigation.press(1, 2)
+    navigation.press(1, 3)  # current moved meanwhile (the list follows the target)
+    ok &= check("origin is the track current at the first press", navigation.target(10) == 4)
+    
+    # Shuffle order
+    queue = [4, 0, 3, 1, 2]
+    ok &= check("Nexts walk the shuffle queue", burst(0, [1] * 3, 5, queue)[0] == 2)
+    ok &= check("Previous walks it backwards", burst(3, [-1, -1], 5, queue)[0] == 4)
+    ok &= check("wraps around the queue", burst(2, [1, 1], 5, queue)[0] == 0)
+    ok &= check("net zero across the queue", burst(3, [1, 1, -1, -1], 5, queue)[0] == 3)
+    
+    # Origin outside the queue (added after shuffling) or no current track
+    queue = [4, 0, 3]
+    ok &= check("Next from outside the queue starts at its first track", burst(5, [1], 6, queue)[0] == 4)
+    ok &= check("two Nexts from outside", burst(5, [1, 1], 6, queue)[0] == 0)
+    ok &= check("Previous from outside starts at its last track", burst(5, [-1], 6, queue)[0] == 3)
+    ok &= check("net zero from outside stays put", burst(5, [1, -1], 6, queue)[0] == 5)
+    ok &= check("Next with no current track plays the first", burst(-1, [1], 10)[0] == 0)
+    ok &= check("Previous with no current track plays the last", burst(-1, [-1], 10)[0] == 9)
+    ok &= check("net zero with no current track plays nothing", burst(-1, [1, -1], 10)[0] is None)
+    ok &= check("empty playlist has no target", burst(0, [1], 0)[0] is None)
+    ok &= check("step_index in playlist order", step_index(3, 10, None, 2) == 5 and step_index(0, 10, None, -1) == 9)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
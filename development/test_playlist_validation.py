@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test the playlist path validator
+Checks the states reported for present and missing files, that an I/O
+error from a failing share means unavailable rather than missing, and that a
+volume whose checks hang costs one deadline for all its files: the checks
+still queued are cancelled, every path is reported unavailable, the
+volume is marked unavailable once and gets no new checks while the hung
+ones occupy the pool, while a playlist reloaded meanwhile is still reported
+and retried. Hung checks are simulated, so no network share is needed.
+"""
+
+import errno
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import playlist_validation
+from playlist_validation import PathValidator, STATE_MISSING, STATE_OK, STATE_UNAVAILABLE, check_path
+from test_support import check
+
+
+def run_for(app, seconds):
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    ok = True
+    
+    folder = Path(tempfile.mkdtemp())
+    present = folder / "present.mp3"
+    present.write_bytes(b"ID3")
+    missing = folder / "missing.mp3"
+    
+    states = {}
+    validator = PathValidator()
+    validator.path_checked.connect(lambda path, state: states.__setitem__(path, state))
+    validator.validate([str(present), str(missing)])
+    run_for(app, 0.5)
+    ok &= check("present file is ok", states.get(str(present)) == STATE_OK)
+    ok &= check("missing file is missing", states.get(str(missing)) == STATE_MISSING)
+    validator.shutdown()
+    
+    # A share that errors mid-check
+    real_stat = os.stat
+    
+    def failing_stat(path, *args, **kwargs):
+        if str(path) == str(present):
+            raise OSError(errno.EIO, "Input/output error", str(path))
+        return real_stat(path, *args, **kwargs)
+    
+    os.stat = failing_stat
+    try:
+        ok &= check("I/O error means unavailable, not missing", check_path(str(present)) == STATE_UNAVAILABLE)
+    finally:
+        os.stat = real_stat
+    ok &= check("a folder is not a track", check_path(str(folder)) == STATE_MISSING)
+    ok &= check("a path through a file is missing", check_path(str(present / "x.mp3")) == STATE_MISSING)
+    
+    # Checks that hang like stat() on a sleeping share
+    release = threading.Event()
+    started = []
+    real_check_path = playlist_validation.check_path
+    
+    def hung_check(path):
+        started.append(path)
+        release.wait(5)
+        return STATE_OK
+    
+    playlist_validation.check_path = hung_check
+    try:
+        hung = [str(folder / f"hung{i}.mp3") for i in range(5)]
+        states = {}
+        unavailable = []
+        validator = PathValidator(max_workers=2, files_timeout=0.3)
+        validator.path_checked.connect(lambda path, state: states.__setitem__(path, state))
+        validator.volume_unavailable.connect(unavailable.append)
+        began = time.monotonic()
+        validator.validate(hung)
+        while len(states) < len(hung) and time.monotonic() - began < 3:
+            app.processEvents()
+            time.sleep(0.01)
+        elapsed = time.monotonic() - began
+        
+        ok &= check(f"one deadline for the whole volume ({elapsed:.2f} s)", elapsed < 1.0)
+        ok &= check("every hung path reported unavailable",
+                    all(states.get(path) == STATE_UNAVAILABLE for path in hung))
+        ok &= check("volume marked unavailable once", unavailable == ['/'])
+        ok &= check("queued checks were cancelled", len(started) == 2)
+        ok &= check("stuck checks keep the volume busy", validator._busy.get('/') == 2)
+        
+        validator.retry_offline_volumes()
+        time.sleep(0.2)
+        ok &= check("no new checks while the old ones hang", len(started) == 2)
+        
+        # The playlist is reloaded (cancel() stops the retry timer) while the volume still hangs
+        validator.cancel()
+        states = {}
+        validator.validate(hung[:3])
+        ok &= check("reloaded paths reported unavailable, not left checking",
+                    all(states.get(path) == STATE_UNAVAILABLE for path in hung[:3]))
+        ok &= check("and retried later", validator.retry_timer.isActive() and len(started) == 2)
+        
+        release.set()
+        time.sleep(0.2)
+        ok &= check("volume free again once the checks return", not validator._busy.get('/'))
+        validator.shutdown()
+    finally:
+        playlist_validation.check_path = real_check_path
+        release.set()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Test the QuickTime status parser and end-of-track scheduler
+Feeds playerStatus replies to parse_status: a path containing "|",
+decimal commas from other locales, short or garbled replies, and the
+replies for a player that is not running or has no such document. Then
+drives EndOfTrackScheduler with made-up positions and times (long
+sleeps, dense polls near the end, a pause and a seek) and polls a
+simulated track to its end in virtual time. Last, a preload -> switch
+cycle on the simulated player: the next track is opened PRELOAD_LEAD
+seconds before the end and used, or reopened if its document is gone.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_backend import SimulatedBackend, VirtualClock
+from quicktime_player import (PRELOAD_LEAD, EndOfTrackScheduler, PlayerStatus, parse_status,
+                              preload_document, query_status, switch_to_document)
+from test_support import check
+
+
+def reply(stdout, returncode=0):
+    """Stand-in for call_player returning stdout"""
+    def call(handler, *args, timeout=None):
+        call.args = (handler,) + args
+        return subprocess.CompletedProcess(['osascript'], returncode, stdout, '')
+    return call
+
+
+def test_status():
+    print("\n🧪 Status replies")
+    ok = True
+    
+    status = parse_status("playing|true|12.5|180.25|1|/Music/a.m4a\n")
+    ok &= check(f"playing reply ({status})",
+                status.state == 'playing' and status.playing and status.current_time == 12.5
+                and status.duration == 180.25 and status.document_count == 1
+                and status.document_path == '/Music/a.m4a' and not status.finished)
+    
+    status = parse_status("paused|false|12,5|180,25|2|/Music/a.m4a\r\n")
+    ok &= check("decimal commas", status.current_time == 12.5 and status.duration == 180.25)
+    ok &= check("paused is not playing", status.state == 'paused' and not status.playing)
+    
+    status = parse_status("playing|true|1|2|1|/Music/Live | Unplugged/b|c.m4a\n")
+    ok &= check(f"'|' in the path kept ({status.document_path!r})",
+                status.document_path == '/Music/Live | Unplugged/b|c.m4a' and status.duration == 2.0)
+    
+    for text in ("", "\n", "playing|true|12", "error: QuickTime got an error", "playing|true|1|2|1"):
+        status = parse_status(text)
+        ok &= check(f"short reply {text!r} is an error", status.state == 'error' and status.finished)
+    
+    status = parse_status("playing|maybe|abc|--|x|/Music/a.m4a")
+    ok &= check("garbled fields read as zero",
+                not status.playing and status.current_time == 0.0 and status.duration == 0.0
+                and status.document_count == 0 and status.progress == 0.0)
+    
+    status = parse_status("not_running|false|0|0|0|\n")
+    ok &= check("player not running", status.state == 'not_running' and status.finished and status.document_path == '')
+    status = parse_status("no_document|false|0|0|0|\n")
+    ok &= check("no document open", status.state == 'no_document' and status.finished)
+    status = parse_status("no_document|false|0|0|2|\n")
+    ok &= check("named document gone, others open", status.finished and status.document_count == 2)
+    status = parse_status("finished|false|0|0|1|/Music/a.m4a\n")
+    ok &= check("document that stopped answering counts as finished", status.finished)
+    
+    call = reply("paused|false|30|60|2|/Music/b.m4a\n")
+    status = query_status(call, document_name='b.m4a')
+    ok &= check("query asks for the named document", call.args == ('playerStatus', 'b.m4a') and status.progress == 0.5)
+    call = reply("")
+    query_status(call)
+    ok &= check("no name means the front document", call.args == ('playerStatus', ''))
+    ok &= check("script error is an error status", query_status(reply("playing|true|1|2|1|/a", 1)).state == 'error')
+    return ok
+
+
+def playing(current_time, duration=180.0):
+    return PlayerStatus('playing', True, current_time, duration, 1, '/Music/a.m4a')
+
+
+def test_scheduler():
+    print("\n🧪 End-of-track scheduler")
+    ok = True
+    scheduler = EndOfTrackScheduler(lead=1.5, dense_interval=0.25, idle_interval=2.0,
+                                    max_sleep=30.0, drift_tolerance=1.0)
+    
+    ok &= check("long way off: sleep at most max_sleep", scheduler.next_delay(playing(0.0), now=100.0) == 30.0)
+    ok &= check("end anchored to the clock", scheduler.expected_end == 280.0 and scheduler.remaining(now=130.0) == 150.0)
+    ok &= check("on schedule: no re-anchor", scheduler.next_delay(playing(30.0), now=130.0) == 30.0
+                and scheduler.reanchor_count == 0)
+    ok &= check("small drift tolerated", scheduler.next_delay(playing(59.5), now=160.0) == 30.0
+                and scheduler.reanchor_count == 0)
+    
+    # Paused: the end moves with every second of pause
+    paused = PlayerStatus('paused', False, 90.0, 180.0, 1, '/Music/a.m4a')
+    ok &= check("paused: idle polls", scheduler.next_delay(paused, now=190.0) == 2.0)
+    ok &= check("paused: no anchor", scheduler.expected_end is None and scheduler.remaining(now=190.0) is None)
+    ok &= check("resumed: anchored again, not counted as a re-anchor",
+                scheduler.next_delay(playing(90.0), now=250.0) == 30.0
+                and scheduler.expected_end == 340.0 and scheduler.reanchor_count == 0)
+    
+    # Seek forward 60 s
+    ok &= check("seek: sleep shortened to the new end", scheduler.next_delay(playing(170.0), now=260.0) == 8.5)
+    ok &= check("seek: end re-anchored", scheduler.reanchor_count == 1 and scheduler.expected_end == 270.0)
+    
+    # Approaching the end
+    ok &= check("inside the lead: dense polls", scheduler.next_delay(playing(178.5), now=268.5) == 0.25)
+    ok &= check("dense until it ends", scheduler.next_delay(playing(179.9), now=269.9) == 0.25)
+    unknown = PlayerStatus('playing', True, 10.0, 0.0, 1, '/Music/stream')
+    ok &= check("unknown length: idle polls", scheduler.next_delay(unknown, now=300.0) == 2.0)
+    ok &= check("every poll counted", scheduler.poll_count == 9)
+    scheduler.reset()
+    ok &= check("reset forgets the anchor", scheduler.expected_end is None and scheduler.poll_count == 0
+                and scheduler.reanchor_count == 0)
+    
+    # A whole track in virtual time: pause at 60 s, seek to 150 s after resuming
+    clock = VirtualClock()
+    backend = SimulatedBackend(durations={'/Music/a.m4a': 180.0}, open_latency=0.0, close_latency=0.0,
+                               command_latency=0.0, clock=clock.time, sleep=clock.sleep)
+    backend.open('/Music/a.m4a')
+    events = {60.0: 'pause', 70.0: 'play', 80.0: 'seek'}
+    polls = 0
+    while True:
+        status = backend.status()
+        polls += 1
+        if status.finished:
+            break
+        delay = scheduler.next_delay(status, now=clock.time())
+        for at in sorted(events):
+            if clock.time() < at <= clock.time() + delay:
+                # Act at the event time and poll right after it
+                clock.sleep(at - clock.time())
+                action = events.pop(at)
+                if action == 'seek':
+                    backend.seek(150.0)
+                else:
+                    getattr(backend, action)()
+                break
+        else:
+            clock.sleep(delay)
+    # Played 60 s, paused 10 s, played 10 s, then 30 s from the seek
+    ok &= check(f"end noticed within one dense poll ({clock.time():.2f} s)", 110.0 - 1.0 <= clock.time() <= 110.0 + 0.25)
+    ok &= check(f"few polls for the whole track ({polls})", polls <= 20)
+    ok &= check("the seek re-anchored the end", scheduler.reanchor_count == 1)
+    return ok
+
+
+def play_to_preload(backend, clock, scheduler):
+    """Poll the front track until it is within PRELOAD_LEAD of its end"""
+    while True:
+        delay = scheduler.next_delay(backend.status(), now=clock.time())
+        remaining = scheduler.remaining(now=clock.time())
+        if remaining <= PRELOAD_LEAD:
+            return remaining
+        # As preload_next does: shorten the sleep to land in the preload window
+        clock.sleep(min(delay, remaining - PRELOAD_LEAD))
+
+
+def test_preload():
+    print("\n🧪 Preload and switch")
+    ok = True
+    clock = VirtualClock()
+    backend = SimulatedBackend(default_duration=60.0, open_latency=0.8, close_latency=0.3, command_latency=0.02,
+                               clock=clock.time, sleep=clock.sleep)
+    scheduler = EndOfTrackScheduler()
+    backend.open('/Music/a.m4a')
+    
+    remaining = play_to_preload(backend, clock, scheduler)
+    ok &= check(f"preload window reached ({remaining:.2f} s left)", 0 < remaining <= PRELOAD_LEAD)
+    name = backend.preload('/Music/b.m4a', 'a.m4a')
+    ok &= check("preloaded document named after the file", name == 'b.m4a')
+    front = backend.status()
+    ok &= check("current track still in front and playing", front.playing and front.document_path == '/Music/a.m4a')
+    behind = backend.status(document_name=name)
+    ok &= check("preloaded track waits paused at the start",
+                behind.state == 'paused' and behind.current_time == 0.0 and behind.document_count == 2)
+    
+    # Current track ends; the preloaded one is used
+    clock.sleep(scheduler.remaining(now=clock.time()))
+    ok &= check("current track finished", backend.status().finished)
+    opens = backend.calls['open']
+    started = clock.time()
+    ok &= check("switch starts the preloaded track", backend.switch(name))
+    switch_seconds = clock.time() - started
+    status = backend.status()
+    ok &= check("preloaded track playing, finished one closed",
+                status.playing and status.document_path == '/Music/b.m4a' and status.document_count == 1)
+    ok &= check(f"no reopen, switch took {switch_seconds:.2f} s", backend.calls['open'] == opens
+                and switch_seconds < backend.open_latency)
+    
+    # The preloaded document went away (closed by hand, player relaunched)
+    scheduler.reset()
+    play_to_preload(backend, clock, scheduler)
+    name = backend.preload('/Music/c.m4a', 'b.m4a')
+    backend.kill()
+    ok &= check("switch reports a missing document", not backend.switch(name))
+    backend.open('/Music/c.m4a')
+    status = backend.status()
+    ok &= check("fallback reopens the track", status.playing and status.document_path == '/Music/c.m4a')
+    
+    # AppleScript handlers' replies
+    ok &= check("preload failure gives no name", preload_document('/Music/d.m4a', 'c.m4a', call=reply("", 1)) is None)
+    call = reply("d.m4a\n")
+    ok &= check("preload passes the path and the front name",
+                preload_document('/Music/d.m4a', 'c.m4a', call=call) == 'd.m4a'
+                and call.args == ('preloadTrack', '/Music/d.m4a', 'c.m4a'))
+    ok &= check("switch needs 'playing' back", switch_to_document('d.m4a', call=reply("playing\n"))
+                and not switch_to_document('d.m4a', call=reply("missing\n")))
+    return ok
+
+
+def main():
+    ok = test_status()
+    ok &= test_scheduler()
+    ok &= test_preload()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test the smart playlist rule compiler
+Runs every operator against a small in-memory library, checks that rule
+values are bound as parameters (quotes, LIKE wildcards and SQL in values
+match literally, unknown fields and operators are refused) and that live
+updates keep new matches in ORDER BY order. A track whose own play makes
+it stop matching ("not played in 7 days") stays while it is playing.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from play_stats import PlayStatsRecorder
+from smart_playlist import DAY, SmartPlaylist
+from track_library import connect
+from test_support import check
+
+
+NOW = 1_700_000_000.0
+
+TRACKS = [
+    # path, title, artist, album, duration
+    ('/m/a.mp3', 'Anthem', 'Beatles', 'Abbey Road', 180),
+    ('/m/b.mp3', "Don't Stop", 'Fleetwood Mac', 'Rumours', 190),
+    ('/m/c.mp3', '100% Pure', 'Coldplay', 'Parachutes', 240),
+    ('/m/d.mp3', 'Under_score', 'Beatles', 'Help!', 300),
+    ('/m/e.mp3', "x' OR 1=1 --", 'Zappa', 'Apostrophe', 420),
+]
+
+STATS = [
+    # path, play_count, skip_count, last_played
+    ('/m/a.mp3', 5, 0, NOW - 1 * DAY),
+    ('/m/b.mp3', 1, 3, NOW - 30 * DAY),
+    ('/m/c.mp3', 0, 1, None),
+]
+
+
+def library():
+    conn = connect(':memory:')
+    conn.executemany('INSERT INTO tracks (path, title, artist, album, duration) VALUES (?, ?, ?, ?, ?)', TRACKS)
+    conn.executemany('INSERT INTO play_stats (path, play_count, skip_count, last_played) VALUES (?, ?, ?, ?)', STATS)
+    return conn
+
+
+def names(conn, *rules, match='all', order='path'):
+    paths = SmartPlaylist('test', rules, match=match, order=order).evaluate(conn, NOW)
+    return [Path(path).stem for path in paths]
+
+
+def rule(field, op, value):
+    return {'field': field, 'op': op, 'value': value}
+
+
+def refused(conn, *rules):
+    try:
+        names(conn, *rules)
+    except ValueError:
+        return True
+    return False
+
+
+def main():
+    conn = library()
+    ok = True
+    
+    # Comparisons
+    ok &= check("=", names(conn, rule('duration', '=', 240)) == ['c'])
+    ok &= check("!=", names(conn, rule('duration', '!=', 240)) == ['a', 'b', 'd', 'e'])
+    ok &= check("<", names(conn, rule('duration', '<', 240)) == ['a', 'b'])
+    ok &= check("<=", names(conn, rule('duration', '<=', 240)) == ['a', 'b', 'c'])
+    ok &= check(">", names(conn, rule('play_count', '>', 0)) == ['a', 'b'])
+    ok &= check(">=", names(conn, rule('skip_count', '>=', 1)) == ['b', 'c'])
+    ok &= check("text comparison ignores case", names(conn, rule('artist', '=', 'beatles')) == ['a', 'd'])
+    ok &= check("missing stats count as zero", names(conn, rule('play_count', '=', 0)) == ['c', 'd', 'e'])
+    
+    # Sets
+    ok &= check("in", names(conn, rule('artist', 'in', ['zappa', 'Coldplay'])) == ['c', 'e'])
+    ok &= check("not_in", names(conn, rule('artist', 'not_in', ['Beatles'])) == ['b', 'c', 'e'])
+    ok &= check("empty in matches nothing", names(conn, rule('artist', 'in', [])) == [])
+    ok &= check("empty not_in matches everything", len(names(conn, rule('artist', 'not_in', []))) == len(TRACKS))
+    
+    # contains: LIKE wildcards and quotes in the value are literal
+    ok &= check("contains", names(conn, rule('album', 'contains', 'road')) == ['a'])
+    ok &= check("contains a literal %", names(conn, rule('title', 'contains', '100%')) == ['c'])
+    ok &= check("% alone is not a wildcard", names(conn, rule('title', 'contains', '%')) == ['c'])
+    ok &= check("_ is not a wildcard", names(conn, rule('title', 'contains', '_')) == ['d'])
+    ok &= check("quote in a value", names(conn, rule('title', 'contains', "Don't")) == ['b'])
+    
+    # Relative dates
+    ok &= check("in_last_days", names(conn, rule('last_played', 'in_last_days', 7)) == ['a'])
+    ok &= check("not_in_last_days includes never played",
+                names(conn, rule('last_played', 'not_in_last_days', 7)) == ['b', 'c', 'd', 'e'])
+    ok &= check("time-relative rules are flagged",
+                SmartPlaylist('t', [rule('last_played', 'in_last_days', 7)]).is_time_relative)
+    
+    # Combining rules
+    beatles_or_long = (rule('artist', '=', 'Beatles'), rule('duration', '>', 400))
+    ok &= check("match all", names(conn, *beatles_or_long) == [])
+    ok &= check("match any", names(conn, *beatles_or_long, match='any') == ['a', 'd', 'e'])
+    ok &= check("no rules match everything", len(names(conn)) == len(TRACKS))
+    
+    # Injection: values are parameters, fields and operators must be known
+    ok &= check("SQL in a value matches literally", names(conn, rule('title', '=', "x' OR 1=1 --")) == ['e'])
+    ok &= check("SQL in an in list matches literally", names(conn, rule('artist', 'in', ["') OR ('1'='1"])) == [])
+    ok &= check("unknown field refused", refused(conn, rule('path) OR (1', '=', 1)))
+    ok &= check("unknown operator refused", refused(conn, rule('path', '= 1 OR 1 =', 1)))
+    ok &= check("unknown order falls back to path", names(conn, order='path; DROP TABLE tracks') == list('abcde'))
+    ok &= check("tracks table intact", conn.execute('SELECT COUNT(*) FROM tracks').fetchone()[0] == len(TRACKS))
+    
+    # Live updates keep ORDER BY
+    smart = SmartPlaylist('beatles', [rule('artist', '=', 'Beatles')], order='title')
+    smart.evaluate(conn, NOW)
+    conn.execute("INSERT INTO tracks (path, title, artist, duration) VALUES ('/m/f.mp3', 'Blackbird', 'Beatles', 140)")
+    added, removed = smart.update(conn, ['/m/f.mp3'], NOW)
+    ok &= check("new match reported", added == ['/m/f.mp3'] and removed == [])
+    ok &= check("new match sorted in, not appended",
+                [Path(path).stem for path in smart.paths] == ['a', 'f', 'd'])
+    
+    conn.execute("UPDATE tracks SET artist = 'Wings' WHERE path = '/m/a.mp3'")
+    added, removed = smart.update(conn, ['/m/a.mp3'], NOW)
+    ok &= check("changed track dropped", added == [] and removed == ['/m/a.mp3'])
+    ok &= check("order kept after a removal", [Path(path).stem for path in smart.paths] == ['f', 'd'])
+    ok &= check("unchanged paths are no change", smart.update(conn, ['/m/d.mp3'], NOW) == ([], []))
+    
+    # Play -> statistics flush -> live update, as the player drives it
+    recorder = PlayStatsRecorder(':memory:')
+    conn = library()
+    fresh = SmartPlaylist('fresh', [rule('last_played', 'not_in_last_days', 7)], order='path')
+    fresh.evaluate(conn, NOW)
+    recorder._flush(conn, [('play', '/m/c.mp3', NOW, None)])
+    ok &= check("playing track kept after its play is logged",
+                fresh.update(conn, ['/m/c.mp3'], NOW, keep='/m/c.mp3') == ([], []) and '/m/c.mp3' in fresh.paths)
+    recorder._flush(conn, [('finish', '/m/c.mp3', NOW + 200, 1.0), ('play', '/m/d.mp3', NOW + 200, None)])
+    added, removed = fresh.update(conn, ['/m/c.mp3', '/m/d.mp3'], NOW + 200, keep='/m/d.mp3')
+    ok &= check("finished track dropped, the next one kept", added == [] and removed == ['/m/c.mp3'])
+    ok &= check("kept track keeps its row", [Path(path).stem for path in fresh.paths] == ['b', 'd', 'e'])
+    
+    # Same through a full refresh (a new match or the daily re-evaluation)
+    conn.execute("INSERT INTO tracks (path, title, duration) VALUES ('/m/f.mp3', 'New', 100)")
+    added, removed = fresh.update(conn, ['/m/f.mp3'], NOW + 200, keep='/m/d.mp3')
+    ok &= check("refresh adds the new match but keeps the playing track",
+                added == ['/m/f.mp3'] and removed == [] and [Path(path).stem for path in fresh.paths] == ['b', 'd', 'e', 'f'])
+    ok &= check("refresh drops it once it is no longer kept",
+                fresh.refresh(conn, NOW + 200) == ([], ['/m/d.mp3']))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Test Support - Helpers shared by the development test scripts
+The scripts print one line per check and exit non-zero if any failed.
+"""
+
+
+def check(label, condition):
+    """Print a passed/failed line for one check and return whether it passed"""
+    passed = bool(condition)
+    print(f"{'✅' if passed else '❌'} {label}")
+    return passed
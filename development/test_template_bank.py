@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test the shared template bank
+Times template matching with the bank against reading and resizing the
+templates on every detection, on a synthetic Retina-sized screenshot with
+the AirPlay icon pasted in, and checks that banks are shared and reload
+when the templates directory changes. Needs OpenCV, not QuickTime.
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from template_bank import TEMPLATE_DIR, get_bank
+from test_support import check
+
+
+SCALES = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.5, 2.0)
+
+
+def synthetic_screen(template, at=(2100, 1650), size=(1800, 2880)):
+    rng = np.random.default_rng(1)
+    screen = rng.integers(0, 60, size=(size[0], size[1], 3), dtype=np.uint8)
+    h, w = template.shape[:2]
+    screen[at[1]:at[1] + h, at[0]:at[0] + w] = template
+    return screen
+
+
+def match_uncached(path, screen_gray):
+    """What the detectors did before: read, resize and convert per detection"""
+    best = (0.0, None)
+    for scale in SCALES:
+        template = cv2.imread(str(path))
+        resized = cv2.resize(template, (int(template.shape[1] * scale), int(template.shape[0] * scale)))
+        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+        _, value, _, location = cv2.minMaxLoc(cv2.matchTemplate(screen_gray, gray, cv2.TM_CCOEFF_NORMED))
+        best = max(best, (value, location))
+    return best
+
+
+def load_uncached(path):
+    """Template preparation alone, as the detectors did it per detection"""
+    for scale in SCALES:
+        template = cv2.imread(str(path))
+        resized = cv2.resize(template, (int(template.shape[1] * scale), int(template.shape[0] * scale)))
+        cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+
+
+def match_bank(name, screen_gray):
+    best = (0.0, None)
+    for level in get_bank().pyramid(name, SCALES):
+        _, value, _, location = cv2.minMaxLoc(cv2.matchTemplate(screen_gray, level.gray, cv2.TM_CCOEFF_NORMED))
+        best = max(best, (value, location))
+    return best
+
+
+def timed(run, repeat=3):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    ok = True
+    name = "airplay_icon.png"
+    template = cv2.imread(str(TEMPLATE_DIR / name))
+    screen_gray = cv2.cvtColor(synthetic_screen(template), cv2.COLOR_BGR2GRAY)
+    
+    started = time.perf_counter()
+    bank = get_bank()
+    load_ms = (time.perf_counter() - started) * 1000
+    ok &= check(f"{len(bank.names())} templates loaded in {load_ms:.1f} ms", bool(bank.names()))
+    ok &= check("bank shared within the process", get_bank() is bank)
+    
+    started = time.perf_counter()
+    bank.pyramid(name, SCALES)
+    pyramid_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    bank.pyramid(name, SCALES)
+    ok &= check(f"pyramid built once ({pyramid_ms:.2f} ms, then "
+                f"{(time.perf_counter() - started) * 1000:.3f} ms)", bank.pyramid(name, SCALES) is bank.pyramid(name, SCALES))
+    
+    (value, location), uncached_ms = timed(lambda: match_uncached(TEMPLATE_DIR / name, screen_gray))
+    (bank_value, bank_location), bank_ms = timed(lambda: match_bank(name, screen_gray))
+    ok &= check(f"same match ({bank_value:.2f} at {bank_location})", location == bank_location == (2100, 1650))
+    print(f"   per detection, {len(SCALES)} scales: uncached {uncached_ms:.1f} ms, bank {bank_ms:.1f} ms")
+    
+    # Matching dominates the above; what the bank saves is the template preparation
+    _, load_ms = timed(lambda: load_uncached(TEMPLATE_DIR / name), repeat=100)
+    _, pyramid_ms = timed(lambda: bank.pyramid(name, SCALES), repeat=100)
+    print(f"   template preparation per detection: uncached {load_ms:.3f} ms, bank {pyramid_ms:.3f} ms")
+    
+    # Template files are the only input; editing them reloads the bank
+    folder = Path(tempfile.mkdtemp())
+    try:
+        shutil.copy(TEMPLATE_DIR / name, folder / name)
+        scratch = get_bank(folder)
+        ok &= check("display scales get their own bank", get_bank(folder, 1.0) is not scratch
+                    and get_bank(folder, 1.0).pyramid(name)[0].width == template.shape[1] // 2)
+        shutil.copy(TEMPLATE_DIR / "apple_tv.png", folder / "apple_tv.png")
+        scratch.checked_at = 0.0
+        ok &= check("added template picked up", "apple_tv.png" in get_bank(folder).names() and scratch.loads == 2)
+    finally:
+        shutil.rmtree(folder)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the warm player
+Checks that a player kept warm survives the last close and that its opens
+skip the launch, on the simulated player in virtual time. Pass --real and
+a media file on macOS to time cold and warm opens of QuickTime itself.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from player_backend import QuickTimeBackend, SimulatedBackend, VirtualClock
+from test_support import check
+
+
+def average(values):
+    return sum(values) / len(values) if values else float('nan')
+
+
+def test_simulated():
+    print("\n🧪 Simulated player")
+    clock = VirtualClock()
+    backend = SimulatedBackend(open_latency=0.3, close_latency=0.1, launch_latency=1.5,
+                               clock=clock.time, sleep=clock.sleep)
+    ok = True
+    
+    ok &= check("first warm-up launches the player", backend.warm_up() == 'cold')
+    ok &= check("second warm-up finds it running", backend.warm_up() == 'warm')
+    
+    backend.open("/Music/a.m4a")
+    backend.close(keep_running=True)
+    ok &= check("kept running after the last close", backend.status().state == 'no_document')
+    backend.open("/Music/b.m4a")
+    backend.close()
+    ok &= check("quits after the last close otherwise", backend.status().state == 'not_running')
+    backend.open("/Music/c.m4a")
+    
+    cold, warm = backend.open_times['cold'], backend.open_times['warm']
+    ok &= check(f"one cold and two warm opens ({backend.open_summary()})", len(cold) == 1 and len(warm) == 2)
+    ok &= check("warm open skips the launch", abs(average(cold) - average(warm) - 1.5) < 1e-9)
+    return ok
+
+
+def test_real(path, rounds=5):
+    """macOS only: open after a quit against open after closing documents"""
+    print(f"\n🍎 QuickTime Player, {rounds} rounds with {Path(path).name}")
+    backend = QuickTimeBackend()
+    for _ in range(rounds):
+        backend.quit()
+        time.sleep(2)  # let QuickTime exit completely
+        backend.open(path)
+        backend.close(keep_running=True)
+        backend.open(path)
+        backend.close(keep_running=True)
+    backend.quit()
+    
+    cold, warm = backend.open_times['cold'], backend.open_times['warm']
+    print(f"   cold open: {average(cold):.2f}s avg, {max(cold, default=0):.2f}s max")
+    print(f"   warm open: {average(warm):.2f}s avg, {max(warm, default=0):.2f}s max")
+    print(f"   saved per track: {average(cold) - average(warm):.2f}s")
+    return check("warm opens are faster", average(warm) < average(cold))
+
+
+if __name__ == "__main__":
+    ok = test_simulated()
+    if '--real' in sys.argv:
+        files = [arg for arg in sys.argv[1:] if arg != '--real']
+        ok &= test_real(files[0])
+    sys.exit(0 if ok else 1)
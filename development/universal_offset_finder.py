@@ -9,6 +9,8 @@ import time
 import cv2
 from pathlib import Path
 from coordinate_converter import CoordinateConverter
+from detection_cache import get_cache
+from window_detection import Region
 import json
 
 class UniversalOffsetFinder:
@@ -63,6 +65,9 @@ class UniversalOffsetFinder:
             
         print(f"✅ Found AirPlay icon at: ({airplay_pos['x']}, {airplay_pos['y']})")
         
+        # Let the players check this spot instead of trusting it blindly
+        get_cache().store(Region(**window), self.converter.scale_factor, 'airplay_icon', airplay_pos, screenshot)
+        
         # Step 2: Click AirPlay to open menu
         print("\n📍 Step 2: Opening AirPlay menu")
         subprocess.run(['cliclick', f"c:{airplay_pos['x']},{airplay_pos['y']}"])
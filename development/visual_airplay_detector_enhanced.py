@@ -15,6 +15,8 @@ import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk
 import threading
+from template_bank import get_bank
+from window_detection import CONTROL_BAR, Region
 
 class EnhancedVisualAirPlayDetector:
     def __init__(self):
@@ -23,6 +25,7 @@ class EnhancedVisualAirPlayDetector:
         self.scale_factor = self._get_scale_factor()
         self.templates_dir = Path("templates")
         self.results = {}
+        self.qt_window = None  # geometry of the window being searched
         self.debug_images = []  # Store debug images for review
         self.confirmation_window = None
         
@@ -135,7 +138,7 @@ class EnhancedVisualAirPlayDetector:
                             description="Full desktop screenshot")
         
         # Try to find QuickTime window
-        qt_window = self._find_quicktime_window()
+        qt_window = self.qt_window = self._find_quicktime_window()
         if qt_window:
             # Highlight QuickTime window
             annotations = [
@@ -225,10 +228,12 @@ class EnhancedVisualAirPlayDetector:
         """Detect using template matching"""
         print("  📋 Trying template matching...")
         
-        # Look for existing templates
-        template_files = list(self.templates_dir.glob("airplay*.png"))
+        # Look for existing templates, loaded and scaled once per process;
+        # matched at their captured size, as before the bank
+        bank = get_bank(self.templates_dir)
+        template_names = bank.names("airplay*.png")
         
-        if not template_files:
+        if not template_names:
             print("  ❌ No template files found")
             return None
         
@@ -236,29 +241,34 @@ class EnhancedVisualAirPlayDetector:
         best_confidence = 0
         all_matches = []
         
-        for template_file in template_files:
-            template = cv2.imread(str(template_file))
-            if template is None:
-                continue
-            
-            print(f"    Testing template: {template_file.name}")
-            
-            # Try multiple scales
-            scales = [0.8, 0.9, 1.0, 1.1, 1.2]
+        # Only the control bar of the QuickTime window, when it was found
+        search, (offset_x, offset_y) = screenshot, (0, 0)
+        if self.qt_window:
+            control_bar = Region(**self.qt_window).fraction(*CONTROL_BAR)
+            search, (offset_x, offset_y) = control_bar.crop(screenshot, self.scale_factor)
+            print(f"    Searching control bar {control_bar}")
+        
+        # Try multiple scales
+        scales = (0.8, 0.9, 1.0, 1.1, 1.2)
+        
+        for template_name in template_names:
+            print(f"    Testing template: {template_name}")
             
-            for scale in scales:
-                scaled_template = cv2.resize(template, None, fx=scale, fy=scale)
-                result = cv2.matchTemplate(screenshot, scaled_template, cv2.TM_CCOEFF_NORMED)
+            for level in bank.pyramid(template_name, scales):
+                if level.height > search.shape[0] or level.width > search.shape[1]:
+                    continue
+                result = cv2.matchTemplate(search, level.image, cv2.TM_CCOEFF_NORMED)
                 min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+                max_loc = (max_loc[0] + offset_x, max_loc[1] + offset_y)
                 
                 if max_val > 0.5:  # Lower threshold for more matches
-                    h, w = scaled_template.shape[:2]
+                    h, w = level.height, level.width
                     match_info = {
                         'location': max_loc,
                         'size': (w, h),
                         'confidence': max_val,
-                        'template': template_file.name,
-                        'scale': scale
+                        'template': template_name,
+                        'scale': level.scale
                     }
                     all_matches.append(match_info)
                     
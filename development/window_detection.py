@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Window Detection - Template matching limited to the QuickTime window
+Takes the window geometry once and derives the regions where the controls
+can be: the control bar along the bottom of the window and the AirPlay
+popup around the button. Matchers only see those crops of the screenshot,
+a small fraction of a full Retina capture.
+
+Matching is exhaustive (every template level over every pixel) or coarse
+to fine: every level is matched on a downsampled copy, and only the best
+few candidates are matched again at full resolution in a small window.
+Exhaustive matching spreads the (template, scale, region) grid over a
+thread pool - cv2.matchTemplate releases the GIL - and stops early once a
+match is good enough or the latency budget is spent.
+
+Screenshots are full-screen captures in pixels; regions and results are
+in screen points (what AppleScript and cliclick use).
+"""
+
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+
+from template_bank import CAPTURE_SCALE, TEMPLATE_DIR, get_bank
+
+
+# Where QuickTime draws its controls, as (left, top, right, bottom) fractions of the window
+CONTROL_BAR = (0.1, 0.6, 0.9, 1.0)
+
+# AirPlay popup around the button in points (left, top, right, bottom); it opens above
+POPUP_AROUND_BUTTON = (-250, -450, 250, 150)
+
+DEFAULT_SCALES = (0.8, 0.9, 1.0, 1.1, 1.2)
+
+# Coarse-to-fine search: downsampling factor, candidates refined at full
+# resolution, and full-resolution pixels searched around each candidate
+COARSE_FACTOR = 4
+COARSE_CANDIDATES = 3
+REFINE_MARGIN = 6
+
+# Templates are not downsampled below this many pixels on their short side
+MIN_COARSE_SIZE = 8
+
+# Parallel matching: worker threads, the confidence that ends a search
+# early, and the default latency budget in seconds. None searches
+# everything; a budget can return a worse match than the full search
+MATCH_THREADS = min(8, os.cpu_count() or 1)
+EARLY_EXIT_CONFIDENCE = 0.95
+MATCH_BUDGET = None
+
+
+class Region:
+    """Rectangle in screen points"""
+    
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+    
+    def __repr__(self):
+        return f"Region({self.x}, {self.y}, {self.width}, {self.height})"
+    
+    def fraction(self, left, top, right, bottom):
+        """Sub-region given as fractions of this one"""
+        return Region(self.x + self.width * left, self.y + self.height * top,
+                      self.width * (right - left), self.height * (bottom - top))
+    
+    def pixels(self, scale, shape):
+        """(x1, y1, x2, y2) in screenshot pixels, clipped to an image of shape"""
+        x1 = min(max(0, int(self.x * scale)), shape[1])
+        y1 = min(max(0, int(self.y * scale)), shape[0])
+        x2 = min(max(0, int((self.x + self.width) * scale)), shape[1])
+        y2 = min(max(0, int((self.y + self.height) * scale)), shape[0])
+        return x1, y1, x2, y2
+    
+    def crop(self, image, scale):
+        """The part of a full-screen image inside this region, and its pixel offset"""
+        x1, y1, x2, y2 = self.pixels(scale, image.shape)
+        return image[y1:y2, x1:x2], (x1, y1)
+
+
+def quicktime_window():
+    """Region of QuickTime's front window, or None"""
+    script = '''
+    tell application "System Events"
+        tell process "QuickTime Player"
+            if exists window 1 then
+                set windowPos to position of window 1
+                set windowSize to size of window 1
+                return (item 1 of windowPos as string) & "," & ¬
+                       (item 2 of windowPos as string) & "," & ¬
+                       (item 1 of windowSize as string) & "," & ¬
+                       (item 2 of windowSize as string)
+            end if
+        end tell
+    end tell
+    '''
+    result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+    try:
+        x, y, width, height = (int(value) for value in result.stdout.strip().split(','))
+    except ValueError:
+        return None
+    return Region(x, y, width, height)
+
+
+def screen_scale():
+    """Backing scale factor of the main screen; CAPTURE_SCALE (Retina) if it cannot be asked"""
+    try:
+        from AppKit import NSScreen
+    except ImportError:
+        return CAPTURE_SCALE
+    screen = NSScreen.mainScreen()
+    return screen.backingScaleFactor() if screen else CAPTURE_SCALE
+
+
+def _match(image, template):
+    """(confidence, top-left) of the best match of template in image"""
+    _, max_val, _, max_loc = cv2.minMaxLoc(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED))
+    return max_val, max_loc
+
+
+def match_exhaustive(gray, levels):
+    """Best (confidence, top-left, level) of all levels over all of gray, or None"""
+    best = None
+    for level in levels:
+        if level.height > gray.shape[0] or level.width > gray.shape[1]:
+            continue
+        value, location = _match(gray, level.gray)
+        if best is None or value > best[0]:
+            best = (value, location, level)
+    return best
+
+
+def match_coarse_to_fine(gray, levels, factor=COARSE_FACTOR, candidates=COARSE_CANDIDATES, margin=REFINE_MARGIN):
+    """Like match_exhaustive, but only the best candidates of a downsampled search are matched at full size
+    
+    Each level is downsampled by factor, or less if that would leave it
+    under MIN_COARSE_SIZE pixels.
+    """
+    reduced = {1: gray}
+    found = []
+    for level in levels:
+        if level.height > gray.shape[0] or level.width > gray.shape[1]:
+            continue
+        level_factor = max(1, min(factor, min(level.height, level.width) // MIN_COARSE_SIZE))
+        if level_factor not in reduced:
+            reduced[level_factor] = cv2.resize(gray, (gray.shape[1] // level_factor, gray.shape[0] // level_factor),
+                                               interpolation=cv2.INTER_AREA)
+        small = reduced[level_factor]
+        template = level.gray
+        if level_factor > 1:
+            template = cv2.resize(template, (level.width // level_factor, level.height // level_factor),
+                                  interpolation=cv2.INTER_AREA)
+        if template.shape[0] > small.shape[0] or template.shape[1] > small.shape[1]:
+            continue
+        value, location = _match(small, template)
+        found.append((value, (location[0] * level_factor, location[1] * level_factor), level, level_factor))
+    
+    best = None
+    for _, (x, y), level, level_factor in sorted(found, key=lambda item: item[0], reverse=True)[:candidates]:
+        pad = margin + level_factor
+        x1, y1 = max(0, x - pad), max(0, y - pad)
+        x2 = min(gray.shape[1], x + level.width + pad)
+        y2 = min(gray.shape[0], y + level.height + pad)
+        value, location = _match(gray[y1:y2, x1:x2], level.gray)
+        if best is None or value > best[0]:
+            best = (value, (x1 + location[0], y1 + location[1]), level)
+    return best
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(threads):
+    """Shared thread pool per size, so a detection does not pay for starting threads"""
+    with _pools_lock:
+        pool = _pools.get(threads)
+        if pool is None:
+            pool = _pools[threads] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='match')
+        return pool
+
+
+def match_parallel(jobs, threads=MATCH_THREADS, early_exit=EARLY_EXIT_CONFIDENCE, budget=None, stats=None):
+    """Best (confidence, top-left, level) over (gray, offset, level) jobs, matched on threads
+    
+    Levels nearest scale 1.0 go first. Once a match reaches early_exit, or
+    budget seconds have passed, jobs not yet started are skipped and the best
+    match so far is returned; a search cut short by the budget is reported.
+    The top-left includes the job's offset. stats, if given, gets the count
+    of matched jobs, of jobs skipped by the early exit or budget, of jobs
+    whose template is larger than the search area (too_big), and why the
+    search ended ('done', 'early exit' or 'budget').
+    """
+    deadline = time.monotonic() + budget if budget is not None else None
+    stop = threading.Event()
+    fitting = [job for job in jobs if job[2].height <= job[0].shape[0] and job[2].width <= job[0].shape[1]]
+    too_big = len(jobs) - len(fitting)
+    jobs = sorted(fitting, key=lambda job: abs(job[2].scale - 1.0))
+    
+    def run(job):
+        gray, (offset_x, offset_y), level = job
+        if stop.is_set():
+            return None
+        if deadline is not None and time.monotonic() > deadline:
+            stop.set()
+            return None
+        value, location = _match(gray, level.gray)
+        return value, (offset_x + location[0], offset_y + location[1]), level
+    
+    best = None
+    matched = 0
+    reason = 'done'
+    if threads <= 1:
+        results = (run(job) for job in jobs)
+    else:
+        pending = {_pool(threads).submit(run, job) for job in jobs}
+        results = _as_finished(pending, deadline, stop)
+    for result in results:
+        if result is None:
+            continue
+        matched += 1
+        if best is None or result[0] > best[0]:
+            best = result
+        if best[0] >= early_exit:
+            stop.set()
+            reason = 'early exit'
+            break
+    if threads > 1:
+        results.close()
+    if reason == 'done' and stop.is_set():
+        reason = 'budget'
+        print(f"Match budget of {budget:g} s cut the search short: {matched} of {len(jobs)} matched")
+    
+    if stats is not None:
+        stats.update(matched=matched, skipped=len(jobs) - matched, too_big=too_big, reason=reason)
+    return best
+
+
+def _as_finished(pending, deadline, stop):
+    """Results of futures as they finish; when the deadline passes, cancel the rest"""
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                stop.set()
+                return
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class WindowDetector:
+    """Template matching inside one QuickTime window
+    
+    Give it the window Region once; control_bar() and popup() derive the
+    search regions from it and find() only ever matches inside regions,
+    coarse to fine when coarse is set, otherwise on threads within budget
+    seconds; a match found before the budget ran out has 'partial' set.
+    pixels_searched counts the pixels matched against, for comparison with
+    full-screen search; last_stats describes the last parallel search.
+    """
+    
+    def __init__(self, window, display_scale=2.0, template_dir=TEMPLATE_DIR, coarse=False,
+                 threads=MATCH_THREADS, budget=MATCH_BUDGET):
+        self.window = window
+        self.display_scale = display_scale
+        self.bank = get_bank(template_dir, display_scale)
+        self.coarse = coarse
+        self.threads = threads
+        self.budget = budget
+        self.pixels_searched = 0
+        self.last_stats = {}
+    
+    def control_bar(self):
+        return self.window.fraction(*CONTROL_BAR)
+    
+    def popup(self, button=None):
+        """Where the AirPlay menu opens: around the button if known, else most of the window"""
+        if button is None:
+            return self.window.fraction(0.1, 0.1, 0.9, 0.9)
+        left, top, right, bottom = POPUP_AROUND_BUTTON
+        return Region(button[0] + left, button[1] + top, right - left, bottom - top)
+    
+    def find(self, screenshot, names, region, scales=DEFAULT_SCALES, threshold=0.7):
+        """Best match of any of the templates inside region (or a list of regions), in points; None below threshold"""
+        crops = []
+        for area in region if isinstance(region, (list, tuple)) else [region]:
+            crop, offset = area.crop(screenshot, self.display_scale)
+            if crop.size == 0:
+                continue
+            if crop.ndim == 3:
+                crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            self.pixels_searched += crop.shape[0] * crop.shape[1]
+            crops.append((crop, offset))
+        
+        levels = [level for name in names for level in self.bank.pyramid(name, scales)]
+        self.last_stats = {}
+        if self.coarse:
+            best = None
+            for crop, (offset_x, offset_y) in crops:
+                match = match_coarse_to_fine(crop, levels)
+                if match and (best is None or match[0] > best[0]):
+                    best = (match[0], (offset_x + match[1][0], offset_y + match[1][1]), match[2])
+        else:
+            jobs = [(crop, offset, level) for crop, offset in crops for level in levels]
+            best = match_parallel(jobs, self.threads, budget=self.budget, stats=self.last_stats)
+        if best is None or best[0] < threshold:
+            return None
+        max_val, (left, top), level = best
+        return {
+            'partial': self.last_stats.get('reason') == 'budget',
+            'x': (left + level.width // 2) / self.display_scale,
+            'y': (top + level.height // 2) / self.display_scale,
+            'confidence': max_val,
+            'template': level.name,
+            'scale': level.scale,
+            'top_left': (left, top),
+            'size': (level.width, level.height)
+        }
+    
+    def find_airplay_button(self, screenshot, threshold=0.7):
+        """AirPlay button in the control bar"""
+        return self.find(screenshot, self.bank.names("airplay*.png"), self.control_bar(), threshold=threshold)
+    
+    def find_apple_tv(self, screenshot, button=None, threshold=0.6):
+        """Apple TV entry in the AirPlay popup"""
+        return self.find(screenshot, self.bank.names("apple_tv*.png"), self.popup(button), threshold=threshold)
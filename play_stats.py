@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Play Statistics - Records plays, skips and finishes into the track library
+Events are queued from the UI thread and written in batches by a background
+thread, so logging never adds latency to track changes
+"""
+
+import queue
+import sqlite3
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from track_library import DEFAULT_DB, connect
+
+
+UPSERT_SQL = '''
+INSERT INTO play_stats (path, play_count, skip_count, finish_count, last_played, completion, completion_count)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    play_count = play_count + excluded.play_count,
+    skip_count = skip_count + excluded.skip_count,
+    finish_count = finish_count + excluded.finish_count,
+    last_played = CASE
+        WHEN excluded.last_played IS NULL THEN last_played
+        WHEN last_played IS NULL THEN excluded.last_played
+        ELSE MAX(last_played, excluded.last_played)
+    END,
+    completion = CASE
+        WHEN excluded.completion IS NULL THEN completion
+        WHEN completion IS NULL OR completion_count = 0 THEN excluded.completion
+        ELSE (completion * completion_count + excluded.completion * excluded.completion_count)
+             / (completion_count + excluded.completion_count)
+    END,
+    completion_count = completion_count + excluded.completion_count
+'''
+
+
+def aggregate(events):
+    """Fold queued events into one row per path"""
+    rows = {}
+    for kind, path, timestamp, completion in events:
+        row = rows.setdefault(path, {
+            'play': 0, 'skip': 0, 'finish': 0, 'last_played': None, 'ratios': []
+        })
+        row[kind] += 1
+        if kind == 'play':
+            row['last_played'] = max(row['last_played'] or 0, timestamp)
+        elif completion is not None:
+            row['ratios'].append(max(0.0, min(1.0, completion)))
+    return rows
+
+
+class PlayStatsRecorder(QThread):
+    """Background writer for play statistics
+    
+    record_* only put a tuple on a queue. The thread writes everything
+    gathered within flush_interval seconds (or max_batch events) in one
+    transaction and reports the affected paths through stats_flushed.
+    """
+    
+    stats_flushed = pyqtSignal(list)  # paths whose statistics changed
+    
+    def __init__(self, db_path=DEFAULT_DB, flush_interval=5.0, max_batch=200, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.events = queue.Queue()
+    
+    def record_play(self, path):
+        """A track started playing"""
+        self.events.put(('play', path, time.time(), None))
+    
+    def record_skip(self, path, completion=None):
+        """A track was left before it ended; completion is the fraction played"""
+        self.events.put(('skip', path, time.time(), completion))
+    
+    def record_finish(self, path, completion=1.0):
+        """A track played to the end"""
+        self.events.put(('finish', path, time.time(), completion))
+    
+    def stop(self):
+        """Flush pending events and end the thread"""
+        self.events.put(None)
+        self.wait(5000)
+    
+    def run(self):
+        conn = connect(self.db_path)
+        try:
+            running = True
+            while running:
+                batch = []
+                deadline = None
+                while len(batch) < self.max_batch:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    try:
+                        event = self.events.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        running = False
+                        break
+                    batch.append(event)
+                    if deadline is None:
+                        # First event of a batch starts the flush clock
+                        deadline = time.monotonic() + self.flush_interval
+                if batch:
+                    self._flush(conn, batch)
+        finally:
+            conn.close()
+    
+    def _flush(self, conn, batch):
+        """Write one batch in a single transaction"""
+        params = []
+        for path, row in aggregate(batch).items():
+            ratios = row['ratios']
+            completion = sum(ratios) / len(ratios) if ratios else None
+            params.append((
+                path, row['play'], row['skip'], row['finish'], row['last_played'],
+                completion, len(ratios)
+            ))
+        try:
+            with conn:
+                conn.executemany(UPSERT_SQL, params)
+        except sqlite3.Error as e:
+            print(f"Play statistics write error: {e}")
+            return
+        self.stats_flushed.emit([p[0] for p in params])
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Player Backend - What the playlist apps need from a media player
+QuickTimeBackend drives QuickTime Player through AppleScript;
+SimulatedBackend models open/close latency and track durations in
+accelerated (or fully virtual) time, so playlist logic can be exercised
+and benchmarked on machines without QuickTime
+"""
+
+import random
+import subprocess
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from quicktime_player import (PlayerStatus, call_player, query_status,
+                              preload_document, switch_to_document)
+
+
+class PlayerBackend:
+    """Interface used by the playlist apps; all methods may block"""
+    
+    name = "player"
+    
+    def __init__(self):
+        self.calls = Counter()  # method name -> times called (player round trips)
+        self.open_times = {'cold': [], 'warm': []}  # open() seconds by player state
+        self.generation = 0  # bumped whenever the player may have been relaunched
+    
+    def open(self, path, play=True):
+        """Close open documents and load path; start it if play. Raise on failure"""
+        raise NotImplementedError
+    
+    def warm_up(self):
+        """Make sure the player runs and answers, with no document open
+        
+        Returns "warm" if it was already running and "cold" if it had to be
+        (re)launched.
+        """
+        raise NotImplementedError
+    
+    def play(self):
+        """Play the front document; return True if it started"""
+        raise NotImplementedError
+    
+    def pause(self):
+        """Pause every document"""
+        raise NotImplementedError
+    
+    def status(self, document_name=None):
+        """PlayerStatus of the front document (or the named one)"""
+        raise NotImplementedError
+    
+    def close(self, keep_running=False):
+        """Close the front document; quit the player if it was the last, unless keep_running"""
+        raise NotImplementedError
+    
+    def close_all(self):
+        """Close every document and leave the player running"""
+        raise NotImplementedError
+    
+    def quit(self):
+        """Close every document and quit the player"""
+        raise NotImplementedError
+    
+    def kill(self):
+        """Force the player down at once (it may be wedged); must not block"""
+        raise NotImplementedError
+    
+    def seek(self, seconds):
+        """Move the front document to seconds"""
+        raise NotImplementedError
+    
+    def preload(self, path, keep_front_name):
+        """Open path paused behind the playing document; return its name or None"""
+        return None
+    
+    def switch(self, name):
+        """Play a preloaded document and close the rest; return True on success"""
+        return False
+    
+    def route_state(self, markers):
+        """Whether the front window shows the AirPlay route: 'on', 'off' or 'unknown'"""
+        return "unknown"
+    
+    def record_open(self, launch, seconds):
+        self.open_times[launch].append(seconds)
+    
+    def open_summary(self):
+        """One line of open latency, cold launch against warm player"""
+        parts = []
+        for launch in ('cold', 'warm'):
+            times = self.open_times[launch]
+            if times:
+                parts.append(f"{launch} {sum(times) / len(times):.2f}s x{len(times)}")
+        return "open " + (", ".join(parts) or "not measured")
+
+
+class QuickTimeBackend(PlayerBackend):
+    """QuickTime Player through the AppleScript bridge
+    
+    call runs a handler of the precompiled QUICKTIME_LIBRARY, so file
+    paths are passed as arguments and no script is compiled per track.
+    """
+    
+    name = "QuickTime Player"
+    
+    def __init__(self, call=call_player):
+        super().__init__()
+        self.call = call
+    
+    def open(self, path, play=True):
+        self.calls['open'] += 1
+        started = time.monotonic()
+        # Close existing QuickTime documents; this also tells a warm player
+        # from a cold launch
+        launch = self._warm_up()
+        
+        # With AirPlay on, just load; playback starts once AirPlay is set up.
+        # Opening waits up to ~7 s inside the handler itself
+        result = self.call('openTrack', str(path), bool(play), timeout=15)
+        
+        if result.stderr or "failed" in result.stdout:
+            raise Exception(result.stderr or "Failed to load document")
+        seconds = time.monotonic() - started
+        self.record_open(launch, seconds)
+        print(f"Opened {Path(path).name} in {seconds:.2f}s ({launch} player)")
+        return result.stdout.strip()
+    
+    def warm_up(self):
+        self.calls['warm_up'] += 1
+        return self._warm_up()
+    
+    def _warm_up(self):
+        try:
+            result = self.call('warmUp', timeout=5)
+        except Exception as e:
+            # A player that does not answer is killed here, rather than after
+            # the next open times out
+            print(f"QuickTime not answering ({e}); relaunching")
+            self.kill()
+            try:
+                result = self.call('warmUp', timeout=15)
+            except Exception:
+                return 'cold'
+        launch, _, closed = result.stdout.strip().partition('|')
+        if closed not in ('', '0'):
+            time.sleep(0.5)
+        if launch == 'warm':
+            return 'warm'
+        self.generation += 1
+        return 'cold'
+    
+    def play(self):
+        self.calls['play'] += 1
+        return "playing" in self.call('playFront').stdout
+    
+    def pause(self):
+        self.calls['pause'] += 1
+        self.call('pauseAll')
+    
+    def status(self, document_name=None):
+        self.calls['status'] += 1
+        return query_status(self.call, timeout=5, document_name=document_name)
+    
+    def close(self, keep_running=False):
+        self.calls['close'] += 1
+        if not keep_running:
+            self.generation += 1
+        try:
+            self.call('closeFront', bool(keep_running))
+            if keep_running:
+                print("Document closed; QuickTime kept running")
+            else:
+                print("Document closed and QuickTime quit if no documents remain")
+        except Exception as e:
+            print(f"Error closing document: {e}")
+            # Fallback: Force quit QuickTime
+            try:
+                self.call('quitPlayer')
+                print("Fallback: QuickTime force quit")
+            except:
+                pass
+    
+    def close_all(self):
+        self.calls['close_all'] += 1
+        try:
+            self.call('closeAll')
+        except:
+            pass
+    
+    def quit(self):
+        self.calls['quit'] += 1
+        self.generation += 1
+        try:
+            self.call('quitPlayer', timeout=10)
+            print("QuickTime stopped and quit")
+        except:
+            # Fallback: Kill QuickTime process
+            try:
+                subprocess.run(['pkill', '-f', 'QuickTime Player'], capture_output=True)
+                print("QuickTime force killed")
+            except:
+                pass
+    
+    def kill(self):
+        self.calls['kill'] += 1
+        self.generation += 1
+        # A wedged QuickTime also fails the osascript call waiting on it
+        subprocess.run(['pkill', '-f', 'QuickTime Player'], capture_output=True, timeout=5)
+    
+    def seek(self, seconds):
+        self.calls['seek'] += 1
+        self.call('seekTo', float(seconds))
+    
+    def preload(self, path, keep_front_name):
+        self.calls['preload'] += 1
+        return preload_document(path, keep_front_name, call=self.call)
+    
+    def switch(self, name):
+        self.calls['switch'] += 1
+        return switch_to_document(name, call=self.call)
+    
+    def route_state(self, markers):
+        self.calls['route_state'] += 1
+        try:
+            state = self.call('airplayRoute', '\n'.join(markers), timeout=5).stdout.strip()
+        except Exception:
+            return "unknown"
+        return state if state in ("on", "off") else "unknown"
+
+
+class VirtualClock:
+    """Deterministic clock for simulations: sleep() advances time instantly"""
+    
+    def __init__(self, start=0.0):
+        self.now = start
+    
+    def time(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class _SimulatedDocument:
+    def __init__(self, path, duration):
+        self.path = path
+        self.name = Path(path).name
+        self.duration = duration
+        self.position = 0.0  # media seconds at playing_since
+        self.playing_since = None  # clock time playback (re)started, None if paused
+    
+    def current_time(self, now, speed):
+        if self.playing_since is None:
+            return self.position
+        return min(self.duration, self.position + (now - self.playing_since) * speed)
+    
+    def is_playing(self, now, speed):
+        return self.playing_since is not None and self.current_time(now, speed) < self.duration
+    
+    def start(self, now):
+        if self.playing_since is None:
+            self.playing_since = now
+    
+    def stop(self, now, speed):
+        self.position = self.current_time(now, speed)
+        self.playing_since = None
+
+
+class SimulatedBackend(PlayerBackend):
+    """Stand-in player with configurable latencies and accelerated playback
+    
+    Latencies are in clock seconds and track lengths in media seconds;
+    media time runs speed times faster than the clock, so with speed=600
+    a 3 minute track ends after 0.3 s. durations maps paths to lengths
+    (default_duration for the rest). Pass a VirtualClock's time/sleep for
+    a fully deterministic run that never really waits.
+    """
+    
+    name = "Simulated player"
+    
+    def __init__(self, durations=None, default_duration=180.0, speed=1.0,
+                 open_latency=0.8, close_latency=0.3, command_latency=0.02,
+                 launch_latency=0.0, jitter=0.0, seed=0, clock=time.monotonic,
+                 sleep=time.sleep):
+        super().__init__()
+        self.durations = dict(durations or {})
+        self.default_duration = default_duration
+        self.speed = speed
+        self.open_latency = open_latency
+        self.launch_latency = launch_latency
+        self.close_latency = close_latency
+        self.command_latency = command_latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+        self.documents = []  # front document last
+        self._lock = threading.Lock()
+    
+    def _wait(self, latency):
+        """Spend a command's latency, +/- jitter"""
+        if self.jitter:
+            latency *= 1.0 + self.random.uniform(-self.jitter, self.jitter)
+        if latency > 0:
+            self.sleep(latency)
+    
+    def _launch(self):
+        """Start the player if it is down; return 'warm' or 'cold'"""
+        if self.running:
+            return 'warm'
+        self._wait(self.launch_latency)
+        self.running = True
+        self.generation += 1
+        return 'cold'
+    
+    def _front(self):
+        return self.documents[-1] if self.documents else None
+    
+    def _named(self, name):
+        for doc in self.documents:
+            if doc.name == name:
+                return doc
+        return None
+    
+    def duration_of(self, path):
+        return float(self.durations.get(path, self.default_duration))
+    
+    def open(self, path, play=True):
+        self.calls['open'] += 1
+        with self._lock:
+            started = self.clock()
+            launch = self._launch()
+            if self.documents:
+                self._wait(self.close_latency)
+                self.documents = []
+            self._wait(self.open_latency)
+            doc = _SimulatedDocument(path, self.duration_of(path))
+            self.documents.append(doc)
+            if play:
+                doc.start(self.clock())
+            self.record_open(launch, self.clock() - started)
+            return "playing" if play else "ready"
+    
+    def warm_up(self):
+        self.calls['warm_up'] += 1
+        with self._lock:
+            launch = self._launch()
+            if self.documents:
+                self._wait(self.close_latency)
+                self.documents = []
+            else:
+                self._wait(self.command_latency)
+            return launch
+    
+    def play(self):
+        self.calls['play'] += 1
+        with self._lock:
+            self._wait(self.command_latency)
+            doc = self._front()
+            if doc is None:
+                return False
+            doc.start(self.clock())
+            return True
+    
+    def pause(self):
+        self.calls['pause'] += 1
+        with self._lock:
+            self._wait(self.command_latency)
+            now = self.clock()
+            for doc in self.documents:
+                doc.stop(now, self.speed)
+    
+    def status(self, document_name=None):
+        self.calls['status'] += 1
+        with self._lock:
+            self._wait(self.command_latency)
+            if not self.running:
+                return PlayerStatus('not_running')
+            if not self.documents:
+                return PlayerStatus('no_document')
+            doc = self._named(document_name) if document_name else self._front()
+            if doc is None:
+                return PlayerStatus('no_document', document_count=len(self.documents))
+            
+            now = self.clock()
+            current = doc.current_time(now, self.speed)
+            playing = doc.is_playing(now, self.speed)
+            if playing:
+                state = 'playing'
+            elif current >= doc.duration - 1:
+                state = 'finished'
+            else:
+                state = 'paused'
+            return PlayerStatus(state, playing, current, doc.duration, len(self.documents), doc.path)
+    
+    def close(self, keep_running=False):
+        self.calls['close'] += 1
+        with self._lock:
+            if self.documents:
+                self._wait(self.close_latency)
+                self.documents.pop()
+            if not self.documents and not keep_running:
+                self.running = False
+                self.generation += 1
+    
+    def close_all(self):
+        self.calls['close_all'] += 1
+        with self._lock:
+            if self.documents:
+                self._wait(self.close_latency)
+            self.documents = []
+    
+    def quit(self):
+        self.calls['quit'] += 1
+        with self._lock:
+            if self.documents:
+                self._wait(self.close_latency)
+            self.documents = []
+            self.running = False
+            self.generation += 1
+    
+    def kill(self):
+        self.calls['kill'] += 1
+        # No lock: the point is to work while a command holds it
+        self.documents = []
+        self.running = False
+        self.generation += 1
+    
+    def seek(self, seconds):
+        self.calls['seek'] += 1
+        with self._lock:
+            self._wait(self.command_latency)
+            doc = self._front()
+            if doc is not None:
+                now = self.clock()
+                doc.position = max(0.0, min(seconds, doc.duration))
+                if doc.playing_since is not None:
+                    doc.playing_since = now
+    
+    def preload(self, path, keep_front_name):
+        self.calls['preload'] += 1
+        with self._lock:
+            self._launch()
+            self._wait(self.open_latency)
+            doc = _SimulatedDocument(path, self.duration_of(path))
+            # Opened behind the playing document
+            self.documents.insert(max(0, len(self.documents) - 1), doc)
+            return doc.name
+    
+    def switch(self, name):
+        self.calls['switch'] += 1
+        with self._lock:
+            self._wait(self.command_latency)
+            doc = self._named(name)
+            if doc is None:
+                return False
+            doc.start(self.clock())
+            self.documents = [doc]
+            return True
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Player Commands - Runs QuickTime commands on a dedicated thread
+Qt slots submit commands and get their results back through signals,
+so the window keeps responding however slow QuickTime or osascript is
+"""
+
+import itertools
+import queue
+import threading
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+# Commands that open, close or end documents or the player; never dropped
+LIFECYCLE_COMMANDS = frozenset({"open", "close", "stop", "quit", "warm_up", "switch", "play", "pause", "airplay"})
+
+# Longest a closing window waits for the player thread before abandoning it
+PLAYER_STOP_WAIT_MS = 2000
+
+# Executors left running by abandon(); referenced so Qt never destroys a running thread
+_abandoned = set()
+
+
+class PlayerCommand:
+    """One queued call and its callbacks"""
+    
+    def __init__(self, command_id, name, func, args, on_done=None, on_error=None, group=None):
+        self.command_id = command_id
+        self.name = name
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.group = group
+        self.cancelled = False
+        self.queued_at = time.monotonic()
+
+
+class PlayerCommandExecutor(QThread):
+    """Serial executor for player commands
+    
+    Commands run one at a time in submission order, so QuickTime sees
+    them in the order they were issued. Each command bounds itself with
+    its own timeout (the AppleScript bridge raises TimeoutExpired), and a
+    failure reaches on_error instead of the UI thread's stack. on_done and
+    on_error are always called on the Qt main thread. cancel() drops
+    queued commands and discards the result of one already running.
+    At most max_pending live commands wait; beyond that a new command
+    replaces the oldest queued one of the same name (a status check or
+    seek it makes obsolete), so a slow player cannot build an endless
+    backlog. LIFECYCLE_COMMANDS are never dropped.
+    """
+    
+    command_started = pyqtSignal(int, str)  # id, name
+    command_finished = pyqtSignal(int, str, float)  # id, name, seconds
+    command_failed = pyqtSignal(int, str, str)  # id, name, error
+    _deliver = pyqtSignal(object, object, object)  # command, callback, value
+    
+    def __init__(self, parent=None, max_pending=16):
+        super().__init__(parent)
+        self.commands = queue.Queue()
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = []  # queued or running
+        self._running = None
+        self._running_since = None
+        self._deliver.connect(self._call)
+    
+    def submit(self, name, func, *args, on_done=None, on_error=None, group=None):
+        """Queue func(*args); return the PlayerCommand"""
+        command = PlayerCommand(next(self._ids), name, func, args, on_done, on_error, group)
+        dropped = None
+        with self._lock:
+            live = [c for c in self._pending if not c.cancelled and c is not self._running]
+            if self.max_pending and len(live) >= self.max_pending and name not in LIFECYCLE_COMMANDS:
+                # The running command cannot be interrupted; drop the one this supersedes
+                superseded = [c for c in live if c.name == name]
+                if superseded:
+                    dropped = superseded[0]
+                    dropped.cancelled = True
+                    self.dropped += 1
+            self._pending.append(command)
+        self.commands.put(command)
+        if dropped:
+            print(f"Player command queue full, dropped '{dropped.name}'")
+        return command
+    
+    def cancel(self, group=None):
+        """Cancel pending commands in group (all if None); return how many"""
+        with self._lock:
+            cancelled = [c for c in self._pending
+                         if not c.cancelled and (group is None or c.group == group)]
+            for command in cancelled:
+                command.cancelled = True
+        return len(cancelled)
+    
+    def pending_count(self, group=None):
+        """Commands queued or running that are not cancelled"""
+        with self._lock:
+            return sum(1 for c in self._pending
+                       if not c.cancelled and (group is None or c.group == group))
+    
+    def running_for(self):
+        """Seconds the current command has been running (0 if idle)"""
+        with self._lock:
+            if self._running is None:
+                return 0.0
+            return time.monotonic() - self._running_since
+    
+    def stop(self, wait_ms=15000):
+        """Finish the commands already queued, then end the thread; True if it ended within wait_ms"""
+        self.commands.put(None)
+        return self.wait(wait_ms)
+    
+    def abandon(self):
+        """Give up on a stopped thread stuck in a command; it ends once that returns"""
+        self.cancel()
+        _abandoned.add(self)
+        self.finished.connect(lambda: _abandoned.discard(self))
+    
+    def run(self):
+        while True:
+            command = self.commands.get()
+            if command is None:
+                break
+            if command.cancelled:
+                self._forget(command)
+                continue
+            
+            with self._lock:
+                self._running = command
+                self._running_since = time.monotonic()
+            self.command_started.emit(command.command_id, command.name)
+            started = time.monotonic()
+            try:
+                result = command.func(*command.args)
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            elapsed = time.monotonic() - started
+            self._forget(command)
+            if command.cancelled:
+                continue
+            
+            if error is None:
+                self.command_finished.emit(command.command_id, command.name, elapsed)
+                if command.on_done:
+                    self._deliver.emit(command, command.on_done, result)
+            else:
+                message = str(error) or type(error).__name__
+                self.command_failed.emit(command.command_id, command.name, message)
+                if command.on_error:
+                    self._deliver.emit(command, command.on_error, error)
+                else:
+                    print(f"Player command '{command.name}' failed: {message}")
+    
+    def _forget(self, command):
+        with self._lock:
+            if command is self._running:
+                self._running = None
+            if command in self._pending:
+                self._pending.remove(command)
+    
+    def _call(self, command, callback, value):
+        """Main thread: run a callback unless its command was cancelled meanwhile"""
+        if not command.cancelled:
+            callback(value)
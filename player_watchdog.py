@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Player Watchdog - Notices a wedged QuickTime before playback stalls
+Keeps a running view of command round-trip latency and failures, decides
+when the player needs a restart, spaces restarts out with exponential
+backoff and records how long each recovery took
+"""
+
+import time
+from collections import deque
+
+
+class PlayerWatchdog:
+    """Health bookkeeping for the player; the app does the actual restart
+    
+    Feed it every command's round trip (record_latency) and failure
+    (record_failure), and call check() periodically with how long the
+    running command has been blocked. check() returns a reason string when
+    the player looks wedged: a command stuck past stall_timeout, several
+    failures in a row, or several quick commands in a row slower than
+    slow_threshold. begin_restart() returns how long to wait before
+    restarting (base_backoff doubling up to max_backoff, back to the base
+    once the player has run stable_period without trouble); recovered()
+    closes the incident once a track is playing again.
+    """
+    
+    # Commands that should answer quickly; open, close and AirPlay include
+    # deliberate delays and would skew the latency picture
+    PROBED_COMMANDS = ('status', 'probe', 'play', 'pause', 'switch', 'seek')
+    
+    def __init__(self, slow_threshold=3.0, slow_limit=3, failure_limit=3,
+                 stall_timeout=20.0, probe_interval=10.0, base_backoff=2.0,
+                 max_backoff=120.0, stable_period=300.0, recovery_timeout=60.0,
+                 clock=time.monotonic):
+        self.slow_threshold = slow_threshold
+        self.slow_limit = slow_limit
+        self.failure_limit = failure_limit
+        self.stall_timeout = stall_timeout
+        self.probe_interval = probe_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_period = stable_period
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        
+        self.latencies = deque(maxlen=50)  # recent round trips (seconds)
+        self.average_latency = None  # exponentially weighted
+        self.last_sample_at = None
+        self.consecutive_slow = 0
+        self.consecutive_failures = 0
+        
+        self.restart_count = 0
+        self.recovery_times = []
+        self.restarting_since = None  # start of the current incident
+        self.attempt_started = None  # start of the current restart attempt
+        self.attempt_delay = 0.0
+        self.backoff_level = 0
+        self.last_recovered_at = None
+    
+    @property
+    def restarting(self):
+        return self.restarting_since is not None
+    
+    def record_latency(self, name, seconds):
+        """A command completed after seconds"""
+        self.consecutive_failures = 0
+        if name not in self.PROBED_COMMANDS:
+            return
+        self.latencies.append(seconds)
+        self.last_sample_at = self.clock()
+        if self.average_latency is None:
+            self.average_latency = seconds
+        else:
+            self.average_latency = 0.8 * self.average_latency + 0.2 * seconds
+        if seconds > self.slow_threshold:
+            self.consecutive_slow += 1
+        else:
+            self.consecutive_slow = 0
+    
+    def record_failure(self, name):
+        """A command raised or timed out"""
+        self.consecutive_failures += 1
+    
+    def needs_probe(self):
+        """True if no quick command has been timed for probe_interval"""
+        return (self.last_sample_at is None
+                or self.clock() - self.last_sample_at >= self.probe_interval)
+    
+    def check(self, running_for=0.0):
+        """Reason the player needs a restart, or None if it looks healthy"""
+        if self.restarting:
+            waited = self.clock() - self.attempt_started
+            if waited > self.attempt_delay + self.recovery_timeout:
+                return f"no recovery {waited:.0f}s after restart"
+            return None
+        if running_for > self.stall_timeout:
+            return f"command blocked for {running_for:.0f}s"
+        if self.consecutive_failures >= self.failure_limit:
+            return f"{self.consecutive_failures} commands failed in a row"
+        if self.consecutive_slow >= self.slow_limit:
+            return (f"{self.consecutive_slow} slow round trips "
+                    f"(average {self.average_latency:.1f}s)")
+        return None
+    
+    def begin_restart(self, reason=None):
+        """Start a restart attempt; return seconds to wait before relaunching"""
+        now = self.clock()
+        if (self.last_recovered_at is not None and not self.restarting
+                and now - self.last_recovered_at >= self.stable_period):
+            self.backoff_level = 0
+        delay = min(self.max_backoff, self.base_backoff * 2 ** self.backoff_level)
+        self.backoff_level += 1
+        self.restart_count += 1
+        if not self.restarting:
+            self.restarting_since = now
+        self.attempt_started = now
+        self.attempt_delay = delay
+        self.consecutive_slow = 0
+        self.consecutive_failures = 0
+        return delay
+    
+    def recovered(self):
+        """Playback is back; return the incident's recovery time or None"""
+        if not self.restarting:
+            return None
+        now = self.clock()
+        seconds = now - self.restarting_since
+        self.recovery_times.append(seconds)
+        self.restarting_since = None
+        self.attempt_started = None
+        self.last_recovered_at = now
+        return seconds
+    
+    def cancel(self):
+        """Abandon a restart (the user stopped playback)"""
+        self.restarting_since = None
+        self.attempt_started = None
+    
+    def summary(self):
+        """One line of restart statistics"""
+        text = f"{self.restart_count} restarts"
+        if self.recovery_times:
+            average = sum(self.recovery_times) / len(self.recovery_times)
+            text += (f", recovery avg {average:.1f}s / "
+                     f"max {max(self.recovery_times):.1f}s")
+        if self.average_latency is not None:
+            text += f", round trip {self.average_latency * 1000:.0f} ms"
+        return text
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Playlist Edit - Bulk row removal and moves with index remapping
+Removing thousands of rows is one linear pass instead of one list shift per row
+"""
+
+
+def compaction_map(length, removed_rows):
+    """Map every old row to its new row, or -1 if removed"""
+    removed = set(removed_rows)
+    mapping = []
+    next_row = 0
+    for row in range(length):
+        if row in removed:
+            mapping.append(-1)
+        else:
+            mapping.append(next_row)
+            next_row += 1
+    return mapping
+
+
+def compact(items, mapping):
+    """Return items with the removed rows left out"""
+    return [item for item, new_row in zip(items, mapping) if new_row >= 0]
+
+
+def remap_indices(indices, mapping):
+    """Translate a list of row indices, dropping removed and out-of-range rows"""
+    length = len(mapping)
+    return [mapping[i] for i in indices if 0 <= i < length and mapping[i] >= 0]
+
+
+def remap_current(current, mapping):
+    """Translate the current row: -1 if there was none, None if it was removed
+    
+    The shuffle queue and history go through remap_indices on their own,
+    so a removed current track never stands in for another one.
+    """
+    if not 0 <= current < len(mapping):
+        return -1
+    if mapping[current] >= 0:
+        return mapping[current]
+    return None
+
+
+def move_map(length, start, end, destination):
+    """Map every old row to its new row once rows start..end move before row destination
+    
+    destination counts rows before the move, like QAbstractItemModel.rowsMoved.
+    """
+    rows = list(range(length))
+    block = rows[start:end + 1]
+    rest = rows[:start] + rows[end + 1:]
+    position = destination - len(block) if destination > end else destination
+    order = rest[:position] + block + rest[position:]
+    mapping = [0] * length
+    for new_row, old_row in enumerate(order):
+        mapping[old_row] = new_row
+    return mapping
+
+
+def reorder(items, mapping):
+    """Return items placed at their new rows"""
+    result = [None] * len(items)
+    for item, new_row in zip(items, mapping):
+        result[new_row] = item
+    return result
+
+
+def removal_ranges(removed_rows):
+    """Group rows into (start, count) runs, last run first so earlier starts stay valid"""
+    ranges = []
+    for row in sorted(set(removed_rows)):
+        if ranges and ranges[-1][0] + ranges[-1][1] == row:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([row, 1])
+    return [(start, count) for start, count in reversed(ranges)]
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Playlist Formats - Streaming M3U/M3U8/PLS import and export
+Entries are yielded one at a time so playlists with tens of thousands
+of tracks can be read without loading the whole file into memory
+"""
+
+import os
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+
+M3U_EXTENSIONS = ('.m3u', '.m3u8')
+PLS_EXTENSIONS = ('.pls',)
+PLAYLIST_EXTENSIONS = M3U_EXTENSIONS + PLS_EXTENSIONS
+
+# Rows added to the playlist widget per event-loop turn while importing
+IMPORT_BATCH_SIZE = 500
+
+_PLS_KEY = re.compile(r'^(file|title|length)(\d+)$', re.IGNORECASE)
+
+# C:\Music\..., C:/Music/... or \\server\share\... - meaningless on a Mac
+_WINDOWS_ABSOLUTE = re.compile(r'^(/?[A-Za-z]:[\\/]|\\\\)')
+
+
+class PlaylistEntry:
+    """One playlist entry: absolute path plus optional duration and title"""
+    
+    __slots__ = ('path', 'duration', 'title')
+    
+    def __init__(self, path, duration=None, title=None):
+        self.path = path
+        self.duration = duration  # seconds, None if unknown
+        self.title = title
+    
+    def __repr__(self):
+        return f"PlaylistEntry({self.path!r}, duration={self.duration!r}, title={self.title!r})"
+
+
+def _decode_line(raw, encoding):
+    """Decode one line; legacy .m3u files are often cp1252 rather than UTF-8"""
+    try:
+        return raw.decode(encoding)
+    except UnicodeDecodeError:
+        return raw.decode('cp1252', errors='replace')
+
+
+def _iter_lines(playlist_path):
+    """Yield stripped text lines, decoding line by line"""
+    with open(playlist_path, 'rb') as f:
+        first = True
+        for raw in f:
+            if first:
+                # Strip UTF-8 byte order mark
+                if raw.startswith(b'\xef\xbb\xbf'):
+                    raw = raw[3:]
+                first = False
+            line = _decode_line(raw, 'utf-8').strip()
+            if line:
+                yield line
+
+
+def resolve_location(location, base_dir):
+    """Turn a playlist location into an absolute local path
+    
+    None for remote URLs and for absolute Windows paths (drive letters or
+    UNC shares), which would otherwise be joined onto base_dir.
+    """
+    if '://' in location:
+        url = urlparse(location)
+        if url.scheme != 'file':
+            return None
+        location = unquote(url.path)
+    if _WINDOWS_ABSOLUTE.match(location):
+        return None
+    if '\\' in location and '/' not in location:
+        # Playlist written on Windows
+        location = location.replace('\\', '/')
+    
+    location = os.path.expanduser(location)
+    if not os.path.isabs(location):
+        location = os.path.join(base_dir, location)
+    return os.path.normpath(location)
+
+
+def _parse_duration(value):
+    """Parse a duration; -1 and garbage mean unknown"""
+    try:
+        duration = float(value)
+    except (TypeError, ValueError):
+        return None
+    return duration if duration >= 0 else None
+
+
+def iter_m3u(playlist_path, skipped=None):
+    """Yield PlaylistEntry objects from an M3U/M3U8 file, honouring #EXTINF
+    
+    Locations that are not local files are appended to skipped, if given.
+    """
+    base_dir = str(Path(playlist_path).resolve().parent)
+    duration = None
+    title = None
+    
+    for line in _iter_lines(playlist_path):
+        if line.startswith('#'):
+            if line.upper().startswith('#EXTINF:'):
+                # #EXTINF:<seconds>[ attributes],<title>
+                info, _, title_part = line[8:].partition(',')
+                duration = _parse_duration(info.split()[0] if info.split() else None)
+                title = title_part.strip() or None
+            continue
+        
+        path = resolve_location(line, base_dir)
+        if path:
+            yield PlaylistEntry(path, duration, title)
+        elif skipped is not None:
+            skipped.append(line)
+        duration = None
+        title = None
+
+
+def iter_pls(playlist_path, skipped=None):
+    """Yield PlaylistEntry objects from a PLS file in entry-number order
+    
+    Locations that are not local files are appended to skipped, if given.
+    """
+    base_dir = str(Path(playlist_path).resolve().parent)
+    pending = {}  # number -> {'file': ..., 'title': ..., 'length': ...}
+    
+    def flush(below=None):
+        for number in sorted(pending):
+            if below is not None and number >= below:
+                break
+            fields = pending.pop(number)
+            path = fields.get('file') and resolve_location(fields['file'], base_dir)
+            if path:
+                yield PlaylistEntry(path, _parse_duration(fields.get('length')), fields.get('title'))
+            elif fields.get('file') and skipped is not None:
+                skipped.append(fields['file'])
+    
+    for line in _iter_lines(playlist_path):
+        key, sep, value = line.partition('=')
+        if not sep:
+            continue
+        match = _PLS_KEY.match(key.strip())
+        if not match:
+            continue
+        field, number = match.group(1).lower(), int(match.group(2))
+        # Entries are normally grouped by number; emit finished ones as we pass them
+        if pending and number > max(pending):
+            yield from flush(below=number)
+        pending.setdefault(number, {})[field] = value.strip()
+    
+    yield from flush()
+
+
+def iter_playlist(playlist_path, skipped=None):
+    """Yield entries from any supported playlist format, chosen by extension"""
+    suffix = Path(playlist_path).suffix.lower()
+    if suffix in M3U_EXTENSIONS:
+        return iter_m3u(playlist_path, skipped)
+    if suffix in PLS_EXTENSIONS:
+        return iter_pls(playlist_path, skipped)
+    raise ValueError(f"Unsupported playlist format: {suffix}")
+
+
+def _location_for(track, base_dir, relative):
+    """Path to write for a track; relative when it lives under the playlist folder"""
+    if relative:
+        try:
+            rel = os.path.relpath(track, base_dir)
+        except ValueError:
+            rel = None
+        # "..foo.mp3" is inside the folder; only ".." itself or "../" leaves it
+        if rel and not (rel == '..' or rel.startswith('..' + os.sep)):
+            return rel
+    return track
+
+
+def write_m3u(playlist_path, tracks, durations=None, relative=True):
+    """Write an extended M3U/M3U8 playlist as UTF-8, one track at a time"""
+    durations = durations or {}
+    base_dir = str(Path(playlist_path).resolve().parent)
+    
+    with open(playlist_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('#EXTM3U\n')
+        for track in tracks:
+            duration = durations.get(track)
+            seconds = int(round(duration)) if duration is not None else -1
+            f.write(f'#EXTINF:{seconds},{Path(track).stem}\n')
+            f.write(_location_for(track, base_dir, relative) + '\n')
+
+
+def write_pls(playlist_path, tracks, durations=None, relative=True):
+    """Write a PLS playlist as UTF-8"""
+    durations = durations or {}
+    base_dir = str(Path(playlist_path).resolve().parent)
+    count = 0
+    
+    with open(playlist_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('[playlist]\n')
+        for count, track in enumerate(tracks, start=1):
+            duration = durations.get(track)
+            f.write(f'File{count}={_location_for(track, base_dir, relative)}\n')
+            f.write(f'Title{count}={Path(track).stem}\n')
+            f.write(f'Length{count}={int(round(duration)) if duration is not None else -1}\n')
+        f.write(f'NumberOfEntries={count}\n')
+        f.write('Version=2\n')
+
+
+def write_playlist(playlist_path, tracks, durations=None):
+    """Write tracks in the format implied by the file extension"""
+    suffix = Path(playlist_path).suffix.lower()
+    if suffix in M3U_EXTENSIONS:
+        write_m3u(playlist_path, tracks, durations)
+    elif suffix in PLS_EXTENSIONS:
+        write_pls(playlist_path, tracks, durations)
+    else:
+        raise ValueError(f"Unsupported playlist format: {suffix}")
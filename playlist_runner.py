@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Playlist Runner - Plays a whole queue inside one AppleScript session
+One osascript process opens, starts and waits out every track of the
+queue and reports each start and end as a line on stdout. Python only
+steps in again to hand over a new queue after an edit.
+"""
+
+import subprocess
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+# Events, one per stdout line, "|"-separated with free text last:
+#   start|<queue position>|<duration>|<opened, rewound or adopted>
+#   end|<queue position>|<finished or closed>
+#   error|<queue position>|<message>
+#   done|<tracks played>
+# Paths arrive as arguments (argv), never as source. "adopt" as the first
+# argument takes over the front document if it is already the first track,
+# so a new queue can be handed over without interrupting playback.
+RUNNER_SCRIPT = '''
+use AppleScript version "2.4"
+use framework "Foundation"
+use scripting additions
+
+property pollInterval : 0.25
+property idleInterval : 2
+property endLead : 1.5
+property maxSleep : 30
+
+on emit(eventText)
+    set stdout to current application's NSFileHandle's fileHandleWithStandardOutput()
+    set eventLine to current application's NSString's stringWithString:(eventText & linefeed)
+    stdout's writeData:(eventLine's dataUsingEncoding:(current application's NSUTF8StringEncoding))
+end emit
+
+on pathOf(doc)
+    try
+        tell application "QuickTime Player" to return POSIX path of (file of doc as alias)
+    end try
+    return ""
+end pathOf
+
+on openTrack(posixPath, previousDoc)
+    set trackFile to POSIX file posixPath
+    tell application "QuickTime Player"
+        if previousDoc is missing value then close every document
+        set newDoc to open trackFile
+        set started to false
+        repeat 40 times
+            try
+                play newDoc
+                set started to true
+                exit repeat
+            end try
+            delay 0.05
+        end repeat
+        -- Close the finished track only once the new one is playing
+        if previousDoc is not missing value then
+            try
+                close previousDoc
+            end try
+        end if
+        if not started then return missing value
+        return newDoc
+    end tell
+end openTrack
+
+-- Sleeps until just before the expected end, then polls closely, like
+-- EndOfTrackScheduler; a pause or seek is noticed within maxSleep
+on waitForEnd(doc)
+    tell application "QuickTime Player"
+        repeat
+            try
+                set isPlaying to playing of doc
+                set remaining to (duration of doc) - (current time of doc)
+            on error
+                return "closed"
+            end try
+            if not isPlaying and remaining <= 0.5 then return "finished"
+            if not isPlaying then
+                delay idleInterval
+            else if remaining > endLead + pollInterval then
+                set waitTime to remaining - endLead
+                if waitTime > maxSleep then set waitTime to maxSleep
+                delay waitTime
+            else
+                delay pollInterval
+            end if
+        end repeat
+    end tell
+end waitForEnd
+
+on run argv
+    set adoptFirst to (item 1 of argv) is "adopt"
+    set currentDoc to missing value
+    set played to 0
+    tell application "QuickTime Player" to activate
+    repeat with queueIndex from 2 to count argv
+        set posixPath to item queueIndex of argv
+        set eventIndex to (queueIndex - 2) as text
+        set how to "opened"
+        set nextDoc to missing value
+        if currentDoc is missing value and adoptFirst then
+            tell application "QuickTime Player"
+                if (count documents) > 0 then
+                    if my pathOf(front document) is posixPath then
+                        set nextDoc to front document
+                        play nextDoc
+                        set how to "adopted"
+                    end if
+                end if
+            end tell
+        else if currentDoc is not missing value then
+            if my pathOf(currentDoc) is posixPath then
+                -- Repeating the same file: rewind instead of reopening
+                tell application "QuickTime Player"
+                    set current time of currentDoc to 0
+                    play currentDoc
+                end tell
+                set nextDoc to currentDoc
+                set how to "rewound"
+            end if
+        end if
+        if nextDoc is missing value then
+            try
+                set nextDoc to my openTrack(posixPath, currentDoc)
+            on error errorText
+                set nextDoc to missing value
+            end try
+        end if
+        if nextDoc is missing value then
+            my emit("error|" & eventIndex & "|could not open " & posixPath)
+        else
+            set currentDoc to nextDoc
+            tell application "QuickTime Player" to set docDuration to duration of currentDoc
+            my emit("start|" & eventIndex & "|" & docDuration & "|" & how)
+            set played to played + 1
+            set endReason to my waitForEnd(currentDoc)
+            my emit("end|" & eventIndex & "|" & endReason)
+            if endReason is "closed" then exit repeat
+        end if
+    end repeat
+    my emit("done|" & played)
+end run
+'''
+
+
+# Longest queue handed to one runner; argv has room for far more
+RUNNER_QUEUE_LIMIT = 500
+
+
+class RunnerEvent:
+    """One parsed line of runner output"""
+    
+    def __init__(self, kind, position=-1, duration=0.0, detail=''):
+        self.kind = kind
+        self.position = position
+        self.duration = duration
+        self.detail = detail
+    
+    def __repr__(self):
+        return f"RunnerEvent({self.kind!r}, {self.position}, {self.duration:.1f}, {self.detail!r})"
+
+
+def parse_event(line):
+    """Parse one stdout line of RUNNER_SCRIPT; None if it is not an event"""
+    parts = line.rstrip('\r\n').split('|')
+    kind = parts[0]
+    try:
+        if kind == 'start' and len(parts) >= 4:
+            # Some locales write "12,5" for 12.5
+            duration = float(parts[2].strip().replace(',', '.'))
+            return RunnerEvent(kind, int(parts[1]), duration, '|'.join(parts[3:]))
+        if kind in ('end', 'error') and len(parts) >= 3:
+            return RunnerEvent(kind, int(parts[1]), detail='|'.join(parts[2:]))
+        if kind == 'done' and len(parts) >= 2:
+            return RunnerEvent(kind, detail=parts[1])
+    except ValueError:
+        pass
+    return None
+
+
+def runner_command(paths, adopt=False):
+    """osascript command line that plays paths in order"""
+    return ['osascript', '-e', RUNNER_SCRIPT, 'adopt' if adopt else 'open'] + [str(p) for p in paths]
+
+
+class PlaylistRunner(QThread):
+    """Runs one queue in an osascript session and relays its events
+    
+    Positions in the signals are indexes into the queue that was handed
+    over. stop() ends the session at once; QuickTime keeps whatever it
+    was playing, so a follow-up runner can adopt it.
+    """
+    
+    track_started = pyqtSignal(int, float, str)  # position, duration, how
+    track_ended = pyqtSignal(int, str)  # position, finished/closed
+    track_failed = pyqtSignal(int, str)  # position, message
+    queue_done = pyqtSignal()
+    runner_failed = pyqtSignal(str)  # osascript exited without finishing
+    
+    def __init__(self, paths, adopt=False, command=None, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.command = command or runner_command(self.paths, adopt)
+        self.process = None
+        self.stopped = False
+        self.events = 0
+        self.started_at = None
+    
+    def run(self):
+        self.started_at = time.monotonic()
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                bufsize=1
+            )
+        except OSError as e:
+            self.runner_failed.emit(str(e))
+            return
+        if self.stopped:
+            # stop() came before the process existed
+            self.process.kill()
+        
+        finished = False
+        for line in self.process.stdout:
+            event = parse_event(line)
+            if event is None or self.stopped:
+                continue
+            self.events += 1
+            if event.kind == 'start':
+                self.track_started.emit(event.position, event.duration, event.detail)
+            elif event.kind == 'end':
+                self.track_ended.emit(event.position, event.detail)
+            elif event.kind == 'error':
+                self.track_failed.emit(event.position, event.detail)
+            elif event.kind == 'done':
+                finished = True
+        
+        error = self.process.stderr.read().strip()
+        self.process.wait()
+        if self.stopped:
+            return
+        if finished:
+            self.queue_done.emit()
+        else:
+            self.runner_failed.emit(error or f"osascript exited with {self.process.returncode}")
+    
+    def stop(self):
+        """End the session without touching QuickTime; finished follows once the process is gone"""
+        self.stopped = True
+        if self.process and self.process.poll() is None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
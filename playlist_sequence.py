@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Playlist Sequence - Which track plays next
+Pure functions shared by the apps and the transition benchmark, so both
+follow the same repeat/shuffle rules
+"""
+
+
+def step_index(current, count, shuffle_queue=None, step=1):
+    """Index step tracks away from current, in shuffle order if a queue is given"""
+    if shuffle_queue:
+        try:
+            position = shuffle_queue.index(current)
+        except ValueError:
+            # Not in the queue: start from its first (or, going back, last) entry
+            position = -1 if step > 0 else len(shuffle_queue)
+        return shuffle_queue[(position + step) % len(shuffle_queue)]
+    if not 0 <= current < count:
+        # No current track: start before the first (or, going back, after the last)
+        current = -1 if step > 0 else count
+    return (current + step) % count
+
+
+def next_track_index(current, count, repeat_mode, shuffle_queue, history, single_track_mode=False):
+    """Index that plays when the current track ends, or None to stop
+    
+    shuffle_queue is None when shuffle is off. Without repeat, playback
+    stops once every track is in history.
+    """
+    if single_track_mode or not count:
+        return None
+    if repeat_mode == "one":
+        return current
+    if repeat_mode != "all":
+        if len(history) >= count:
+            return None
+        if shuffle_queue is not None:
+            for idx in shuffle_queue:
+                if idx not in history:
+                    return idx
+            return None
+    return step_index(current, count, shuffle_queue, 1)
+
+
+def plan_queue(current, count, repeat_mode, shuffle_queue, history, limit):
+    """current followed by the tracks that would play after it, at most limit
+    
+    Follows next_track_index without touching the caller's history, so a
+    whole run of tracks can be handed to the player up front.
+    """
+    if not 0 <= current < count:
+        return []
+    played = set(history)
+    played.add(current)
+    queue = [current]
+    index = current
+    while len(queue) < limit:
+        index = next_track_index(index, count, repeat_mode, shuffle_queue, played)
+        if index is None:
+            break
+        queue.append(index)
+        played.add(index)
+    return queue
+
+
+class NavigationCoalescer:
+    """Collapses a burst of next/previous presses into one target track
+    
+    Each press adds its step; when the burst settles, target() walks the
+    net number of steps from the track that was current at the first
+    press, so five quick Nexts cost one open instead of five.
+    """
+    
+    def __init__(self):
+        self.origin = None
+        self.steps = 0
+        self.presses = 0
+        self.bursts = 0
+        self.coalesced = 0  # presses absorbed into an earlier one
+    
+    @property
+    def pending(self):
+        return self.presses > 0
+    
+    def press(self, step, current):
+        """Record one press; current is the playing index at the first press"""
+        if not self.presses:
+            self.origin = current
+        self.steps += step
+        self.presses += 1
+    
+    def target(self, count, shuffle_queue=None):
+        """Index the burst lands on, or None if nothing is pending or it nets out with no track"""
+        if not self.presses or not count:
+            return None
+        if self.steps == 0:
+            # Back where the burst started
+            return self.origin if 0 <= self.origin < count else None
+        return step_index(self.origin, count, shuffle_queue, self.steps)
+    
+    def take(self, count, shuffle_queue=None):
+        """Target of the settled burst; starts a new burst"""
+        index = self.target(count, shuffle_queue)
+        if self.presses:
+            self.bursts += 1
+            self.coalesced += self.presses - 1
+        self.reset()
+        return index
+    
+    def reset(self):
+        """Forget pending presses"""
+        self.origin = None
+        self.steps = 0
+        self.presses = 0
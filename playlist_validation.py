@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Playlist Validation - Background existence/readability checks for playlist tracks
+Keeps slow or sleeping network volumes (SMB/AFP/NFS) off the Qt main thread
+"""
+
+import os
+import stat
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from pathlib import Path
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+
+
+# Track states reported by PathValidator
+STATE_CHECKING = "checking"
+STATE_OK = "ok"
+STATE_MISSING = "missing"
+STATE_UNREADABLE = "unreadable"
+STATE_UNAVAILABLE = "unavailable"  # Volume timed out or is offline, file may still exist
+
+# States play_current skips instead of asking QuickTime to open
+UNPLAYABLE_STATES = (STATE_MISSING, STATE_UNREADABLE)
+
+
+def volume_of(path):
+    """Return the volume root a path lives on without touching the filesystem"""
+    parts = Path(path).parts
+    # macOS mounts network shares and external disks under /Volumes/<name>
+    if len(parts) >= 3 and parts[0] == '/' and parts[1] in ('Volumes', 'Network', 'mnt', 'media'):
+        return str(Path(*parts[:3]))
+    return '/'
+
+
+def check_path(path):
+    """Check a single path; may block for a long time on a dead network share"""
+    try:
+        mode = os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        return STATE_MISSING
+    except OSError:
+        # EIO, ETIMEDOUT, ... from a share failing mid-check; the file may well be there
+        return STATE_UNAVAILABLE
+    if not stat.S_ISREG(mode):
+        return STATE_MISSING
+    if not os.access(path, os.R_OK):
+        return STATE_UNREADABLE
+    return STATE_OK
+
+
+def apply_item_state(item, path, state):
+    """Style a playlist QListWidgetItem for the given validation state"""
+    if state in (STATE_OK, STATE_CHECKING):
+        item.setForeground(QBrush())
+        item.setToolTip(path)
+        font = item.font()
+        font.setStrikeOut(False)
+        item.setFont(font)
+        return
+    
+    labels = {
+        STATE_MISSING: "Missing",
+        STATE_UNREADABLE: "Not readable",
+        STATE_UNAVAILABLE: "Volume unavailable",
+    }
+    item.setForeground(QBrush(QColor('#999999')))
+    item.setToolTip(f"{labels.get(state, state)}: {path}")
+    font = item.font()
+    font.setStrikeOut(state == STATE_MISSING)
+    item.setFont(font)
+
+
+class PathValidator(QObject):
+    """Validate playlist paths on a bounded thread pool with per-volume timeouts
+    
+    Paths are grouped by volume. Each volume is probed once with a timeout
+    before its files are checked, and all its files share one deadline
+    (files_timeout), so a sleeping share costs one timeout instead of one
+    per track. Checks still queued at the deadline are cancelled and the
+    volume counts as unavailable; while a check is stuck in the pool the
+    volume gets no new ones. Unavailable volumes are re-probed
+    periodically and their paths re-checked once they respond again.
+    Results arrive through path_checked on the thread owning the validator.
+    """
+    
+    path_checked = pyqtSignal(str, str)  # path, state
+    volume_unavailable = pyqtSignal(str)
+    volume_restored = pyqtSignal(str)
+    _retry_requested = pyqtSignal()
+    
+    def __init__(self, parent=None, max_workers=4, volume_timeout=3.0, files_timeout=10.0,
+                 retry_interval=15000):
+        super().__init__(parent)
+        self.volume_timeout = volume_timeout
+        self.files_timeout = files_timeout
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='path-check')
+        
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._busy = {}  # volume -> probes and checks of it still running in the pool
+        self._offline = {}  # volume -> list of paths waiting for the volume to return
+        
+        # Periodically retry volumes that timed out
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setInterval(retry_interval)
+        self.retry_timer.timeout.connect(self.retry_offline_volumes)
+        self._retry_requested.connect(self.retry_timer.start)
+    
+    def validate(self, paths):
+        """Start checking paths; results from any earlier call are discarded"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._offline.clear()
+        
+        by_volume = {}
+        for path in dict.fromkeys(paths):
+            by_volume.setdefault(volume_of(path), []).append(path)
+        
+        for volume, volume_paths in by_volume.items():
+            self._start_volume(generation, volume, volume_paths)
+    
+    def cancel(self):
+        """Drop all pending results"""
+        with self._lock:
+            self._generation += 1
+            self._offline.clear()
+        self.retry_timer.stop()
+    
+    def shutdown(self):
+        """Stop the pool without waiting for checks stuck on a dead volume"""
+        self.cancel()
+        self.pool.shutdown(wait=False)
+    
+    def retry_offline_volumes(self):
+        """Re-probe volumes that previously timed out"""
+        with self._lock:
+            generation = self._generation
+            pending = list(self._offline.items())
+        
+        if not pending:
+            self.retry_timer.stop()
+            return
+        
+        for volume, paths in pending:
+            self._start_volume(generation, volume, paths, retry=True)
+    
+    def _start_volume(self, generation, volume, paths, retry=False):
+        """Supervise one volume on its own thread so timeouts never block the caller"""
+        with self._lock:
+            busy = bool(self._busy.get(volume))
+            if not busy:
+                self._busy[volume] = 1  # the probe
+        if busy:
+            # A previous probe or check is still hung; don't pile more threads
+            # onto it, but report the paths and keep retrying
+            self._mark_offline(generation, volume, paths, retry)
+            return
+        
+        thread = threading.Thread(
+            target=self._check_volume,
+            args=(generation, volume, paths, retry),
+            daemon=True
+        )
+        thread.start()
+    
+    def _check_volume(self, generation, volume, paths, retry):
+        """Probe the volume, then check each of its paths"""
+        probe = self.pool.submit(os.stat, volume)
+        probe.add_done_callback(lambda f: self._release(volume))
+        
+        try:
+            probe.result(timeout=self.volume_timeout)
+        except (FutureTimeout, OSError):
+            self._mark_offline(generation, volume, paths, retry)
+            return
+        
+        if retry:
+            with self._lock:
+                self._offline.pop(volume, None)
+            if self._is_current(generation):
+                self.volume_restored.emit(volume)
+        
+        # One deadline for the whole volume; results are reported as they arrive
+        futures = {self.pool.submit(check_path, path): path for path in paths}
+        deadline = time.monotonic() + self.files_timeout
+        pending = set(futures)
+        while pending and self._is_current(generation):
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                self.path_checked.emit(futures[future], future.result())
+        if not pending:
+            return
+        
+        # Drop what has not started; checks already stuck keep the volume busy
+        stuck = [future for future in pending if not future.cancel()]
+        if stuck:
+            with self._lock:
+                self._busy[volume] = self._busy.get(volume, 0) + len(stuck)
+            for future in stuck:
+                future.add_done_callback(lambda f: self._release(volume))
+        self._mark_offline(generation, volume, [futures[future] for future in pending], retry)
+    
+    def _release(self, volume):
+        """One probe or check of volume left the pool"""
+        with self._lock:
+            left = self._busy.get(volume, 0) - 1
+            if left > 0:
+                self._busy[volume] = left
+            else:
+                self._busy.pop(volume, None)
+    
+    def _mark_offline(self, generation, volume, paths, retry):
+        """Remember paths on an unresponsive volume and schedule a retry"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._offline[volume] = paths
+        
+        for path in paths:
+            self.path_checked.emit(path, STATE_UNAVAILABLE)
+        if not retry:
+            self.volume_unavailable.emit(volume)
+        # Queued to the validator's thread; QTimer can't be started from here
+        self._retry_requested.emit()
+    
+    def _is_current(self, generation):
+        with self._lock:
+            return generation == self._generation
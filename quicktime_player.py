@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+QuickTime Player - Shared player queries for the playlist apps
+All QuickTime commands live in one precompiled AppleScript library;
+the status handler returns everything a poll needs (state, position,
+duration, document count, document path) in a single round trip
+"""
+
+import time
+
+from applescript_bridge import call_applescript
+
+
+# Every QuickTime command is a handler of this one library. The bridge
+# compiles it once and passes file paths and document names as handler
+# arguments, so they are never spliced into AppleScript source.
+#
+# playerStatus joins its fields with "|" and puts the path last, so a "|"
+# in a file name cannot shift the other fields. documentName "" means the
+# front document.
+QUICKTIME_LIBRARY = '''
+on playerStatus(documentName)
+    tell application "System Events" to set isRunning to exists (process "QuickTime Player")
+    if not isRunning then return "not_running|false|0|0|0|"
+    tell application "QuickTime Player"
+        set docCount to count documents
+        if docCount = 0 then return "no_document|false|0|0|0|"
+        try
+            if documentName is "" then
+                set doc to front document
+            else
+                set doc to document documentName
+            end if
+        on error
+            return "no_document|false|0|0|" & docCount & "|"
+        end try
+        set docPath to ""
+        try
+            set docPath to POSIX path of (file of doc as alias)
+        end try
+        try
+            set isPlaying to playing of doc
+            set currentTime to current time of doc
+            set docDuration to duration of doc
+        on error
+            return "finished|false|0|0|" & docCount & "|" & docPath
+        end try
+        if isPlaying then
+            set playerState to "playing"
+        else if currentTime >= (docDuration - 1) then
+            set playerState to "finished"
+        else
+            set playerState to "paused"
+        end if
+        return playerState & "|" & isPlaying & "|" & currentTime & "|" & docDuration & "|" & docCount & "|" & docPath
+    end tell
+end playerStatus
+
+on openTrack(posixPath, startPlaying)
+    set trackFile to POSIX file posixPath
+    tell application "QuickTime Player"
+        activate
+        set newDoc to open trackFile
+        
+        -- Poll until the document is ready instead of a fixed delay: a warm
+        -- player answers almost at once, a cold launch takes seconds. Play
+        -- it unless AirPlay goes first
+        repeat 70 times
+            try
+                get duration of newDoc
+                if not startPlaying then return "ready"
+                play newDoc
+                return "playing"
+            end try
+            delay 0.1
+        end repeat
+        
+        return "failed"
+    end tell
+end openTrack
+
+on playFront()
+    tell application "QuickTime Player"
+        if (count documents) > 0 then
+            play front document
+            return "playing"
+        end if
+        return "no document"
+    end tell
+end playFront
+
+-- Pauses every document, so a preloaded one in front cannot take the command
+on pauseAll()
+    tell application "QuickTime Player"
+        repeat with doc in documents
+            pause doc
+        end repeat
+    end tell
+end pauseAll
+
+on seekTo(newTime)
+    tell application "QuickTime Player" to set current time of front document to newTime
+end seekTo
+
+on closeFront(keepRunning)
+    tell application "QuickTime Player"
+        if (count documents) > 0 then
+            close front document
+            delay 0.5
+            
+            -- If no documents remain, quit QuickTime unless it is kept warm
+            if (count documents) = 0 and not keepRunning then
+                quit
+            end if
+        end if
+    end tell
+end closeFront
+
+on closeAll()
+    tell application "QuickTime Player" to close every document
+end closeAll
+
+-- Leaves QuickTime running with no document open. Returns "warm" if it
+-- was already running or "cold" if it had to launch, then "|" and the
+-- number of documents closed
+on warmUp()
+    set wasRunning to application "QuickTime Player" is running
+    tell application "QuickTime Player"
+        if not wasRunning then launch
+        set docCount to count documents
+        if docCount > 0 then close every document
+    end tell
+    if wasRunning then return "warm|" & docCount
+    return "cold|" & docCount
+end warmUp
+
+on quitPlayer()
+    tell application "QuickTime Player"
+        close every document
+        delay 0.5
+        quit
+    end tell
+end quitPlayer
+
+-- Opens a track paused behind the playing one and returns its document name
+on preloadTrack(posixPath, keepFrontName)
+    set trackFile to POSIX file posixPath
+    tell application "QuickTime Player"
+        set nextDoc to open trackFile
+        repeat 20 times
+            try
+                pause nextDoc
+                set current time of nextDoc to 0
+                exit repeat
+            end try
+            delay 0.1
+        end repeat
+        -- Keep the playing track's window in front
+        try
+            set index of window keepFrontName to 1
+        end try
+        return name of nextDoc
+    end tell
+end preloadTrack
+
+-- Starts a preloaded document, then closes everything else
+on switchTo(documentName)
+    tell application "QuickTime Player"
+        if not (exists document documentName) then return "missing"
+        play document documentName
+        try
+            set index of window documentName to 1
+        end try
+        close (every document whose name is not documentName)
+        return "playing"
+    end tell
+end switchTo
+
+-- "on" if window 1 shows one of the markers (linefeed-separated texts
+-- QuickTime displays while playing to AirPlay), "off" if it shows none,
+-- "unknown" if there is no window to look at
+on airplayRoute(markerText)
+    set AppleScript's text item delimiters to linefeed
+    set markers to text items of markerText
+    tell application "System Events"
+        if not (exists process "QuickTime Player") then return "unknown"
+        tell process "QuickTime Player"
+            if not (exists window 1) then return "unknown"
+            try
+                set shownText to ((value of every static text of window 1) & ¬
+                    (value of every static text of every group of window 1)) as text
+            on error
+                return "unknown"
+            end try
+        end tell
+    end tell
+    repeat with marker in markers
+        if shownText contains (marker as text) then return "on"
+    end repeat
+    return "off"
+end airplayRoute
+
+-- Clicks the AirPlay button of window 1 and waits until its menu opens.
+-- layoutTable holds "width,height,buttons|index" lines from earlier clicks:
+-- the remembered button is tried first and the buttons are only scanned
+-- when it is no longer the AirPlay button. The menu is polled with a
+-- growing step for up to menuTimeout seconds. Returns
+-- "layout|index|x,y|hit or scan|ms until the menu opened (-1: not seen)|description"
+on clickAirPlayButton(layoutTable, menuTimeout)
+    tell application "System Events"
+        tell process "QuickTime Player"
+            set frontmost to true
+            set winSize to size of window 1
+            set btnCount to count of buttons of window 1
+            set layoutKey to ((item 1 of winSize) as integer as text) & "," & ¬
+                ((item 2 of winSize) as integer as text) & "," & btnCount
+            
+            set btnIndex to 0
+            set lookup to "scan"
+            repeat with entry in paragraphs of layoutTable
+                if (entry as text) starts with (layoutKey & "|") then
+                    set cachedIndex to (text ((length of layoutKey) + 2) thru -1 of (entry as text)) as integer
+                    if cachedIndex ≤ btnCount then
+                        try
+                            set btnDesc to description of button cachedIndex of window 1
+                            if btnDesc contains "외장" or btnDesc contains "AirPlay" then
+                                set btnIndex to cachedIndex
+                                set lookup to "hit"
+                            end if
+                        end try
+                    end if
+                    exit repeat
+                end if
+            end repeat
+            
+            if btnIndex = 0 then
+                repeat with i from 1 to btnCount
+                    try
+                        set btnDesc to description of button i of window 1
+                        if btnDesc contains "외장" or btnDesc contains "AirPlay" then
+                            set btnIndex to i
+                            exit repeat
+                        end if
+                    end try
+                end repeat
+            end if
+            if btnIndex = 0 then return "not found"
+            
+            set btnPos to position of button btnIndex of window 1
+            set windowsBefore to count of windows
+            click button btnIndex of window 1
+            
+            -- The menu opens as a window of its own
+            set waited to 0
+            set stepTime to 0.03
+            set menuReady to -1
+            repeat while waited < menuTimeout
+                if (count of windows) > windowsBefore then
+                    set menuReady to (waited * 1000) as integer
+                    exit repeat
+                end if
+                delay stepTime
+                set waited to waited + stepTime
+                if stepTime < 0.2 then set stepTime to stepTime * 1.5
+            end repeat
+        end tell
+    end tell
+    return layoutKey & "|" & btnIndex & "|" & ((item 1 of btnPos) as integer) & "," & ¬
+        ((item 2 of btnPos) as integer) & "|" & lookup & "|" & menuReady & "|" & btnDesc
+end clickAirPlayButton
+'''
+
+# Seconds before the end of a track at which the next one is preloaded
+PRELOAD_LEAD = 8.0
+
+# States after which the playlist should move on
+FINISHED_STATES = ('finished', 'no_document', 'not_running', 'error')
+
+
+def call_player(handler, *args, timeout=None):
+    """Run a QUICKTIME_LIBRARY handler through the shared bridge"""
+    return call_applescript(QUICKTIME_LIBRARY, handler, *args, timeout=timeout)
+
+
+def _number(text):
+    """Parse an AppleScript number; some locales write "12,5" for 12.5"""
+    try:
+        return float(text.strip().replace(',', '.'))
+    except ValueError:
+        return 0.0
+
+
+class PlayerStatus:
+    """One parsed status record"""
+    
+    def __init__(self, state, playing=False, current_time=0.0, duration=0.0,
+                 document_count=0, document_path=''):
+        self.state = state
+        self.playing = playing
+        self.current_time = current_time
+        self.duration = duration
+        self.document_count = document_count
+        self.document_path = document_path
+    
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+    
+    @property
+    def progress(self):
+        """Position as a fraction of the duration (0 if unknown)"""
+        if self.duration <= 0:
+            return 0.0
+        return max(0.0, min(1.0, self.current_time / self.duration))
+    
+    def __repr__(self):
+        return (f"PlayerStatus({self.state!r}, {self.current_time:.1f}/{self.duration:.1f}s, "
+                f"docs={self.document_count}, path={self.document_path!r})")
+
+
+def parse_status(text):
+    """Parse the reply of the playerStatus handler"""
+    parts = text.rstrip('\r\n').split('|', 5)
+    if len(parts) < 6:
+        return PlayerStatus('error')
+    state, playing, current_time, duration, document_count, document_path = parts
+    try:
+        document_count = int(document_count)
+    except ValueError:
+        document_count = 0
+    return PlayerStatus(
+        state,
+        playing.strip() == 'true',
+        _number(current_time),
+        _number(duration),
+        document_count,
+        document_path
+    )
+
+
+def query_status(call=call_player, timeout=5, document_name=None):
+    """Ask QuickTime for its full status in one round trip
+    
+    Script errors come back as state "error"; timeouts propagate as
+    subprocess.TimeoutExpired so callers can tell a slow player apart.
+    Pass document_name when another document may be in front (preloading).
+    """
+    result = call('playerStatus', document_name or '', timeout=timeout)
+    if result.returncode != 0:
+        return PlayerStatus('error')
+    return parse_status(result.stdout)
+
+
+class EndOfTrackScheduler:
+    """Plans the next status poll from the last one
+    
+    While a track plays, the expected end is anchored to the monotonic
+    clock and the poller sleeps until lead seconds before it (at most
+    max_sleep, so seeks and drift are still noticed), then polls every
+    dense_interval until the track ends. Paused or unknown-length tracks
+    are polled every idle_interval. Each poll re-anchors the end time.
+    """
+    
+    def __init__(self, lead=1.5, dense_interval=0.25, idle_interval=2.0,
+                 max_sleep=30.0, drift_tolerance=1.0):
+        self.lead = lead
+        self.dense_interval = dense_interval
+        self.idle_interval = idle_interval
+        self.max_sleep = max_sleep
+        self.drift_tolerance = drift_tolerance
+        self.reset()
+    
+    def reset(self):
+        """Forget the anchor, e.g. when a new track starts"""
+        self.expected_end = None
+        self.poll_count = 0
+        self.reanchor_count = 0
+    
+    def remaining(self, now=None):
+        """Seconds until the anchored end, or None if not anchored"""
+        if self.expected_end is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.expected_end - now)
+    
+    def next_delay(self, status, now=None):
+        """Seconds to wait before the next poll"""
+        now = time.monotonic() if now is None else now
+        self.poll_count += 1
+        if not status.playing or status.duration <= 0:
+            # Paused: the end moves with every second of pause
+            self.expected_end = None
+            return self.idle_interval
+        
+        remaining = max(0.0, status.duration - status.current_time)
+        expected_end = now + remaining
+        if self.expected_end is not None and abs(expected_end - self.expected_end) > self.drift_tolerance:
+            # Seek, resume or clock drift moved the end
+            self.reanchor_count += 1
+        self.expected_end = expected_end
+        
+        if remaining > self.lead:
+            return min(remaining - self.lead, self.max_sleep)
+        return self.dense_interval
+
+
+def preload_document(path, keep_front_name, call=call_player, timeout=10):
+    """Open path paused in the background; return its document name or None"""
+    result = call('preloadTrack', str(path), keep_front_name, timeout=timeout)
+    name = result.stdout.strip()
+    if result.returncode != 0 or not name:
+        print(f"Preload failed: {result.stderr.strip()}")
+        return None
+    return name
+
+
+def switch_to_document(name, call=call_player, timeout=5):
+    """Play a preloaded document and close the finished one"""
+    result = call('switchTo', name, timeout=timeout)
+    return result.returncode == 0 and result.stdout.strip() == 'playing'
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Smart Playlist - Declarative rules evaluated over the track library
+Rules compile to one indexed SQL query against the metadata cache and
+play statistics, e.g. "under 6 minutes, by these artists, not played in 7 days"
+"""
+
+import time
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+
+
+# Rule field -> SQL expression over tracks t LEFT JOIN play_stats s
+FIELDS = {
+    'path': 't.path',
+    'title': 't.title',
+    'artist': 't.artist',
+    'album': 't.album',
+    'duration': 't.duration',
+    'play_count': 'COALESCE(s.play_count, 0)',
+    'skip_count': 'COALESCE(s.skip_count, 0)',
+    'last_played': 's.last_played',
+    'completion': 's.completion',
+}
+TEXT_FIELDS = ('path', 'title', 'artist', 'album')
+COMPARISONS = {'=': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+ORDERS = {
+    'path': 't.path',
+    'title': 't.title COLLATE NOCASE',
+    'artist': 't.artist COLLATE NOCASE, t.album COLLATE NOCASE, t.path',
+    'album': 't.album COLLATE NOCASE, t.path',
+    'duration': 't.duration',
+    'least_played': 'COALESCE(s.play_count, 0), t.path',
+    'least_recent': 'COALESCE(s.last_played, 0), t.path',
+    'random': 'RANDOM()',
+}
+DAY = 24 * 60 * 60
+
+
+def _compile_rule(rule, now):
+    """Compile one rule dict to (sql, params)"""
+    field = rule.get('field')
+    op = rule.get('op')
+    value = rule.get('value')
+    if field not in FIELDS:
+        raise ValueError(f"Unknown smart playlist field: {field}")
+    column = FIELDS[field]
+    collate = ' COLLATE NOCASE' if field in TEXT_FIELDS else ''
+    
+    if op in COMPARISONS:
+        return f'{column}{collate} {COMPARISONS[op]} ?', [value]
+    if op in ('in', 'not_in'):
+        values = list(value or [])
+        if not values:
+            # Empty "in" matches nothing, empty "not in" everything
+            return ('0', []) if op == 'in' else ('1', [])
+        marks = ','.join('?' * len(values))
+        negate = 'NOT ' if op == 'not_in' else ''
+        return f'{column}{collate} {negate}IN ({marks})', values
+    if op == 'contains':
+        escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"{column} LIKE ? ESCAPE '\\'", [f'%{escaped}%']
+    if op in ('in_last_days', 'not_in_last_days'):
+        cutoff = now - float(value) * DAY
+        if op == 'in_last_days':
+            return f'{column} >= ?', [cutoff]
+        return f'({column} IS NULL OR {column} < ?)', [cutoff]
+    raise ValueError(f"Unknown smart playlist operator: {op}")
+
+
+class SmartPlaylist:
+    """A named set of rules plus the paths that currently satisfy them"""
+    
+    def __init__(self, name, rules, match='all', order='artist', limit=None):
+        self.name = name
+        self.rules = list(rules)
+        self.match = match
+        self.order = order
+        self.limit = limit
+        self.paths = []
+        self._path_set = set()
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get('name', 'Smart Playlist'),
+            data.get('rules', []),
+            data.get('match', 'all'),
+            data.get('order', 'artist'),
+            data.get('limit')
+        )
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'rules': self.rules,
+            'match': self.match,
+            'order': self.order,
+            'limit': self.limit,
+        }
+    
+    @property
+    def is_time_relative(self):
+        """True if results change with the clock alone"""
+        return any(rule.get('op', '').endswith('_last_days') for rule in self.rules)
+    
+    def where_clause(self, now=None):
+        """Compile all rules to a WHERE expression and parameters"""
+        now = time.time() if now is None else now
+        parts, params = [], []
+        for rule in self.rules:
+            sql, rule_params = _compile_rule(rule, now)
+            parts.append(f'({sql})')
+            params.extend(rule_params)
+        if not parts:
+            return '1', []
+        joiner = ' OR ' if self.match == 'any' else ' AND '
+        return joiner.join(parts), params
+    
+    def evaluate(self, conn, now=None):
+        """Run the full query and remember the result; return the ordered paths"""
+        where, params = self.where_clause(now)
+        sql = (
+            'SELECT t.path FROM tracks t LEFT JOIN play_stats s ON s.path = t.path '
+            f'WHERE {where} ORDER BY {ORDERS.get(self.order, ORDERS["path"])}'
+        )
+        if self.limit:
+            sql += ' LIMIT ?'
+            params = params + [int(self.limit)]
+        self.paths = [row[0] for row in conn.execute(sql, params)]
+        self._path_set = set(self.paths)
+        return self.paths
+    
+    def refresh(self, conn, now=None, keep=None):
+        """Re-run the full query; return (added, removed) against the previous result
+        
+        keep (the playing track) stays where it was even if it no longer
+        matches; a later update drops it once it is no longer kept.
+        """
+        old_paths = self.paths
+        old = self._path_set
+        new_paths = self.evaluate(conn, now)
+        if keep in old and keep not in self._path_set:
+            # Back in front of the first track that followed it and is still here
+            following = old_paths[old_paths.index(keep) + 1:]
+            later = next((path for path in following if path in self._path_set), None)
+            self.paths.insert(self.paths.index(later) if later is not None else len(self.paths), keep)
+            self._path_set.add(keep)
+        added = [path for path in new_paths if path not in old]
+        removed = [path for path in old if path not in self._path_set]
+        return added, removed
+    
+    def update(self, conn, changed_paths, now=None, keep=None):
+        """Re-check only changed paths; return (added, removed) path lists
+        
+        Limited playlists depend on every track's rank, so they fall back to
+        a full evaluation and a diff. So do new matches, which belong where
+        ORDER BY puts them rather than at the end; removals keep the order.
+        keep is never removed, as in refresh().
+        """
+        changed = list(dict.fromkeys(changed_paths))
+        if not changed:
+            return [], []
+        
+        if self.limit or self.order == 'random':
+            return self.refresh(conn, now, keep)
+        
+        where, params = self.where_clause(now)
+        matching = set()
+        for start in range(0, len(changed), 500):
+            batch = changed[start:start + 500]
+            marks = ','.join('?' * len(batch))
+            sql = (
+                'SELECT t.path FROM tracks t LEFT JOIN play_stats s ON s.path = t.path '
+                f'WHERE t.path IN ({marks}) AND ({where})'
+            )
+            matching.update(row[0] for row in conn.execute(sql, batch + params))
+        
+        if any(path in matching and path not in self._path_set for path in changed):
+            return self.refresh(conn, now, keep)
+        
+        removed = [
+            path for path in changed
+            if path not in matching and path in self._path_set and path != keep
+        ]
+        if removed:
+            gone = set(removed)
+            self.paths = [path for path in self.paths if path not in gone]
+            self._path_set = set(self.paths)
+        return [], removed
+
+
+class SmartPlaylistDialog(QDialog):
+    """Build a smart playlist from a few common rules"""
+    
+    def __init__(self, parent=None, smart_playlist=None):
+        super().__init__(parent)
+        self.setWindowTitle("Smart Playlist")
+        self.setModal(True)
+        self.resize(420, 320)
+        self.init_ui()
+        if smart_playlist:
+            self.load(smart_playlist)
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        self.name_edit = QLineEdit("Smart Playlist")
+        form.addRow("Name:", self.name_edit)
+        
+        self.max_minutes_spin = QSpinBox()
+        self.max_minutes_spin.setRange(0, 600)
+        self.max_minutes_spin.setSpecialValueText("Any length")
+        self.max_minutes_spin.setSuffix(" min")
+        form.addRow("Shorter than:", self.max_minutes_spin)
+        
+        self.artists_edit = QLineEdit()
+        self.artists_edit.setPlaceholderText("Comma separated, empty = any")
+        form.addRow("Artists:", self.artists_edit)
+        
+        self.album_edit = QLineEdit()
+        self.album_edit.setPlaceholderText("Empty = any")
+        form.addRow("Album contains:", self.album_edit)
+        
+        self.not_played_spin = QSpinBox()
+        self.not_played_spin.setRange(0, 3650)
+        self.not_played_spin.setSpecialValueText("Off")
+        self.not_played_spin.setSuffix(" days")
+        form.addRow("Not played in:", self.not_played_spin)
+        
+        self.max_skips_spin = QSpinBox()
+        self.max_skips_spin.setRange(-1, 1000)
+        self.max_skips_spin.setValue(-1)
+        self.max_skips_spin.setSpecialValueText("Any")
+        form.addRow("Skipped at most:", self.max_skips_spin)
+        
+        self.order_combo = QComboBox()
+        for key, label in (('artist', "Artist"), ('title', "Title"), ('album', "Album"),
+                           ('least_played', "Least played first"),
+                           ('least_recent', "Least recently played first"),
+                           ('random', "Random")):
+            self.order_combo.addItem(label, key)
+        form.addRow("Order:", self.order_combo)
+        
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(0, 100000)
+        self.limit_spin.setSpecialValueText("No limit")
+        form.addRow("Limit:", self.limit_spin)
+        
+        layout.addLayout(form)
+        
+        help_text = QLabel("Rules are evaluated over tracks the app has already seen.")
+        help_text.setStyleSheet("color: #666; font-size: 11px;")
+        help_text.setWordWrap(True)
+        layout.addWidget(help_text)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+    
+    def load(self, smart_playlist):
+        """Fill the form from an existing smart playlist"""
+        self.name_edit.setText(smart_playlist.name)
+        for rule in smart_playlist.rules:
+            field, op, value = rule.get('field'), rule.get('op'), rule.get('value')
+            if field == 'duration' and op == '<':
+                self.max_minutes_spin.setValue(int(value // 60))
+            elif field == 'artist' and op == 'in':
+                self.artists_edit.setText(', '.join(value))
+            elif field == 'album' and op == 'contains':
+                self.album_edit.setText(value)
+            elif field == 'last_played' and op == 'not_in_last_days':
+                self.not_played_spin.setValue(int(value))
+            elif field == 'skip_count' and op == '<=':
+                self.max_skips_spin.setValue(int(value))
+        index = self.order_combo.findData(smart_playlist.order)
+        if index >= 0:
+            self.order_combo.setCurrentIndex(index)
+        self.limit_spin.setValue(smart_playlist.limit or 0)
+    
+    def get_smart_playlist(self):
+        """Build the SmartPlaylist described by the form"""
+        rules = []
+        if self.max_minutes_spin.value():
+            rules.append({'field': 'duration', 'op': '<', 'value': self.max_minutes_spin.value() * 60})
+        artists = [a.strip() for a in self.artists_edit.text().split(',') if a.strip()]
+        if artists:
+            rules.append({'field': 'artist', 'op': 'in', 'value': artists})
+        if self.album_edit.text().strip():
+            rules.append({'field': 'album', 'op': 'contains', 'value': self.album_edit.text().strip()})
+        if self.not_played_spin.value():
+            rules.append({'field': 'last_played', 'op': 'not_in_last_days',
+                          'value': self.not_played_spin.value()})
+        if self.max_skips_spin.value() >= 0:
+            rules.append({'field': 'skip_count', 'op': '<=', 'value': self.max_skips_spin.value()})
+        
+        return SmartPlaylist(
+            self.name_edit.text().strip() or "Smart Playlist",
+            rules,
+            order=self.order_combo.currentData(),
+            limit=self.limit_spin.value() or None
+        )
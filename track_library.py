@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Track Library - SQLite cache of track metadata and play statistics
+Tags are read once per file (re-read only when size or mtime changes),
+so smart playlists and search never have to open the audio files again
+"""
+
+import os
+import queue
+import sqlite3
+import time
+from pathlib import Path
+from PyQt5.QtCore import QThread, pyqtSignal
+
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+
+DEFAULT_DB = Path.home() / '.quicktime_playlist_library.db'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    size INTEGER,
+    title TEXT,
+    artist TEXT,
+    album TEXT,
+    duration REAL,
+    scanned_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks(artist COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_tracks_album ON tracks(album COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_tracks_duration ON tracks(duration);
+
+-- Filled by playback logging
+CREATE TABLE IF NOT EXISTS play_stats (
+    path TEXT PRIMARY KEY,
+    play_count INTEGER NOT NULL DEFAULT 0,
+    skip_count INTEGER NOT NULL DEFAULT 0,
+    finish_count INTEGER NOT NULL DEFAULT 0,
+    last_played REAL,
+    completion REAL,
+    completion_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_play_stats_last_played ON play_stats(last_played);
+'''
+
+# Columns added after a table was first created: table -> [(column, definition)]
+ADDED_COLUMNS = {
+    'play_stats': [('completion_count', 'INTEGER NOT NULL DEFAULT 0')],
+}
+
+SCAN_BATCH_SIZE = 200
+
+
+def read_tags(path):
+    """Read title/artist/album/duration with mutagen; file name only if unavailable"""
+    tags = {'title': Path(path).stem, 'artist': None, 'album': None, 'duration': None}
+    if mutagen is None:
+        return tags
+    
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception as e:
+        print(f"Tag read error for {Path(path).name}: {e}")
+        return tags
+    if audio is None:
+        return tags
+    
+    for key in ('title', 'artist', 'album'):
+        values = audio.get(key)
+        if values:
+            tags[key] = str(values[0])
+    if getattr(audio, 'info', None) is not None and getattr(audio.info, 'length', None):
+        tags['duration'] = float(audio.info.length)
+    return tags
+
+
+def connect(db_path=DEFAULT_DB):
+    """Open the library database in WAL mode so readers never wait on the scanner"""
+    conn = sqlite3.connect(str(db_path), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for name, definition in columns:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+    return conn
+
+
+class TrackLibrary:
+    """Metadata cache keyed by path; one instance per thread"""
+    
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+    
+    def close(self):
+        self.conn.close()
+    
+    def scan(self, paths):
+        """Refresh metadata for paths whose size or mtime changed; return changed paths"""
+        changed = []
+        paths = list(dict.fromkeys(paths))
+        for start in range(0, len(paths), SCAN_BATCH_SIZE):
+            batch = paths[start:start + SCAN_BATCH_SIZE]
+            known = self._stamps(batch)
+            rows = []
+            for path in batch:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if known.get(path) == (st.st_mtime, st.st_size):
+                    continue
+                tags = read_tags(path)
+                rows.append((path, st.st_mtime, st.st_size, tags['title'], tags['artist'],
+                             tags['album'], tags['duration'], time.time()))
+            if rows:
+                with self.conn:
+                    self.conn.executemany(
+                        'INSERT OR REPLACE INTO tracks '
+                        '(path, mtime, size, title, artist, album, duration, scanned_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        rows
+                    )
+                changed.extend(row[0] for row in rows)
+        return changed
+    
+    def metadata(self, paths):
+        """Return {path: row} for cached paths"""
+        result = {}
+        paths = list(paths)
+        # Stay under SQLite's host parameter limit
+        for start in range(0, len(paths), 500):
+            batch = paths[start:start + 500]
+            marks = ','.join('?' * len(batch))
+            for row in self.conn.execute(f'SELECT * FROM tracks WHERE path IN ({marks})', batch):
+                result[row['path']] = row
+        return result
+    
+    def _stamps(self, paths):
+        marks = ','.join('?' * len(paths))
+        return {
+            row['path']: (row['mtime'], row['size'])
+            for row in self.conn.execute(
+                f'SELECT path, mtime, size FROM tracks WHERE path IN ({marks})', paths
+            )
+        }
+
+
+class LibraryScanner(QThread):
+    """Background thread that keeps the metadata cache current"""
+    
+    tracks_scanned = pyqtSignal(list)  # paths whose metadata changed
+    
+    def __init__(self, db_path=DEFAULT_DB, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.requests = queue.Queue()
+    
+    def enqueue(self, paths):
+        """Schedule paths for scanning"""
+        if paths:
+            self.requests.put(list(paths))
+    
+    def stop(self):
+        self.requests.put(None)
+        self.wait(2000)
+    
+    def run(self):
+        library = TrackLibrary(self.db_path)
+        try:
+            while True:
+                paths = self.requests.get()
+                if paths is None:
+                    break
+                # Merge requests that piled up while scanning
+                while not self.requests.empty():
+                    more = self.requests.get()
+                    if more is None:
+                        self.requests.put(None)
+                        break
+                    paths.extend(more)
+                try:
+                    changed = library.scan(paths)
+                except sqlite3.Error as e:
+                    print(f"Library scan error: {e}")
+                    continue
+                if changed:
+                    self.tracks_scanned.emit(changed)
+        finally:
+            library.close()